@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор списков админки с оценкой количества строк для больших таблиц.
+
+    Для списка без фильтров и поиска количество строк берется из статистики PostgreSQL
+    (`pg_class.reltuples`) вместо `COUNT(*)`, если оценка превышает `ADMIN_ESTIMATED_COUNT_THRESHOLD`.
+    Для небольших таблиц, отфильтрованных списков и таблиц без статистики выполняется точный подсчет.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self.estimated_count(queryset)
+            if estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimated_count(queryset):
+        """
+        Возвращает оценку количества строк таблицы модели по статистике PostgreSQL или -1, если ее нет.
+        """
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] is not None else -1
+
+
+class PerformanceAdminMixin:
+    """
+    Настройки списков админки для больших таблиц.
+
+    Использует `EstimatedCountPaginator` и не выполняет повторный подсчет всех строк
+    при поиске и фильтрации (`show_full_result_count = False`).
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
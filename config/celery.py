@@ -1,6 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_init
 
 # Установка переменной окружения для настроек проекта
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -13,3 +14,48 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Автоматическое обнаружение и регистрация задач из файлов tasks.py в приложениях Django
 app.autodiscover_tasks()
+
+
+def close_database_connections():
+    """
+    Закрывает соединения с базой и пулы соединений текущего процесса.
+
+    Вызывается в главном процессе воркера перед fork: иначе дочерний процесс унаследует сокеты
+    соединений и пулы, чьи фоновые потоки после fork не работают, а закрытие унаследованного
+    соединения в дочернем процессе разорвет его и у родителя.
+    """
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if connection.alias in getattr(connection, '_connection_pools', {}):
+            connection.close_pool()
+
+
+@worker_init.connect
+def close_database_connections_on_fork(**kwargs):
+    """
+    Регистрирует закрытие соединений перед каждым fork главного процесса воркера.
+    """
+    os.register_at_fork(before=close_database_connections)
+
+
+@task_prerun.connect
+@task_postrun.connect
+def release_database_connections(sender=None, **kwargs):
+    """
+    Возвращает соединения с базой в пул до и после каждой задачи, закрывая неисправные и устаревшие.
+
+    При `CELERY_DB_REUSE_MAX` интеграция Celery с Django не закрывает соединения между задачами,
+    и дочерний процесс держал бы одно соединение из пула до пересоздания. Тогда ни проверка пула
+    при выдаче, ни `CONN_HEALTH_CHECKS` не выполнялись бы, и после перезапуска PostgreSQL задачи
+    падали бы на разорванном соединении. Соединения внутри транзакции и у задач, выполняемых
+    синхронно (`apply`, `task_always_eager`), не трогаются.
+    """
+    from django.db import connections
+
+    if getattr(getattr(sender, 'request', None), 'is_eager', False):
+        return
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
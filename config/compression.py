@@ -0,0 +1,222 @@
+import hashlib
+import re
+import zlib
+
+import brotli
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+# Кодировки в порядке предпочтения: brotli сжимает JSON и HTML лучше gzip при той же скорости
+ENCODINGS = ("br", "gzip")
+
+
+def choose_encoding(accept_encoding):
+    """
+    Выбирает кодировку сжатия по заголовку `Accept-Encoding` или возвращает None.
+
+    Учитываются только явно перечисленные кодировки с ненулевым `q`.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, *params = (item.strip() for item in part.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, 0) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type.startswith("text/") or media_type.endswith(("+json", "+xml")):
+        return True
+    return media_type in settings.COMPRESSION_CONTENT_TYPES
+
+
+class GzipStream:
+    def __init__(self):
+        # wbits=31: формат gzip (заголовок и контрольная сумма), как у `gzip.compress`
+        self.compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+STREAMS = {"br": BrotliStream, "gzip": GzipStream}
+
+
+def compress(data, encoding):
+    """
+    Сжимает тело ответа целиком.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return zlib.compress(data, settings.COMPRESSION_GZIP_LEVEL, wbits=31)
+
+
+def precompress(data):
+    """
+    Возвращает тело, сжатое во всех кодировках, для хранения в кеше вместе с ответом.
+
+    Тела меньше `COMPRESSION_MIN_SIZE` и варианты, которые не стали меньше, не сохраняются.
+    """
+    if not settings.COMPRESSION_ENABLED or len(data) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    variants = {encoding: compress(data, encoding) for encoding in ENCODINGS}
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def compress_sequence(chunks, encoding):
+    """
+    Сжимает потоковый ответ по частям: каждая часть отдается сразу, без ожидания конца потока.
+    """
+    stream = STREAMS[encoding]()
+    for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+async def acompress_sequence(chunks, encoding):
+    stream = STREAMS[encoding]()
+    async for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов brotli или gzip по заголовку `Accept-Encoding`.
+
+    Сжимаются текстовые ответы и типы из `COMPRESSION_CONTENT_TYPES` не меньше `COMPRESSION_MIN_SIZE`
+    байт; если сжатое тело не меньше исходного, ответ отдается как есть. Потоковые ответы (выгрузки)
+    сжимаются по частям. Если представление уже сжало тело (`response.precompressed`, например
+    из кеша `PrecompressedCacheMixin`), используется готовый вариант.
+
+    Поддерживает синхронный и асинхронный режимы, поэтому под ASGI не переводит обработку запроса в поток.
+
+    Включается настройкой `COMPRESSION_ENABLED`. Должен стоять до middleware, которые читают или
+    меняют тело ответа, но после middleware метрик, чтобы время сжатия попадало в замеры.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or not is_compressible(response.get("Content-Type", "")):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content, encoding)
+            del response["Content-Length"]
+        else:
+            content = response.content
+            if len(content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            compressed = getattr(response, "precompressed", {}).get(encoding) or compress(content, encoding)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Сжатое тело отличается побайтно, поэтому строгий ETag становится слабым
+        if response.has_header("ETag"):
+            response["ETag"] = re.sub(r'^"', 'W/"', response["ETag"])
+        response["Content-Encoding"] = encoding
+        return response
+
+
+class PrecompressedCacheMixin:
+    """
+    Кеширует ответы `GET` представления DRF (кроме браузерного API) вместе со сжатыми вариантами тела.
+
+    Ответ кешируется по адресу запроса и выбранному формату ответа на `response_cache_timeout` секунд,
+    поэтому при попадании в кеш не выполняются ни запросы к базе, ни рендеринг, ни сжатие.
+    Аутентификация, права и ограничение частоты проверяются как обычно. Ключ дополняется
+    `get_response_cache_version()`, чтобы представление могло сбросить кеш при изменении данных.
+    """
+
+    response_cache_timeout = 60
+
+    def get_response_cache_timeout(self):
+        return self.response_cache_timeout
+
+    def get_response_cache_version(self):
+        return 0
+
+    def get_response_cache_key(self, request):
+        url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+        return f"response:{type(self).__name__}:v{self.get_response_cache_version()}:{request.accepted_media_type}:{url}"
+
+    def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == "api":
+            # Страница браузерного API зависит от пользователя
+            return super().get(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+            response.precompressed = entry["precompressed"]
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response = self.finalize_response(request, response, *args, **kwargs).render()
+            response.precompressed = precompress(response.content)
+            cache.set(key, {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "precompressed": response.precompressed,
+            }, timeout=self.get_response_cache_timeout())
+        return response
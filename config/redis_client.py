@@ -0,0 +1,24 @@
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis(url=None):
+    """
+    Возвращает общий для процесса клиент Redis.
+
+    Клиент создается один раз на процесс и использует пул соединений `redis-py`.
+    Короткие таймауты не дают недоступному Redis задерживать обработку запросов.
+
+    Аргументы:
+        url (str): Адрес Redis. По умолчанию используется `settings.REDIS_URL`.
+
+    Возвращает:
+        redis.Redis | None: Клиент Redis или None, если Redis не настроен.
+    """
+    url = url or settings.REDIS_URL
+    if not url:
+        return None
+    return redis.Redis.from_url(url, socket_connect_timeout=0.2, socket_timeout=0.2)
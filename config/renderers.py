@@ -0,0 +1,70 @@
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Рендерер JSON на orjson с тем же результатом, что и `JSONRenderer` DRF.
+
+    Дата и время передаются кодировщику DRF (`OPT_PASSTHROUGH_DATETIME`), поэтому выводятся так же,
+    как раньше (UTC как `Z`); `Decimal` и прочие типы, которых нет в orjson, тоже кодирует он.
+    Отформатированный вывод (`indent` в `Accept`, браузерный API), `UNICODE_JSON = False`,
+    `COMPACT_JSON = False` и данные, которые orjson не кодирует (например, целые больше 64 бит),
+    рендерятся `JSONRenderer`.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранирует разделители строк, недопустимые в строках JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class ORJSONParser(JSONParser):
+    """
+    Парсер JSON на orjson. Тело в кодировке, отличной от UTF-8, разбирает `JSONParser`.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Рендерер MessagePack (`Accept: application/msgpack` или `?format=msgpack`) для нативных клиентов.
+
+    Значения, которых нет в MessagePack (дата и время, `Decimal`), кодируются так же, как в JSON.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    encoder_class = JSONRenderer.encoder_class
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=self.encoder_class().default, datetime=False)
@@ -0,0 +1,189 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# Откуда читать в текущем запросе или задаче. По умолчанию чтение идет с основной базы,
+# реплики используются только внутри `replica_reads()`.
+_reads = ContextVar("db_reads", default=PRIMARY)
+
+# Результаты проверки отставания реплик в процессе: псевдоним -> (время проверки, исправна ли)
+_replica_health = {}
+
+# Отставание реплики в секундах. На основной базе (не в режиме восстановления) и на реплике,
+# применившей весь полученный WAL, отставание нулевое.
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+@contextmanager
+def replica_reads():
+    """
+    Направляет чтение внутри блока на реплики (если они настроены и не отстают).
+    """
+    token = _reads.set(REPLICA)
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+def use_primary():
+    """
+    Направляет оставшиеся чтения текущего блока `replica_reads()` на основную базу.
+    """
+    _reads.set(PRIMARY)
+
+
+def _pin_key(user_id):
+    return f"replicas:pinned:{user_id}"
+
+
+def pin_user(user_id):
+    """
+    Закрепляет чтение пользователя за основной базой на `REPLICA_PIN_SECONDS` секунд после записи.
+    """
+    cache.set(_pin_key(user_id), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_user_pinned(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def replica_lag(alias):
+    """
+    Возвращает отставание реплики в секундах или None, если реплика недоступна.
+    """
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except (ConnectionDoesNotExist, DatabaseError) as e:
+        logger.warning(f"Реплика {alias} недоступна: {e}")
+        return None
+    return None if lag is None else float(lag)
+
+
+def is_replica_healthy(alias):
+    """
+    Проверяет, что отставание реплики не больше `REPLICA_MAX_LAG` секунд.
+
+    Результат проверки кешируется в процессе на `REPLICA_CHECK_INTERVAL` секунд.
+    """
+    now = time.monotonic()
+    checked_at, healthy = _replica_health.get(alias, (None, False))
+    if checked_at is None or now - checked_at >= settings.REPLICA_CHECK_INTERVAL:
+        lag = replica_lag(alias)
+        healthy = lag is not None and lag <= settings.REPLICA_MAX_LAG
+        _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор баз данных с чтением из реплик.
+
+    Запись всегда идет в основную базу (`default`). Чтение направляется на случайную исправную
+    реплику из `DATABASE_REPLICAS` только внутри `replica_reads()` (блок не должен выполнять запись);
+    если все реплики отстают больше чем на `REPLICA_MAX_LAG` секунд или недоступны, чтение идет
+    с основной базы. Миграции применяются только к основной базе.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _reads.get() != REPLICA:
+            return None
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if is_replica_healthy(alias)]
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaReadsMixin:
+    """
+    Выполняет безопасные запросы (`GET`, `HEAD`, `OPTIONS`) представления DRF с чтением из реплик.
+
+    Пользователь, недавно выполнявший запись (`ReadYourWritesMiddleware`), читает с основной базы,
+    поэтому сразу видит свои изменения.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or not settings.DATABASE_REPLICAS:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if _reads.get() == REPLICA and request.user.is_authenticated and is_user_pinned(request.user.pk):
+            use_primary()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Закрепляет чтение пользователя за основной базой после изменяющего запроса.
+
+    Используется, если заданы реплики (`DATABASE_REPLICAS`). Закрепление хранится в кеше Django,
+    поэтому действует во всех веб-процессах, если кеш общий (Redis). Под ASGI работает асинхронно,
+    в поток переводится только закрепление после изменяющего запроса.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            self.pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            # Пользователь может быть ленивым объектом Django, загрузка которого выполняет запрос к базе
+            await sync_to_async(self.pin_writer)(request)
+        return response
+
+    def pin_writer(self, request):
+        # После представления DRF здесь пользователь, определенный аутентификацией DRF
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_user(user.pk)
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_simplejwt',
@@ -49,14 +50,20 @@ INSTALLED_APPS = [
 
     'habit',
     'users',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.ProfilingMiddleware',
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.NPlusOneMiddleware',
+    'config.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.replicas.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -95,6 +102,63 @@ DATABASES = {
     }
 }
 
+# Управление соединениями с базой зависит от типа процесса (DJANGO_PROCESS_TYPE):
+# web - пул соединений psycopg на процесс; worker - небольшой пул в каждом дочернем процессе Celery
+# с проверкой соединения при выдаче (пул родительского процесса закрывается перед fork, см. config/celery.py);
+# beat - одно постоянное соединение. Сравнить стоимость соединения на запрос: python manage.py bench_db_connections
+PROCESS_TYPE = os.getenv('DJANGO_PROCESS_TYPE', 'web')
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'True') == 'True'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE') or ('2' if PROCESS_TYPE == 'web' else '1'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE') or ('10' if PROCESS_TYPE == 'web' else '2'))
+# Сколько секунд ждать свободное соединение, если пул исчерпан
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT') or '10')
+
+if DB_POOL_ENABLED and PROCESS_TYPE in ('web', 'worker'):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+            # Простаивающие соединения сверх min_size закрываются, старые пересоздаются
+            'max_idle': 300,
+            'max_lifetime': 1800,
+        },
+    }
+    # Воркер может долго простаивать между задачами, поэтому пул проверяет соединение при выдаче
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = PROCESS_TYPE == 'worker'
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Реплики PostgreSQL для чтения: POSTGRES_REPLICA_HOSTS=host1[:port],host2[:port].
+# Учетные данные и имя базы те же, что у основной. В тестах реплики указывают на тестовую основную базу.
+# Отставание реплики проверяется внутри запроса, поэтому соединение с недоступной репликой
+# ограничено REPLICA_CONNECT_TIMEOUT секундами, а не таймаутом TCP операционной системы.
+REPLICA_CONNECT_TIMEOUT = int(os.getenv('REPLICA_CONNECT_TIMEOUT') or '2')
+DATABASE_REPLICAS = []
+for index, address in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(','))):
+    host, _, port = address.strip().partition(':')
+    replica_options = {**DATABASES['default'].get('OPTIONS', {}), 'connect_timeout': REPLICA_CONNECT_TIMEOUT}
+    if 'pool' in replica_options:
+        replica_options['pool'] = {**replica_options['pool'], 'timeout': REPLICA_CONNECT_TIMEOUT}
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'OPTIONS': replica_options,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['config.replicas.ReplicaRouter']
+
+# Максимальное отставание реплики в секундах, при большем чтение идет с основной базы
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG') or '2')
+# Как часто (в секундах) каждый процесс проверяет отставание реплик
+REPLICA_CHECK_INTERVAL = 5
+# Сколько секунд после записи пользователь читает с основной базы
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS') or '10')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -140,14 +204,101 @@ AUTH_USER_MODEL = 'users.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Загрузка файлов: небольшие файлы остаются в памяти, остальные потоково пишутся во временный файл
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'config.uploadhandlers.BoundedTemporaryFileUploadHandler',
+]
+
+# Максимальный размер загружаемого файла, байт
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+
+# Максимальное разрешение аватара, пикселей
+AVATAR_MAX_PIXELS = 40_000_000
+
+# Профилирование запросов (заголовок Server-Timing и буфер последних замеров для сотрудников)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+# Доля запросов, замеры которых сохраняются в буфер
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE') or '0.1')
+# Количество замеров в буфере
+PROFILING_BUFFER_SIZE = 500
+
+# Метрики в формате Prometheus (/metrics). Для сбора метрик со всех процессов задайте
+# переменную окружения PROMETHEUS_MULTIPROC_DIR — общий каталог веб-процессов и воркеров Celery
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+
+# Поиск проблем N+1: повторяющиеся формы SQL-запросов в пределах HTTP-запроса или задачи Celery.
+# По умолчанию включен в режиме отладки; NPLUSONE_RAISE=True превращает предупреждения в ошибки (для тестов)
+NPLUSONE_ENABLED = os.getenv('NPLUSONE_ENABLED', str(DEBUG)) == 'True'
+NPLUSONE_RAISE = os.getenv('NPLUSONE_RAISE', 'False') == 'True'
+# Количество запросов одной формы, начиная с которого сообщается о проблеме
+NPLUSONE_THRESHOLD = 5
+
+# Отбор медленных SQL-запросов с сохранением плана EXPLAIN (ANALYZE, BUFFERS) в monitoring.SlowQuery
+SLOW_QUERY_ENABLED = os.getenv('SLOW_QUERY_ENABLED', 'False') == 'True'
+# Порог времени выполнения запроса, мс
+SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', '200'))
+# Доля медленных запросов, для которых получается план
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE', '1.0'))
+# Ограничение времени повторного выполнения запроса для EXPLAIN ANALYZE, мс
+SLOW_QUERY_EXPLAIN_TIMEOUT = 5000
+# Количество хранимых медленных запросов
+SLOW_QUERY_MAX_ROWS = 1000
+
+# Профилирование задач Celery (cProfile). Профили сохраняются по именам задач в TASK_PROFILING_DIR,
+# вывести самые затратные функции: python manage.py task_profile <имя задачи>
+TASK_PROFILING_ENABLED = os.getenv('TASK_PROFILING_ENABLED', 'False') == 'True'
+# Доля профилируемых выполнений задач
+TASK_PROFILING_SAMPLE_RATE = float(os.getenv('TASK_PROFILING_SAMPLE_RATE', '0.05'))
+TASK_PROFILING_DIR = os.getenv('TASK_PROFILING_DIR', BASE_DIR / 'profiles')
+
+# Сжатие ответов brotli или gzip (config.compression): ответы меньше COMPRESSION_MIN_SIZE байт не сжимаются
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True') == 'True'
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+# Сжимаемые типы ответов помимо text/*, */*+json и */*+xml
+COMPRESSION_CONTENT_TYPES = {
+    'application/json', 'application/javascript', 'application/xml', 'application/x-ndjson',
+    'application/msgpack', 'image/svg+xml',
+}
+# Время жизни закешированных страниц ленты публичных привычек, секунд
+PUBLIC_FEED_CACHE_TIMEOUT = 60
+
+# Количество строк, начиная с которого списки админки используют оценку количества вместо COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
 # Настройки JWT-токенов
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON кодируется и разбирается orjson; MessagePack отдается по Accept: application/msgpack
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.ORJSONRenderer',
+        'config.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Количество доверенных прокси перед приложением. IP-адрес клиента для ограничителей берется
+    # из X-Forwarded-For только за прокси, иначе из REMOTE_ADDR: заголовок клиент может подставить сам
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES') or '0'),
+    # Частоты для ограничителей из config.throttling: ключ "<throttle_scope>_ip" или "<throttle_scope>_user"
+    'DEFAULT_THROTTLE_RATES': {
+        'public_feed_ip': '120/min',
+        'public_feed_user': '300/min',
+        'public_export_ip': '10/hour',
+        'public_export_user': '20/hour',
+        'register_ip': '10/hour',
+        'token_ip': '20/min',
+    },
 }
 
 # Настройки срока действия токенов
@@ -156,6 +307,45 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Redis для общих данных веб-процессов (ограничение частоты запросов и т.п.)
+REDIS_URL = os.getenv('REDIS_URL')
+
+# Общий кеш веб-процессов. Без Redis используется кеш в памяти процесса
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'monitoring.cache.InstrumentedRedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'monitoring.cache.InstrumentedLocMemCache',
+        }
+    }
+
+# Журнал отметок о выполнении привычек (habit.CheckIn)
+# Максимум отметок в одном запросе и сколько дней назад можно отметить выполнение
+CHECKIN_MAX_BATCH = 1000
+CHECKIN_MAX_AGE_DAYS = 30
+# Строк в одном запросе INSERT
+CHECKIN_INSERT_BATCH = 5000
+# Буфер отметок в Redis переносится в базу раз в CHECKIN_FLUSH_INTERVAL секунд
+# или сразу, когда в нем накопилось CHECKIN_FLUSH_SIZE отметок
+CHECKIN_FLUSH_INTERVAL = 2
+CHECKIN_FLUSH_SIZE = 5000
+# На сколько месяцев вперед создаются секции журнала
+CHECKIN_PARTITIONS_AHEAD = 3
+# Секретный токен вебхука Telegram (secret_token в setWebhook)
+TELEGRAM_WEBHOOK_SECRET = os.getenv('TELEGRAM_WEBHOOK_SECRET')
+
+# Аналитика выполнения привычек (habit.analytics): за сколько недель считаются серии и доли выполнения
+HABIT_ANALYTICS_WEEKS = 52
+# Сколько дней хранятся отметки об удалении привычек для синхронизации клиентов (habit.sync);
+# клиент с более старым токеном получает полный список
+HABIT_TOMBSTONE_RETENTION_DAYS = 30
+
 # Настройки для Celery
 
 # URL-адрес брокера сообщений
@@ -173,11 +363,28 @@ CELERY_TASK_TRACK_STARTED = True
 # Максимальное время на выполнение задачи
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+# Интеграция Celery с Django закрывает соединения с базой (и пул) до и после каждой задачи.
+# Пул дочернего процесса пересоздается раз в CELERY_DB_REUSE_MAX задач, а между задачами
+# соединения возвращаются в пул и проверяются при выдаче (config/celery.py).
+CELERY_DB_REUSE_MAX = int(os.getenv('CELERY_DB_REUSE_MAX') or '100')
+
 CELERY_BEAT_SCHEDULE = {
     'task-name': {
         'task': 'myapp.tasks.send_telegram_message',
         'schedule': timedelta(minutes=1),
     },
+    'flush-checkins': {
+        'task': 'habit.tasks.flush_checkins',
+        'schedule': timedelta(seconds=CHECKIN_FLUSH_INTERVAL),
+    },
+    'create-checkin-partitions': {
+        'task': 'habit.tasks.create_checkin_partitions',
+        'schedule': timedelta(days=1),
+    },
+    'purge-habit-tombstones': {
+        'task': 'habit.tasks.purge_habit_tombstones',
+        'schedule': timedelta(days=1),
+    },
 }
 
 TELEGRAM_URL = "https://api.telegram.org/bot"
@@ -0,0 +1,150 @@
+import logging
+from functools import lru_cache
+
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from config.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Атомарное списание токена из корзины. Время берется с сервера Redis, поэтому все
+# веб-процессы считают пополнение одинаково, даже если их часы расходятся. Начиная с Redis 5 скрипты
+# реплицируются эффектами и `replicate_commands` не нужен; он вызывается только там, где есть.
+TOKEN_BUCKET_SCRIPT = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / refill_rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    Разбирает частоту в формате DRF (`"100/min"`) в пару (емкость корзины, период в секундах).
+    """
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+@lru_cache(maxsize=None)
+def get_token_bucket_script(client):
+    """
+    Регистрирует Lua-скрипт корзины для клиента Redis (вызывается через EVALSHA).
+    """
+    return client.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Базовый класс ограничения частоты запросов по алгоритму token bucket в Redis.
+
+    Корзина вмещает `N` токенов и пополняется со скоростью `N` токенов за период, где частота
+    задается в формате DRF (`"N/period"`) в `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']` по ключу
+    `"<throttle_scope>_<kind>"`. `throttle_scope` указывается в представлении. Если частота для ключа
+    не задана, ограничение не применяется.
+
+    Состояние корзин хранится в Redis и общее для всех веб-процессов, списание выполняется одним
+    Lua-скриптом. Если Redis не настроен или недоступен, запросы пропускаются.
+
+    DRF проверяет все ограничители представления, даже если запрос уже отклонен. Чтобы отклоненный
+    запрос не списывал токены из остальных корзин (например, пользователя после отказа по IP-адресу),
+    ограничители после первого отказа его пропускают.
+    """
+
+    kind = None
+    cache_format = "throttle:%(scope)s:%(kind)s:%(ident)s"
+
+    def get_ident_key(self, request):
+        """
+        Возвращает идентификатор клиента для корзины или None, если ограничение не применяется.
+        """
+        raise NotImplementedError(".get_ident_key() must be overridden")
+
+    def get_rate(self, scope):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}_{self.kind}")
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if getattr(request, "_token_bucket_denied", False):
+            return True
+        scope = getattr(view, "throttle_scope", None)
+        rate = self.get_rate(scope) if scope else None
+        client = get_redis()
+        if rate is None or client is None:
+            return True
+
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        capacity, duration = parse_rate(rate)
+        key = self.cache_format % {"scope": scope, "kind": self.kind, "ident": ident}
+        try:
+            allowed, wait = get_token_bucket_script(client)(keys=[key], args=[capacity, capacity / duration])
+        except RedisError as e:
+            logger.warning(f"Ограничение частоты запросов пропущено, Redis недоступен: {e}")
+            return True
+
+        if allowed:
+            return True
+        request._token_bucket_denied = True
+        self.wait_seconds = float(wait)
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Ограничение частоты запросов по IP-адресу клиента (ключ частоты `"<scope>_ip"`).
+
+    IP-адрес определяется так же, как в стандартных ограничителях DRF, с учетом `NUM_PROXIES`: по умолчанию
+    (`NUM_PROXIES = 0`) берется `REMOTE_ADDR`, а `X-Forwarded-For`, который клиент может подставить сам,
+    учитывается только за доверенными прокси.
+    """
+
+    kind = "ip"
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Ограничение частоты запросов по аутентифицированному пользователю (ключ частоты `"<scope>_user"`).
+
+    К анонимным запросам не применяется, для них используется `IPTokenBucketThrottle`.
+    """
+
+    kind = "user"
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class BoundedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Потоковая запись загружаемых файлов во временный файл с ограничением размера.
+
+    Данные сверх `FILE_UPLOAD_MAX_SIZE` не записываются на диск, но продолжают учитываться в размере файла,
+    поэтому слишком большой файл отклоняется валидацией по `size`, а не заполняет диск.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_SIZE:
+            return None
+        return super().receive_data_chunk(raw_data, start)
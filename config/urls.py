@@ -6,6 +6,7 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from habit.views import home, run_tests
+from monitoring.views import metrics
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -25,7 +26,9 @@ urlpatterns = [
     path('', home, name='home'),
     path("users/", include("users.urls", namespace="users")),
     path("habit/", include("habit.urls", namespace="habit")),
+    path("monitoring/", include("monitoring.urls", namespace="monitoring")),
     path('run-tests/', run_tests, name='run-tests'),
+    path('metrics', metrics, name='metrics'),
 
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
@@ -1,7 +1,11 @@
 from django.contrib import admin
+from config.admin import PerformanceAdminMixin
 from habit.models import Habits
 
 
 @admin.register(Habits)
-class HabitsAdmin(admin.ModelAdmin):
+class HabitsAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     list_display = ["pk", "owner", "place", "time", "action"]
+    list_select_related = ["owner"]
+    autocomplete_fields = ["owner"]
+    raw_id_fields = ["related"]
@@ -0,0 +1,52 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from habit.cache import user_cache_key
+from habit.models import WEEKDAYS, CheckIn, Habits
+
+# Поля привычки в повестке на день
+AGENDA_FIELDS = ("id", "time", "action", "place", "duration", "is_nice", "done")
+
+# Время жизни закешированной повестки; ключ включает дату, поэтому на следующий день строится новая
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def today_agenda(user, today=None):
+    """
+    Возвращает привычки пользователя, запланированные на день, в порядке времени выполнения.
+
+    Привычки выбираются одним запросом по частичному индексу дня недели (`habit_owner_<день>_time_idx`),
+    признак `done` — есть ли у привычки отметка за этот день — проверяется в том же запросе
+    по ключу журнала отметок.
+
+    :param user: Пользователь.
+    :param today: Локальная дата (по умолчанию сегодня).
+    """
+    today = today or timezone.localdate()
+    since = timezone.make_aware(datetime.combine(today, time.min))
+    until = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+    done = CheckIn.objects.filter(habit=OuterRef("pk"), checked_at__gte=since, checked_at__lt=until)
+    return list(
+        Habits.objects.filter(owner=user, **{WEEKDAYS[today.weekday()]: True})
+        .annotate(done=Exists(done))
+        .order_by("time", "pk")
+        .values(*AGENDA_FIELDS)
+    )
+
+
+def cached_today_agenda(user):
+    """
+    Возвращает повестку пользователя на сегодня из кеша или строит и кеширует ее.
+
+    Кеш сбрасывается при изменении привычек пользователя и записи его отметок (`habit.cache`).
+    """
+    today = timezone.localdate()
+    key = user_cache_key("today", user.pk, today.isoformat())
+    agenda = cache.get(key)
+    if agenda is None:
+        agenda = {"date": today.isoformat(), "habits": today_agenda(user, today)}
+        cache.set(key, agenda, timeout=CACHE_TIMEOUT)
+    return agenda
@@ -0,0 +1,149 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from habit.cache import user_cache_key
+from habit.models import WEEKDAYS, Habits
+
+# Дни, в которые привычка выполнялась: смещения локальных дат отметок от начала периода
+DONE_DAYS_SQL = """
+SELECT DISTINCT c.habit_id, (c.checked_at AT TIME ZONE %s)::date - %s::date
+FROM habit_checkin c
+WHERE c.habit_id = ANY(%s) AND c.checked_at >= %s AND c.checked_at < %s
+"""
+
+# Время жизни закешированной аналитики; ключ включает дату, поэтому после полуночи она пересчитывается
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _rate(completed, counted):
+    return round(float(completed) / counted, 4) if counted else None
+
+
+def load_history(habit_ids, start, days):
+    """
+    Загружает историю выполнения привычек одним запросом.
+
+    :param habit_ids: Отсортированный массив id привычек.
+    :param start: Локальная дата начала периода.
+    :param days: Количество дней в периоде.
+    :return: Матрица `done[привычка, день]` типа bool.
+    """
+    tz = timezone.get_current_timezone()
+    since = timezone.make_aware(datetime.combine(start, time.min), tz)
+    until = timezone.make_aware(datetime.combine(start + timedelta(days=days), time.min), tz)
+    with connection.cursor() as cursor:
+        cursor.execute(DONE_DAYS_SQL, [settings.TIME_ZONE, start, habit_ids.tolist(), since, until])
+        rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+
+    done = np.zeros((len(habit_ids), days), dtype=bool)
+    done[np.searchsorted(habit_ids, rows[:, 0]), rows[:, 1]] = True
+    return done
+
+
+def habit_analytics(user, today=None):
+    """
+    Считает серии и доли выполнения привычек пользователя за последние `HABIT_ANALYTICS_WEEKS` недель.
+
+    День считается запланированным, если он отмечен в днях недели привычки и от даты ее создания
+    прошло кратное `periodicity` число дней. Пропуском считается запланированный день без отметки;
+    сегодняшний день учитывается, только если привычка уже выполнена. Серия — количество
+    запланированных дней подряд с отметкой, дни вне расписания серию не прерывают.
+    Все привычки считаются вместе операциями над матрицами «привычка × день».
+
+    :param user: Пользователь.
+    :param today: Локальная дата, на которую строится аналитика (по умолчанию сегодня).
+    :return: Сводка, показатели по привычкам и тепловая карта выполнения по неделям.
+    """
+    today = today or timezone.localdate()
+    # Период начинается с понедельника, чтобы тепловая карта делилась на полные недели
+    start = today - timedelta(days=today.weekday() + 7 * (settings.HABIT_ANALYTICS_WEEKS - 1))
+    days = (today - start).days + 1
+
+    habits = list(
+        Habits.objects.filter(owner=user).order_by("pk").values_list(
+            "pk", "action", "periodicity", "created_at", *WEEKDAYS
+        )
+    )
+    habit_ids = np.array([habit[0] for habit in habits], dtype=np.int64)
+    done = load_history(habit_ids, start, days) if habits else np.zeros((0, days), dtype=bool)
+
+    day = np.arange(days)
+    weekday_mask = np.array([habit[4:] for habit in habits], dtype=bool).reshape(-1, 7)
+    periodicity = np.array([habit[2] for habit in habits], dtype=np.int64)[:, None]
+    # День создания привычки или первой отметки, если она раньше
+    created = np.array(
+        [(timezone.localdate(habit[3]) - start).days if habit[3] else 0 for habit in habits], dtype=np.int64
+    )
+    first_done = np.where(done.any(axis=1), done.argmax(axis=1), days)
+    offset = day - np.minimum(created, first_done)[:, None]
+
+    # Период начинается с понедельника, поэтому день недели — остаток от деления на 7
+    scheduled = weekday_mask[:, day % 7] & (offset >= 0) & (offset % periodicity == 0)
+    hit = scheduled & done
+    missed = scheduled & ~done & (day < days - 1)
+    counted = hit | missed
+
+    # Длина серии в каждый день: отметки с последнего пропуска
+    completed_total = np.cumsum(hit, axis=1)
+    reset = np.maximum.accumulate(np.where(missed, completed_total, 0), axis=1)
+    streak = completed_total - reset
+
+    recent = day >= days - 30
+    stats = {
+        "current_streak": streak[:, -1],
+        "longest_streak": streak.max(axis=1, initial=0),
+        "completed": hit.sum(axis=1),
+        "scheduled": counted.sum(axis=1),
+        "completed_30d": hit[:, recent].sum(axis=1),
+        "scheduled_30d": counted[:, recent].sum(axis=1),
+    }
+    weeks = -(-days // 7)
+
+    def by_week(matrix):
+        totals = np.zeros(weeks * 7, dtype=np.int64)
+        totals[:days] = matrix.sum(axis=0)
+        return totals.reshape(weeks, 7).tolist()
+
+    return {
+        "date": today.isoformat(),
+        "completion_rate": _rate(stats["completed"].sum(), stats["scheduled"].sum()),
+        "completion_rate_30d": _rate(stats["completed_30d"].sum(), stats["scheduled_30d"].sum()),
+        "habits": [
+            {
+                "id": habit[0],
+                "action": habit[1],
+                "current_streak": int(stats["current_streak"][index]),
+                "longest_streak": int(stats["longest_streak"][index]),
+                "completed": int(stats["completed"][index]),
+                "scheduled": int(stats["scheduled"][index]),
+                "completion_rate": _rate(stats["completed"][index], stats["scheduled"][index]),
+                "completion_rate_30d": _rate(stats["completed_30d"][index], stats["scheduled_30d"][index]),
+            }
+            for index, habit in enumerate(habits)
+        ],
+        "heatmap": {
+            "start": start.isoformat(),
+            "completed": by_week(hit),
+            "scheduled": by_week(scheduled),
+        },
+    }
+
+
+def cached_habit_analytics(user):
+    """
+    Возвращает аналитику пользователя из кеша или считает и кеширует ее.
+
+    Кеш сбрасывается при записи отметок пользователя и изменении его привычек (`habit.cache`).
+    """
+    today = timezone.localdate()
+    key = user_cache_key("analytics", user.pk, today.isoformat())
+    result = cache.get(key)
+    if result is None:
+        result = habit_analytics(user, today)
+        cache.set(key, result, timeout=CACHE_TIMEOUT)
+    return result
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class HabitConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'habit'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_init, post_save
+
+        import habit.signals  # noqa: F401
+        from habit.cache import invalidate_habit_owner, remember_public
+        from habit.models import Habits
+
+        post_init.connect(remember_public, sender=Habits)
+        post_save.connect(invalidate_habit_owner, sender=Habits)
+        post_delete.connect(invalidate_habit_owner, sender=Habits)
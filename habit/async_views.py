@@ -0,0 +1,125 @@
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from config.renderers import ORJSONRenderer
+from habit.filters import filter_habits
+from habit.models import Habits
+from habit.paginators import AsyncCustomPagination
+from habit.serializers import HabitSerializer
+from users.authentication import AsyncJWTAuthentication
+
+
+class AsyncAPIView(View):
+    """
+    Базовое асинхронное представление для эндпоинтов привычек.
+
+    DRF не поддерживает асинхронные представления, поэтому этот класс повторяет нужную часть
+    поведения `APIView` для режима ASGI: JWT-аутентификацию, ответы об ошибках в формате DRF
+    и рендеринг через `ORJSONRenderer`, так что тело ответа совпадает с синхронными эндпоинтами.
+
+    Атрибуты:
+        - `authentication_required` (bool): Требуется ли аутентифицированный пользователь.
+    """
+
+    authentication_required = True
+    authenticator = AsyncJWTAuthentication()
+    renderer = ORJSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Аутентифицирует пользователя и вызывает асинхронный обработчик метода.
+
+        Исключения DRF (`APIException`) преобразуются в ответы с тем же телом и кодом,
+        что и у синхронных представлений.
+        """
+        self.request = Request(request)
+        try:
+            result = await self.authenticator.aauthenticate(request)
+            self.user = result[0] if result else None
+            if self.authentication_required and self.user is None:
+                raise exceptions.NotAuthenticated()
+            return await super().dispatch(self.request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+
+    def handle_exception(self, request, exc):
+        """
+        Формирует ответ об ошибке в формате DRF.
+        """
+        response = self.render(
+            exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail},
+            status=exc.status_code,
+        )
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response["WWW-Authenticate"] = self.authenticator.authenticate_header(request)
+        return response
+
+    def render(self, data, status=status.HTTP_200_OK):
+        """
+        Сериализует данные в JSON так же, как это делает DRF.
+        """
+        return HttpResponse(self.renderer.render(data), content_type="application/json", status=status)
+
+
+class AsyncHabitsListView(AsyncAPIView):
+    """
+    Асинхронное получение списка привычек авторизованного пользователя.
+
+    **URL:** `habit/habits/async/list/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Требуется аутентификация пользователя (JWT).
+
+    **Параметры запроса и ответ:** аналогично `HabitsListAPIView`.
+    """
+
+    async def get(self, request):
+        paginator = AsyncCustomPagination()
+        queryset = filter_habits(Habits.objects.filter(owner=self.user), request.query_params)
+        page = await paginator.apaginate_queryset(queryset, request)
+        return self.render(paginator.get_paginated_data(HabitSerializer(page, many=True).data))
+
+
+class AsyncHabitsRetrieveView(AsyncAPIView):
+    """
+    Асинхронный просмотр привычки пользователя.
+
+    **URL:** `habit/habits/async/<int:pk>/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Требуется аутентификация пользователя (JWT) и право собственности на привычку.
+
+    **Ответ:** аналогично `HabitsRetrieveAPIView`.
+    """
+
+    async def get(self, request, pk):
+        try:
+            habit = await Habits.objects.aget(pk=pk, owner=self.user)
+        except Habits.DoesNotExist:
+            raise exceptions.NotFound()
+        return self.render(HabitSerializer(habit).data)
+
+
+class AsyncHabitsPublicListView(AsyncAPIView):
+    """
+    Асинхронное получение списка публичных привычек.
+
+    **URL:** `habit/habits/async/public/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Открыто для всех.
+
+    **Ответ:** аналогично `HabitsPublicListAPIView`.
+    """
+
+    authentication_required = False
+
+    async def get(self, request):
+        paginator = AsyncCustomPagination()
+        queryset = Habits.objects.filter(is_public=True)
+        page = await paginator.apaginate_queryset(queryset, request)
+        return self.render(paginator.get_paginated_data(HabitSerializer(page, many=True).data))
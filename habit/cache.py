@@ -0,0 +1,77 @@
+from django.core.cache import cache
+
+# Версия данных ленты публичных привычек
+PUBLIC_VERSION_KEY = "habit:public:version"
+
+
+def _version_key(user_id):
+    return f"habit:user:{user_id}:version"
+
+
+def _bump(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен из кеша между add и incr
+        cache.set(key, 1, timeout=None)
+
+
+def user_cache_key(name, user_id, *parts):
+    """
+    Возвращает ключ кеша данных пользователя, построенных по его привычкам и отметкам.
+
+    В ключ входит версия данных пользователя, поэтому после `invalidate_user_habits` все такие
+    записи перестают читаться и устаревают по своему времени жизни.
+    """
+    version = cache.get(_version_key(user_id), 0)
+    return ":".join(["habit", name, str(user_id), f"v{version}", *map(str, parts)])
+
+
+def invalidate_user_habits(user_id):
+    """
+    Сбрасывает закешированные данные пользователя (повестку на день, аналитику).
+
+    Вызывается при изменении привычек пользователя и при записи его отметок о выполнении.
+    """
+    _bump(_version_key(user_id))
+
+
+def public_habits_version():
+    return cache.get(PUBLIC_VERSION_KEY, 0)
+
+
+def invalidate_public_habits():
+    """
+    Сбрасывает закешированные страницы ленты публичных привычек.
+    """
+    _bump(PUBLIC_VERSION_KEY)
+
+
+def _is_public(instance):
+    # Значение читается без обращения к полю, чтобы не загружать отложенный признак (`only()`, `defer()`)
+    return instance.__dict__.get("is_public")
+
+
+def remember_public(sender, instance, **kwargs):
+    """
+    Запоминает, была ли загруженная привычка публичной (сигнал `post_init`).
+    """
+    instance._saved_is_public = _is_public(instance)
+
+
+def invalidate_habit_owner(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш владельца и ленты публичных привычек при сохранении или удалении привычки
+    (сигналы `post_save`, `post_delete`).
+
+    Лента сбрасывается, только если привычка публичная или была публичной до изменения
+    (или признак не был загружен), поэтому изменения личных привычек не сбрасывают ее кеш.
+    """
+    if instance.owner_id:
+        invalidate_user_habits(instance.owner_id)
+    is_public = _is_public(instance)
+    was_public = False if kwargs.get("created") else getattr(instance, "_saved_is_public", None)
+    instance._saved_is_public = is_public
+    if is_public is not False or was_public is not False:
+        invalidate_public_habits()
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+from habit.cache import user_cache_key
+from habit.models import WEEKDAYS, Habits
+
+CALENDAR_SALT = "habit.calendar"
+
+# Домен в UID событий и название календаря в приложениях
+UID_DOMAIN = "habits"
+CALENDAR_NAME = "Привычки"
+
+# Время жизни закешированных событий и ленты; лента сбрасывается вместе с кешем пользователя (`habit.cache`)
+CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+# Поля привычки, из которых строится событие
+EVENT_FIELDS = ("pk", "action", "place", "time", "duration", "periodicity", "created_at", "updated_at", *WEEKDAYS)
+
+ICAL_DAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# На сколько лет вперед в VTIMEZONE включаются переходы часового пояса для повторяющихся событий
+TIMEZONE_YEARS_AHEAD = 10
+
+
+def calendar_token(user_id):
+    """
+    Возвращает подписанный токен ленты календаря пользователя.
+
+    Токен не хранится в базе: он действует, пока не изменится `SECRET_KEY`.
+    """
+    return signing.Signer(salt=CALENDAR_SALT).sign(str(user_id))
+
+
+def user_id_from_token(token):
+    """
+    Возвращает id пользователя из токена ленты или None, если подпись неверна.
+    """
+    try:
+        return int(signing.Signer(salt=CALENDAR_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def escape_text(value):
+    return (
+        str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """
+    Переносит строку iCalendar длиннее 75 октетов (RFC 5545, 3.1), не разрывая символы UTF-8.
+    """
+    if len(line.encode()) <= 75:
+        return line
+    parts, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            parts.append("".join(current))
+            # Строка продолжения начинается с пробела, он входит в 75 октетов
+            current, size = [" "], 1
+        current.append(char)
+        size += width
+    parts.append("".join(current))
+    return "\r\n".join(parts)
+
+
+def rrule(habit):
+    """
+    Возвращает правило повторения привычки: раз в `periodicity` дней в отмеченные дни недели.
+    """
+    rule = ["FREQ=DAILY"]
+    if habit.periodicity > 1:
+        rule.append(f"INTERVAL={habit.periodicity}")
+    days = [code for code, day in zip(ICAL_DAYS, WEEKDAYS) if getattr(habit, day)]
+    if len(days) < len(ICAL_DAYS):
+        rule.append(f"BYDAY={','.join(days)}")
+    return ";".join(rule)
+
+
+def format_offset(offset):
+    seconds = int(offset.total_seconds())
+    sign = "-" if seconds < 0 else "+"
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{sign}{hours:02}{minutes:02}" + (f"{seconds:02}" if seconds else "")
+
+
+def _observance(zone, moment, offset_from):
+    """
+    Возвращает наблюдение STANDARD или DAYLIGHT, начинающееся в момент `moment` (UTC).
+    """
+    local = moment.astimezone(zone)
+    kind = "DAYLIGHT" if local.dst() else "STANDARD"
+    return [
+        f"BEGIN:{kind}",
+        # Начало наблюдения записывается в местном времени до перехода (RFC 5545, 3.6.5)
+        f"DTSTART:{(moment + offset_from).replace(tzinfo=None):%Y%m%dT%H%M%S}",
+        f"TZOFFSETFROM:{format_offset(offset_from)}",
+        f"TZOFFSETTO:{format_offset(local.utcoffset())}",
+        f"TZNAME:{local.tzname()}",
+        f"END:{kind}",
+    ]
+
+
+@lru_cache
+def render_timezone(name, first_year, last_year):
+    """
+    Возвращает компонент VTIMEZONE часового пояса, на который ссылаются `DTSTART;TZID` событий.
+
+    Наблюдения строятся по базе zoneinfo: смещение на начало `first_year` и каждый переход
+    до конца `last_year`. Переход ищется по дням, затем с точностью до секунды делением пополам.
+    """
+    zone = ZoneInfo(name)
+    # Первое наблюдение начинается за сутки до начала года, чтобы покрыть его в поясах восточнее UTC
+    moment = datetime(first_year, 1, 1, tzinfo=dt_timezone.utc) - timedelta(days=1)
+    end = datetime(last_year + 1, 1, 1, tzinfo=dt_timezone.utc)
+    offset = moment.astimezone(zone).utcoffset()
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{name}", *_observance(zone, moment, offset)]
+    while moment < end:
+        following = moment + timedelta(days=1)
+        if following.astimezone(zone).utcoffset() == offset:
+            moment = following
+            continue
+        low, high = moment, following
+        while high - low > timedelta(seconds=1):
+            middle = low + (high - low) / 2
+            if middle.astimezone(zone).utcoffset() == offset:
+                low = middle
+            else:
+                high = middle
+        high = high.replace(microsecond=0)
+        lines.extend(_observance(zone, high, offset))
+        offset = high.astimezone(zone).utcoffset()
+        moment = high
+    lines.append("END:VTIMEZONE")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def render_event(habit):
+    """
+    Возвращает событие VEVENT привычки, повторяющееся по ее расписанию.
+    """
+    created = timezone.localtime(habit.created_at) if habit.created_at else timezone.localtime()
+    start = datetime.combine(created.date(), habit.time)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:habit-{habit.pk}@{UID_DOMAIN}",
+        f"DTSTAMP:{(habit.updated_at or created).astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}",
+        f"DTSTART;TZID={settings.TIME_ZONE}:{start:%Y%m%dT%H%M%S}",
+        f"DURATION:PT{habit.duration}M",
+        f"RRULE:{rrule(habit)}",
+        f"SUMMARY:{escape_text(habit.action)}",
+        f"LOCATION:{escape_text(habit.place)}",
+        "END:VEVENT",
+    ]
+    return "\r\n".join(fold(line) for line in lines) + "\r\n"
+
+
+def _event_key(habit):
+    return f"habit:ics:event:{habit.pk}:{habit.updated_at.timestamp() if habit.updated_at else ''}"
+
+
+def build_calendar(user_id):
+    """
+    Строит ленту iCalendar привычек пользователя и ее ETag.
+
+    Лента содержит VTIMEZONE часового пояса `TIME_ZONE`, в котором заданы начала событий.
+    Лента собирается по частям: события привычек кешируются по id и времени изменения, поэтому
+    заново отрисовываются только измененные привычки. ETag зависит от количества привычек и времени
+    последнего изменения, поэтому удаление привычки тоже меняет его.
+
+    :return: Пара (ETag, текст ленты).
+    """
+    habits = list(Habits.objects.filter(owner_id=user_id).order_by("pk").only(*EVENT_FIELDS))
+    keys = {_event_key(habit): habit for habit in habits}
+    events = cache.get_many(keys)
+    missing = {key: render_event(habit) for key, habit in keys.items() if key not in events}
+    if missing:
+        cache.set_many(missing, timeout=CACHE_TIMEOUT)
+        events.update(missing)
+
+    # События начинаются с даты создания привычки в часовом поясе проекта
+    this_year = timezone.localdate().year
+    first_year = min((timezone.localtime(habit.created_at).year for habit in habits if habit.created_at),
+                     default=this_year)
+    body = "".join([
+        "BEGIN:VCALENDAR\r\n",
+        "VERSION:2.0\r\n",
+        "PRODID:-//Habits//Habits calendar//RU\r\n",
+        "CALSCALE:GREGORIAN\r\n",
+        fold(f"X-WR-CALNAME:{escape_text(CALENDAR_NAME)}") + "\r\n",
+        f"X-WR-TIMEZONE:{settings.TIME_ZONE}\r\n",
+        render_timezone(settings.TIME_ZONE, first_year, this_year + TIMEZONE_YEARS_AHEAD),
+        *(events[key] for key in keys),
+        "END:VCALENDAR\r\n",
+    ])
+    updated = max((habit.updated_at for habit in habits if habit.updated_at), default=None)
+    etag = f'"{len(habits)}-{int(updated.timestamp() * 1_000_000) if updated else 0}"'
+    return etag, body
+
+
+def cached_calendar(user_id):
+    """
+    Возвращает ETag и ленту пользователя из кеша или строит и кеширует их.
+    """
+    key = user_cache_key("ics", user_id)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_calendar(user_id)
+        cache.set(key, entry, timeout=CACHE_TIMEOUT)
+    return entry
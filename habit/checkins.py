@@ -0,0 +1,292 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone as django_timezone
+from redis.exceptions import RedisError
+from rest_framework import serializers
+
+from config.redis_client import get_redis
+from habit.cache import invalidate_user_habits
+from habit.models import Habits
+
+logger = logging.getLogger(__name__)
+
+# Буфер отметок в Redis: строки вида "<id привычки>:<время в микросекундах от эпохи>:<источник>"
+BUFFER_KEY = "habit:checkins"
+# Блокировка сброса буфера, чтобы его не обрабатывали одновременно несколько воркеров
+FLUSH_LOCK_KEY = "habit:checkins:flush"
+# Время жизни блокировки, секунд; продлевается перед каждым пакетом
+FLUSH_LOCK_TIMEOUT = 60
+# Пакет, который переносится в журнал; удаляется после записи в базу
+PROCESSING_KEY = "habit:checkins:processing"
+# Флаг запланированного сброса, чтобы переполнение буфера не порождало очередь одинаковых задач
+FLUSH_SCHEDULED_KEY = "habit:checkins:flush-scheduled"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Скрипты сброса буфера выполняются, только пока блокировка принадлежит вызывающему (ARGV[1] — ее токен),
+# поэтому воркер, у которого истекла блокировка, не может изменить буфер или пакет другого воркера.
+
+# Продлевает блокировку и возвращает текущий пакет. Если предыдущий сброс не удалил пакет (сбой воркера),
+# возвращается он же, иначе в пакет атомарно переносятся ARGV[3] отметок из начала буфера.
+TAKE_BATCH_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return false
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+local items = redis.call('LRANGE', KEYS[3], 0, -1)
+if #items > 0 then
+    return items
+end
+items = redis.call('LRANGE', KEYS[2], 0, tonumber(ARGV[3]) - 1)
+if #items > 0 then
+    redis.call('RPUSH', KEYS[3], unpack(items))
+    redis.call('LTRIM', KEYS[2], #items, -1)
+end
+return items
+"""
+
+# Удаляет ключ KEYS[2] (записанный пакет или саму блокировку), если блокировка принадлежит вызывающему.
+DELETE_IF_LOCKED_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+return redis.call('DEL', KEYS[2])
+"""
+
+# Вставка пакета одним запросом: столбцы передаются массивами, повторные отметки пропускаются.
+# Отметки удаленных привычек отбрасываются соединением с таблицей привычек. Запрос возвращает
+# количество записанных строк по владельцам привычек, чтобы сбросить их кеш.
+INSERT_SQL = """
+WITH inserted AS (
+    INSERT INTO habit_checkin (habit_id, checked_at, source)
+    SELECT c.habit_id, timestamptz 'epoch' + c.micros * interval '1 microsecond', c.source
+    FROM unnest(%s::bigint[], %s::bigint[], %s::smallint[]) AS c (habit_id, micros, source)
+    JOIN habit_habits h ON h.id = c.habit_id
+    ON CONFLICT DO NOTHING
+    RETURNING habit_id
+)
+SELECT h.owner_id, count(*) FROM inserted JOIN habit_habits h ON h.id = inserted.habit_id GROUP BY h.owner_id
+"""
+
+
+def to_micros(value):
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def parse_checkins(data, user):
+    """
+    Проверяет отметки из тела запроса и приводит их к строкам журнала.
+
+    Принимает одну отметку или список отметок вида `{"habit": <id>, "checked_at": <ISO 8601>}`;
+    без `checked_at` используется текущее время. Время должно быть не в будущем (с допуском в минуту)
+    и не старше `CHECKIN_MAX_AGE_DAYS` дней, привычки — принадлежать пользователю.
+    Принадлежность привычек проверяется одним запросом на пакет.
+
+    :param data: Данные запроса (`request.data`).
+    :param user: Пользователь, отмечающий привычки.
+    :raises serializers.ValidationError: Если отметок нет или их больше `CHECKIN_MAX_BATCH`.
+    :return: Пара (строки, ошибки): кортежи (id привычки, время в микросекундах от эпохи) и ошибки
+        вида `{"index": <индекс отметки>, "errors": [...]}`.
+    """
+    items = data if isinstance(data, list) else [data]
+    if not items:
+        raise serializers.ValidationError({"non_field_errors": ["Передайте хотя бы одну отметку."]})
+    if len(items) > settings.CHECKIN_MAX_BATCH:
+        raise serializers.ValidationError(
+            {"non_field_errors": [f"Не более {settings.CHECKIN_MAX_BATCH} отметок в запросе."]}
+        )
+
+    now = django_timezone.now()
+    earliest = now - timedelta(days=settings.CHECKIN_MAX_AGE_DAYS)
+    latest = now + timedelta(minutes=1)
+    rows, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            habit_id, checked_at = _parse_item(item, now)
+        except ValueError as e:
+            errors[index] = [str(e)]
+            continue
+        if not earliest <= checked_at <= latest:
+            errors[index] = [f"Время выполнения должно быть в пределах последних {settings.CHECKIN_MAX_AGE_DAYS} дней."]
+            continue
+        rows.append((index, habit_id, to_micros(checked_at)))
+
+    owned = set(
+        Habits.objects.filter(owner=user, pk__in={row[1] for row in rows}).values_list("pk", flat=True)
+    ) if rows else set()
+    for index, habit_id, _ in rows:
+        if habit_id not in owned:
+            errors[index] = ["Привычка не найдена."]
+
+    return (
+        [(habit_id, micros) for index, habit_id, micros in rows if index not in errors],
+        [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+    )
+
+
+def _parse_item(item, now):
+    if not isinstance(item, dict):
+        raise ValueError("Отметка должна быть объектом.")
+    habit_id = item.get("habit")
+    if isinstance(habit_id, bool) or not isinstance(habit_id, int):
+        raise ValueError("Укажите идентификатор привычки.")
+    checked_at = item.get("checked_at")
+    if checked_at is None:
+        return habit_id, now
+    try:
+        checked_at = datetime.fromisoformat(str(checked_at))
+    except ValueError:
+        raise ValueError("Время должно быть в формате ISO 8601.")
+    if django_timezone.is_naive(checked_at):
+        checked_at = django_timezone.make_aware(checked_at)
+    return habit_id, checked_at
+
+
+def insert_checkins(rows):
+    """
+    Записывает отметки в журнал пакетами по `CHECKIN_INSERT_BATCH` строк, каждый пакет — один запрос,
+    и сбрасывает кеш владельцев привычек (`habit.cache`).
+
+    :param rows: Кортежи (id привычки, время в микросекундах от эпохи, источник).
+    :return: Количество записанных строк (без повторов и отметок удаленных привычек).
+    """
+    inserted = {}
+    batch_size = settings.CHECKIN_INSERT_BATCH
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            habit_ids, micros, sources = zip(*rows[start:start + batch_size])
+            cursor.execute(INSERT_SQL, [list(habit_ids), list(micros), list(sources)])
+            for owner_id, count in cursor.fetchall():
+                inserted[owner_id] = inserted.get(owner_id, 0) + count
+    for owner_id in inserted:
+        if owner_id is not None:
+            invalidate_user_habits(owner_id)
+    return sum(inserted.values())
+
+
+def record_checkins(rows, source):
+    """
+    Принимает отметки в журнал.
+
+    Если настроен Redis, отметки добавляются в буфер одной командой, а в базу их переносит задача
+    `habit.tasks.flush_checkins` — по расписанию или сразу, когда в буфере накопилось
+    `CHECKIN_FLUSH_SIZE` отметок. Без Redis или при его недоступности отметки записываются сразу.
+
+    :param rows: Кортежи (id привычки, время в микросекундах от эпохи).
+    :param source: Источник отметок (`CheckIn.SOURCE_*`).
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            size = client.rpush(BUFFER_KEY, *(f"{habit_id}:{micros}:{source}" for habit_id, micros in rows))
+            if size >= settings.CHECKIN_FLUSH_SIZE and client.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=10):
+                from habit.tasks import flush_checkins
+
+                transaction.on_commit(flush_checkins.delay)
+            return
+        except RedisError as e:
+            logger.warning(f"Буфер отметок недоступен, отметки записываются сразу: {e}")
+    insert_checkins([(habit_id, micros, source) for habit_id, micros in rows])
+
+
+@lru_cache(maxsize=None)
+def get_flush_scripts(client):
+    """
+    Регистрирует Lua-скрипты сброса буфера для клиента Redis (вызываются через EVALSHA).
+    """
+    return client.register_script(TAKE_BATCH_SCRIPT), client.register_script(DELETE_IF_LOCKED_SCRIPT)
+
+
+def flush_buffer():
+    """
+    Переносит отметки из буфера Redis в журнал.
+
+    Пакет атомарно переносится из начала буфера в отдельный список и удаляется только после записи
+    в базу, поэтому при сбое отметки не теряются: следующий сброс запишет тот же пакет еще раз,
+    а уже записанные строки будут пропущены (`ON CONFLICT DO NOTHING`).
+
+    Одновременно буфер обрабатывает только воркер, получивший блокировку. Блокировка продлевается
+    перед каждым пакетом, а буфер и пакет меняются только при действующей блокировке, поэтому
+    воркер, чья блокировка истекла (например, на долгой записи), не удалит чужие отметки.
+    Переносится не больше отметок, чем было в буфере в начале сброса: поступившие во время сброса
+    запишет следующий.
+
+    :return: Количество перенесенных отметок.
+    """
+    client = get_redis()
+    token = uuid.uuid4().hex
+    if client is None or not client.set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_TIMEOUT):
+        return 0
+
+    take_batch, delete_if_locked = get_flush_scripts(client)
+    moved = 0
+    batch_size = settings.CHECKIN_INSERT_BATCH
+    try:
+        client.delete(FLUSH_SCHEDULED_KEY)
+        remaining = client.llen(BUFFER_KEY) + client.llen(PROCESSING_KEY)
+        while remaining > 0:
+            items = take_batch(keys=[FLUSH_LOCK_KEY, BUFFER_KEY, PROCESSING_KEY],
+                               args=[token, FLUSH_LOCK_TIMEOUT, batch_size])
+            if not items:
+                break
+            rows = []
+            for item in items:
+                habit_id, micros, source = item.split(b":")
+                rows.append((int(habit_id), int(micros), int(source)))
+            insert_checkins(rows)
+            if not delete_if_locked(keys=[FLUSH_LOCK_KEY, PROCESSING_KEY], args=[token]):
+                logger.warning("Блокировка сброса отметок истекла, пакет запишет следующий сброс")
+                break
+            moved += len(items)
+            remaining -= len(items)
+    finally:
+        delete_if_locked(keys=[FLUSH_LOCK_KEY, FLUSH_LOCK_KEY], args=[token])
+    return moved
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(value):
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def create_partitions(conn=None, months_ahead=None, now=None):
+    """
+    Создает секции журнала отметок по месяцам: с прошлого месяца до `months_ahead` месяцев вперед.
+
+    Уже существующие секции пропускаются. Если строки месяца уже попали в секцию по умолчанию,
+    секция месяца не создается, а ошибка записывается в журнал.
+
+    :param conn: Соединение с базой (по умолчанию `django.db.connection`).
+    :param months_ahead: Количество будущих месяцев (по умолчанию `CHECKIN_PARTITIONS_AHEAD`).
+    :param now: Текущее время (для тестов).
+    :return: Имена созданных или уже существующих секций.
+    """
+    conn = conn or connection
+    months_ahead = settings.CHECKIN_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    start = month_start(now or datetime.now(timezone.utc))
+    start = month_start(start - timedelta(days=1))
+
+    names = []
+    for _ in range(months_ahead + 2):
+        end = next_month(start)
+        name = f"habit_checkin_p{start:%Y_%m}"
+        try:
+            with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF habit_checkin "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                )
+            names.append(name)
+        except DatabaseError as e:
+            logger.error(f"Не удалось создать секцию {name}: {e}")
+        start = end
+    return names
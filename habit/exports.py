@@ -0,0 +1,119 @@
+import csv
+import json
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils import timezone
+
+# Колонки выгрузки в том же порядке и с теми же именами, что и в `HabitSerializer`
+EXPORT_FIELDS = (
+    "id", "place", "time", "action", "is_nice", "periodicity", "prize", "duration", "is_public",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "created_at", "updated_at", "owner", "related",
+)
+EXPORT_COLUMNS = tuple(f"{name}_id" if name in ("owner", "related") else name for name in EXPORT_FIELDS)
+
+# Количество строк, которое сервер отдает за одно обращение к курсору
+CHUNK_SIZE = 2000
+
+
+def _to_representation(value):
+    """
+    Приводит значение к тому же виду, в каком его возвращает API.
+    """
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+    if isinstance(value, time):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Возвращает строки выгрузки в виде кортежей.
+
+    Строки читаются через серверный курсор (`iterator(chunk_size=...)`) внутри транзакции:
+    вне транзакции Django объявляет курсор `WITH HOLD`, и PostgreSQL материализует весь результат
+    до выдачи первой строки.
+    """
+    with transaction.atomic():
+        for row in queryset.values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size):
+            yield tuple(_to_representation(value) for value in row)
+
+
+def _batched(lines, chunk_size):
+    """
+    Склеивает строки в блоки, чтобы не отдавать клиенту каждую строку отдельной записью.
+    """
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= chunk_size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Генерирует выгрузку в формате NDJSON: по одному JSON-объекту на строку.
+    """
+    lines = (
+        json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, separators=(",", ":")) + "\n"
+        for row in iter_rows(queryset, chunk_size)
+    )
+    return _batched(lines, chunk_size)
+
+
+class _Echo:
+    """
+    Псевдофайл для `csv.writer`, который возвращает записанную строку вместо ее сохранения.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Генерирует выгрузку в формате CSV с заголовком из имен полей.
+    """
+    writer = csv.writer(_Echo())
+    header = writer.writerow(EXPORT_FIELDS)
+    lines = (writer.writerow([_csv_value(value) for value in row]) for row in iter_rows(queryset, chunk_size))
+    yield header
+    yield from _batched(lines, chunk_size)
+
+
+async def aiter_stream(stream):
+    """
+    Отдает блоки выгрузки асинхронному серверу (ASGI).
+
+    Синхронный итератор в `StreamingHttpResponse` обработчик ASGI в Django собирает в список целиком
+    до отправки, поэтому под ASGI выгрузка отдается через этот асинхронный итератор. Каждый блок
+    читается в потоке запроса (`thread_sensitive`), где открыты транзакция и серверный курсор выгрузки.
+    """
+    read = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await read(stream, None)) is not None:
+            yield chunk
+    finally:
+        # Закрывает курсор и транзакцию, в том числе если клиент отключился до конца выгрузки
+        await sync_to_async(stream.close, thread_sensitive=True)()
+
+
+STREAMS = {
+    "ndjson": stream_ndjson,
+    "csv": stream_csv,
+}
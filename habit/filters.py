@@ -0,0 +1,82 @@
+from datetime import time
+
+from django.db.models import Q
+from rest_framework import serializers
+
+# Сокращения дней недели из параметра `day` и соответствующие поля модели
+WEEKDAYS = {
+    "mon": "monday",
+    "tue": "tuesday",
+    "wed": "wednesday",
+    "thu": "thursday",
+    "fri": "friday",
+    "sat": "saturday",
+    "sun": "sunday",
+}
+
+TRUE_VALUES = {"true", "1", "yes"}
+FALSE_VALUES = {"false", "0", "no"}
+
+
+def _parse_bool(name, value):
+    normalized = value.strip().lower()
+    if normalized in TRUE_VALUES:
+        return True
+    if normalized in FALSE_VALUES:
+        return False
+    raise serializers.ValidationError({name: ["Допустимые значения: true, false."]})
+
+
+def _parse_time(name, value):
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        raise serializers.ValidationError({name: ["Время должно быть в формате hh:mm[:ss]."]})
+
+
+def filter_habits(queryset, params):
+    """
+    Применяет к набору привычек фильтры из параметров запроса.
+
+    Поддерживаемые параметры:
+
+    - `day` - День недели (`mon`, `tue`, `wed`, `thu`, `fri`, `sat`, `sun`).
+    - `time_from`, `time_to` - Границы времени выполнения включительно. Если `time_from` больше `time_to`,
+      интервал считается переходящим через полночь.
+    - `is_nice` - Только приятные (`true`) или только полезные (`false`) привычки.
+    - `has_related` - Только привычки со связанной привычкой (`true`) или без нее (`false`).
+
+    Каждый фильтр обслуживается индексами модели `Habits` по владельцу.
+
+    :param queryset: Исходный набор привычек.
+    :param params: Параметры запроса (`request.query_params`).
+    :raises serializers.ValidationError: Если значение параметра некорректно.
+    :return: Отфильтрованный набор привычек.
+    """
+    day = params.get("day")
+    if day:
+        if day.lower() not in WEEKDAYS:
+            raise serializers.ValidationError({"day": [f"Допустимые значения: {', '.join(WEEKDAYS)}."]})
+        queryset = queryset.filter(**{WEEKDAYS[day.lower()]: True})
+
+    time_from = params.get("time_from")
+    time_to = params.get("time_to")
+    time_from = _parse_time("time_from", time_from) if time_from else None
+    time_to = _parse_time("time_to", time_to) if time_to else None
+    if time_from and time_to and time_from > time_to:
+        queryset = queryset.filter(Q(time__gte=time_from) | Q(time__lte=time_to))
+    else:
+        if time_from:
+            queryset = queryset.filter(time__gte=time_from)
+        if time_to:
+            queryset = queryset.filter(time__lte=time_to)
+
+    is_nice = params.get("is_nice")
+    if is_nice:
+        queryset = queryset.filter(is_nice=_parse_bool("is_nice", is_nice))
+
+    has_related = params.get("has_related")
+    if has_related:
+        queryset = queryset.filter(related__isnull=not _parse_bool("has_related", has_related))
+
+    return queryset
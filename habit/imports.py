@@ -0,0 +1,213 @@
+from datetime import time
+from itertools import islice
+
+from django.db import connection, transaction
+
+from habit.cache import invalidate_public_habits, invalidate_user_habits
+from habit.models import Habits
+from habit.serializers import HabitSerializer
+from habit.validators import HabitsDurationValidator, HabitsPeriodicValidator
+
+# Количество строк, которые проверяются и вставляются за один раз
+CHUNK_SIZE = 1000
+
+# Максимальное количество ошибок, попадающих в отчет
+MAX_REPORTED_ERRORS = 1000
+
+TRUE_VALUES = {"true", "1", "yes", "y", "да"}
+FALSE_VALUES = {"false", "0", "no", "n", "нет"}
+
+
+def _string(max_length, required):
+    def parse(value):
+        if value is None:
+            if required:
+                raise ValueError("Обязательное поле.")
+            return None
+        value = str(value)
+        if len(value) > max_length:
+            raise ValueError(f"Не более {max_length} символов.")
+        return value
+    return parse
+
+
+def _integer(internal_type, minimum=None):
+    """
+    Возвращает функцию приведения к целому числу в диапазоне поля модели.
+
+    Диапазон берется из `connection.ops.integer_field_range`, как в валидаторах полей Django,
+    чтобы значения вне диапазона отклонялись как ошибка строки, а не ошибкой базы данных при вставке.
+    """
+    low, high = connection.ops.integer_field_range(internal_type)
+    if minimum is not None:
+        low = minimum
+
+    def parse(value):
+        if value is None:
+            return None
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError("Требуется целое число.")
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError("Требуется целое число.")
+        if value < low or value > high:
+            raise ValueError(f"Значение должно быть от {low} до {high}.")
+        return value
+    return parse
+
+
+def _boolean(default):
+    def parse(value):
+        if value is None:
+            return default
+        if isinstance(value, bool):
+            return value
+        normalized = str(value).strip().lower()
+        if normalized in TRUE_VALUES:
+            return True
+        if normalized in FALSE_VALUES:
+            return False
+        raise ValueError("Требуется логическое значение.")
+    return parse
+
+
+def _time(value):
+    if value is None:
+        raise ValueError("Обязательное поле.")
+    try:
+        return time.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError("Время должно быть в формате hh:mm[:ss].")
+
+
+# Поля, которые принимаются при импорте, и функции приведения их значений.
+# Остальные поля (например, `id`, `owner`, `created_at` из выгрузки) игнорируются.
+FIELD_PARSERS = {
+    "place": _string(140, required=True),
+    "time": _time,
+    "action": _string(140, required=True),
+    "is_nice": _boolean(default=True),
+    "related": _integer(Habits._meta.pk.get_internal_type(), minimum=1),
+    "periodicity": _integer("SmallIntegerField"),
+    "prize": _string(100, required=False),
+    "duration": _integer("SmallIntegerField"),
+    "is_public": _boolean(default=True),
+    **{day: _boolean(default=True) for day in HabitSerializer.days_of_week},
+}
+
+
+def _coerce(record):
+    """
+    Приводит значения записи к типам полей модели.
+
+    Возвращает пару (данные, ошибки); ошибки — списки сообщений по именам полей.
+    """
+    data, errors = {}, {}
+    for field, parse in FIELD_PARSERS.items():
+        try:
+            data[field] = parse(record.get(field))
+        except (TypeError, ValueError) as e:
+            errors[field] = [str(e)]
+    return data, errors
+
+
+def _validate_chunk(rows, owner):
+    """
+    Проверяет пакет строк правилами `HabitSerializer`.
+
+    Связанные привычки загружаются одним запросом на пакет, а валидаторы периодичности
+    и длительности применяются к столбцам значений целиком.
+
+    Возвращает списки сообщений об ошибках по индексам строк.
+    """
+    errors = {}
+    for validator in (HabitsPeriodicValidator(field="periodicity"), HabitsDurationValidator(field="duration")):
+        for index, message in validator.validate_many(rows).items():
+            errors.setdefault(index, []).append(message)
+
+    related_ids = {row["related"] for row in rows if row["related"] is not None}
+    related_is_nice = dict(
+        Habits.objects.filter(owner=owner, pk__in=related_ids).values_list("pk", "is_nice")
+    ) if related_ids else {}
+    for index, row in enumerate(rows):
+        if row["related"] is not None and row["related"] not in related_is_nice:
+            errors.setdefault(index, []).append("Связанная привычка не найдена.")
+
+    for index, messages in HabitSerializer.validate_many(rows, related_is_nice).items():
+        errors.setdefault(index, []).extend(messages)
+    return errors
+
+
+def _split_chunk(chunk):
+    """
+    Приводит записи пакета к типам полей.
+
+    Возвращает номера и данные приведенных строк и список отклоненных строк с ошибками.
+    """
+    numbers, rows, rejected = [], [], []
+    for number, record in chunk:
+        if isinstance(record, str):
+            rejected.append((number, {"non_field_errors": [record]}))
+            continue
+        data, errors = _coerce(record)
+        if errors:
+            rejected.append((number, errors))
+            continue
+        numbers.append(number)
+        rows.append(data)
+    return numbers, rows, rejected
+
+
+def import_habits(records, owner, chunk_size=CHUNK_SIZE):
+    """
+    Импортирует привычки пользователя из потока записей.
+
+    Записи обрабатываются пакетами по `chunk_size`: значения приводятся к типам полей, пакет
+    проверяется правилами `HabitSerializer`, а корректные строки вставляются одним `bulk_create`.
+    Периодические задачи с напоминаниями для импортированных привычек не создаются.
+
+    Аргументы:
+        records (iterable): Пары (номер строки, запись), как их возвращают `NDJSONParser` и `CSVParser`.
+            Вместо записи может быть передано сообщение об ошибке разбора строки.
+        owner (User): Владелец импортируемых привычек.
+        chunk_size (int): Размер пакета.
+
+    Возвращает:
+        dict: Отчет с количеством созданных привычек, количеством ошибок и ошибками по строкам
+        (не более `MAX_REPORTED_ERRORS`) в том же формате, что и ошибки валидации DRF.
+    """
+    report = {"created": 0, "error_count": 0, "errors": []}
+
+    def reject(number, errors):
+        report["error_count"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": number, "errors": errors})
+
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        numbers, rows, rejected = _split_chunk(chunk)
+        errors = _validate_chunk(rows, owner)
+        valid = []
+        for index, (number, row) in enumerate(zip(numbers, rows)):
+            if index in errors:
+                rejected.append((number, {"non_field_errors": errors[index]}))
+                continue
+            row["related_id"] = row.pop("related")
+            valid.append(Habits(owner=owner, **row))
+
+        for number, errors in sorted(rejected, key=lambda item: item[0]):
+            reject(number, errors)
+
+        with transaction.atomic():
+            Habits.objects.bulk_create(valid, batch_size=chunk_size)
+        report["created"] += len(valid)
+    if report["created"]:
+        # bulk_create не отправляет post_save
+        invalidate_user_habits(owner.pk)
+        invalidate_public_habits()
+    return report
@@ -0,0 +1,78 @@
+import asyncio
+import statistics
+import time
+
+import httpx
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = 'Сравнить синхронные и асинхронные эндпоинты привычек под конкурентной нагрузкой'
+
+    paths = (
+        ('habit:habits_list', 'habit:habits_list_async'),
+        ('habit:public_list', 'habit:public_list_async'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Адрес запущенного сервера')
+        parser.add_argument('--email', help='Почта пользователя для получения JWT-токена')
+        parser.add_argument('--password', help='Пароль пользователя для получения JWT-токена')
+        parser.add_argument('--requests', type=int, default=500, help='Количество запросов на эндпоинт')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50],
+                            help='Уровни конкурентности')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        headers = {}
+        async with httpx.AsyncClient(base_url=options['base_url'], timeout=60) as client:
+            if options['email']:
+                response = await client.post(reverse('users:token_obtain_pair'), json={
+                    'email': options['email'],
+                    'password': options['password'],
+                })
+                response.raise_for_status()
+                headers['Authorization'] = f"Bearer {response.json()['access']}"
+
+            self.stdout.write(f"{'эндпоинт':<32}{'конк.':>6}{'запр/с':>10}{'p50, мс':>10}{'p95, мс':>10}{'ошибки':>8}")
+            for sync_name, async_name in self.paths:
+                if sync_name == 'habit:habits_list' and not headers:
+                    continue
+                for concurrency in options['concurrency']:
+                    for name in (sync_name, async_name):
+                        stats = await self.measure(client, reverse(name), headers, options['requests'], concurrency)
+                        self.stdout.write(
+                            f"{name:<32}{concurrency:>6}{stats['rps']:>10.1f}{stats['p50']:>10.1f}"
+                            f"{stats['p95']:>10.1f}{stats['errors']:>8}"
+                        )
+
+    async def measure(self, client, url, headers, total, concurrency):
+        """
+        Выполняет `total` запросов к `url`, не более `concurrency` одновременно.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            'rps': total / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'errors': errors,
+        }
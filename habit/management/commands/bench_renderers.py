@@ -0,0 +1,79 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import MessagePackRenderer, ORJSONRenderer
+from habit.models import Habits
+from habit.serializers import HabitSerializer
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает рендереры ответа на странице списка привычек того же вида, что отдает `habit/habits/list/`.
+
+    Привычки создаются в памяти, база данных не используется. Для каждого рендерера выводятся среднее
+    время и размер тела, для orjson — совпадает ли тело с `JSONRenderer`.
+    """
+
+    help = 'Сравнить время рендеринга списка привычек в JSON (stdlib, orjson) и MessagePack'
+
+    renderers = (
+        ('json', JSONRenderer()),
+        ('orjson', ORJSONRenderer()),
+        ('msgpack', MessagePackRenderer()),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, nargs='+', default=[10, 100, 1000], help='Привычек на странице')
+        parser.add_argument('--repeat', type=int, default=200, help='Повторов рендеринга')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'рендерер':<10}{'привычек':>10}{'среднее, мс':>13}{'p95, мс':>10}{'байт':>10}{'ускорение':>11}")
+        for size in options['size']:
+            data = self.payload(size)
+            baseline = None
+            for name, renderer in self.renderers:
+                body = renderer.render(data, renderer.media_type, {})
+                latencies = self.measure(renderer, data, options['repeat'])
+                mean = statistics.mean(latencies)
+                baseline = baseline or mean
+                self.stdout.write(
+                    f"{name:<10}{size:>10}{mean:>13.3f}{latencies[int(len(latencies) * 0.95) - 1]:>10.3f}"
+                    f"{len(body):>10}{baseline / mean:>10.1f}x"
+                )
+                if name == 'orjson' and body != JSONRenderer().render(data, 'application/json', {}):
+                    self.stderr.write('Тело orjson отличается от JSONRenderer')
+
+    def payload(self, size):
+        """
+        Возвращает страницу списка привычек из `size` привычек, как ее формирует `CustomPagination`.
+        """
+        now = timezone.now()
+        habits = [
+            Habits(
+                pk=index, owner_id=1, place=f'Место {index}', time=(now + timedelta(minutes=index)).time(),
+                action=f'Действие привычки {index}', is_nice=index % 2 == 0, periodicity=index % 7 + 1,
+                prize=None if index % 2 == 0 else 'Вознаграждение', duration=60, is_public=True,
+                created_at=now, updated_at=now,
+            )
+            for index in range(1, size + 1)
+        ]
+        return {
+            'count': size,
+            'next': 'http://localhost:8000/habit/habits/list/?page=2',
+            'previous': None,
+            'results': HabitSerializer(habits, many=True).data,
+        }
+
+    def measure(self, renderer, data, repeat):
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(data, renderer.media_type, {})
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        return latencies
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+
+from habit.imports import import_habits
+from habit.parsers import CSVParser, NDJSONParser
+
+PARSERS = {
+    'ndjson': NDJSONParser,
+    'csv': CSVParser,
+}
+
+
+class Command(BaseCommand):
+    help = 'Импортировать привычки пользователя из файла NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу импорта')
+        parser.add_argument('--owner', required=True, help='Почта пользователя, которому принадлежат привычки')
+        parser.add_argument('--format', choices=PARSERS, help='Формат файла (по умолчанию — по расширению)')
+
+    def handle(self, *args, **options):
+        try:
+            owner = get_user_model().objects.get(email=options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Пользователь {options['owner']} не найден.")
+
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in PARSERS:
+            raise CommandError('Не удалось определить формат файла, укажите --format.')
+
+        with open(options['path'], encoding='utf-8', newline='') as file:
+            report = import_habits(PARSERS[file_format].iter_records(file), owner)
+
+        self.stdout.write(self.style.SUCCESS(f"Создано привычек: {report['created']}"))
+        if report['error_count']:
+            self.stdout.write(self.style.WARNING(f"Строк с ошибками: {report['error_count']}"))
+            for error in report['errors']:
+                self.stdout.write(json.dumps(error, ensure_ascii=False))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habit', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habits',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('action', config='russian', weight='A'), '||', django.contrib.postgres.search.SearchVector('place', config='russian', weight='B'), django.contrib.postgres.search.SearchConfig('russian')), output_field=django.contrib.postgres.search.SearchVectorField(), verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('is_public', True)), fields=['search_vector'], name='habit_public_search_gin'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habit', '0002_habits_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(fields=['owner', 'time'], name='habit_owner_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(fields=['owner', 'is_nice', 'time'], name='habit_owner_nice_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('related__isnull', False)), fields=['owner', 'time'], name='habit_owner_related_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('monday', True)), fields=['owner', 'time'], name='habit_owner_mon_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('tuesday', True)), fields=['owner', 'time'], name='habit_owner_tue_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('wednesday', True)), fields=['owner', 'time'], name='habit_owner_wed_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('thursday', True)), fields=['owner', 'time'], name='habit_owner_thu_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('friday', True)), fields=['owner', 'time'], name='habit_owner_fri_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('saturday', True)), fields=['owner', 'time'], name='habit_owner_sat_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(condition=models.Q(('sunday', True)), fields=['owner', 'time'], name='habit_owner_sun_time_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_partitions(apps, schema_editor):
+    from habit.checkins import create_partitions
+
+    create_partitions(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habit', '0003_habits_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='CheckIn',
+                    fields=[
+                        ('pk', models.CompositePrimaryKey('habit', 'checked_at', blank=True, editable=False, primary_key=True, serialize=False)),
+                        ('checked_at', models.DateTimeField(verbose_name='Время выполнения')),
+                        ('source', models.SmallIntegerField(choices=[(1, 'API'), (2, 'Telegram')], default=1, verbose_name='Источник')),
+                        ('habit', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='checkins', to='habit.habits', verbose_name='Привычка')),
+                    ],
+                    options={
+                        'verbose_name': 'Отметка о выполнении',
+                        'verbose_name_plural': 'Отметки о выполнении',
+                    },
+                ),
+            ],
+            database_operations=[
+                # Django не создает секционированные таблицы, поэтому таблица описана вручную.
+                # Столбцы упорядочены по выравниванию: 8-байтовые, затем smallint.
+                migrations.RunSQL(
+                    sql="""
+                    CREATE TABLE habit_checkin (
+                        checked_at timestamptz NOT NULL,
+                        habit_id bigint NOT NULL
+                            REFERENCES habit_habits (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                        source smallint NOT NULL,
+                        PRIMARY KEY (habit_id, checked_at)
+                    ) PARTITION BY RANGE (checked_at);
+                    CREATE TABLE habit_checkin_default PARTITION OF habit_checkin DEFAULT;
+                    """,
+                    reverse_sql="DROP TABLE habit_checkin;",
+                ),
+            ],
+        ),
+        migrations.RunPython(create_partitions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:28
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habit', '0004_checkin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitTombstone',
+            fields=[
+                ('habit_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Привычка')),
+                ('owner_id', models.BigIntegerField(blank=True, null=True, verbose_name='Пользователь')),
+                ('sync_xid', models.BigIntegerField(verbose_name='Транзакция удаления')),
+                ('deleted_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Удаленная привычка',
+                'verbose_name_plural': 'Удаленные привычки',
+            },
+        ),
+        migrations.AddField(
+            model_name='habits',
+            name='sync_xid',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Транзакция изменения'),
+        ),
+        migrations.AddIndex(
+            model_name='habits',
+            index=models.Index(fields=['owner', 'sync_xid'], name='habit_owner_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habittombstone',
+            index=models.Index(fields=['owner_id', 'sync_xid'], name='habit_tombstone_owner_sync_idx'),
+        ),
+        # Транзакция изменения записывается триггером, поэтому учитываются и bulk_create, и update().
+        # Удаления (в том числе каскадные) записываются одним INSERT на оператор DELETE.
+        migrations.RunSQL(
+            sql="""
+            CREATE FUNCTION habit_habits_set_sync_xid() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.sync_xid := pg_current_xact_id()::text::bigint;
+                RETURN NEW;
+            END
+            $$;
+            CREATE TRIGGER habit_habits_sync_xid BEFORE INSERT OR UPDATE ON habit_habits
+                FOR EACH ROW EXECUTE FUNCTION habit_habits_set_sync_xid();
+
+            CREATE FUNCTION habit_habits_add_tombstones() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                INSERT INTO habit_habittombstone (habit_id, owner_id, sync_xid)
+                SELECT id, owner_id, pg_current_xact_id()::text::bigint FROM deleted
+                ON CONFLICT (habit_id) DO NOTHING;
+                RETURN NULL;
+            END
+            $$;
+            CREATE TRIGGER habit_habits_tombstones AFTER DELETE ON habit_habits
+                REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION habit_habits_add_tombstones();
+            """,
+            reverse_sql="""
+            DROP TRIGGER habit_habits_tombstones ON habit_habits;
+            DROP FUNCTION habit_habits_add_tombstones();
+            DROP TRIGGER habit_habits_sync_xid ON habit_habits;
+            DROP FUNCTION habit_habits_set_sync_xid();
+            """,
+        ),
+    ]
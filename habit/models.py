@@ -1,8 +1,17 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Now
 from config.settings import AUTH_USER_MODEL
 
 NULLABLE = {"blank": True, "null": True}
 
+# Конфигурация полнотекстового поиска PostgreSQL для полей привычек
+SEARCH_CONFIG = "russian"
+
+# Поля дней недели в порядке `date.weekday()`
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
 
 class Habits(models.Model):
     IS_NICE_CHOICES = (
@@ -63,6 +72,19 @@ class Habits(models.Model):
         auto_now=True,
     )
 
+    # Поисковый вектор по действию и месту, поддерживается самой базой данных
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("action", weight="A", config=SEARCH_CONFIG) + SearchVector("place", weight="B", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Поисковый вектор",
+    )
+
+    # Транзакция последнего изменения для синхронизации (`habit.sync`), заполняется триггером базы данных
+    sync_xid = models.BigIntegerField(default=0, editable=False, verbose_name="Транзакция изменения")
+
     def __str__(self):
         return f"Я буду {self.action} в {self.time} в {self.place}"
 
@@ -70,3 +92,73 @@ class Habits(models.Model):
         verbose_name = "Привычка"
         verbose_name_plural = "Привычки"
         ordering = ["-id"]
+        indexes = [
+            GinIndex(fields=["search_vector"], condition=models.Q(is_public=True), name="habit_public_search_gin"),
+            models.Index(fields=["owner", "time"], name="habit_owner_time_idx"),
+            models.Index(fields=["owner", "is_nice", "time"], name="habit_owner_nice_time_idx"),
+            models.Index(fields=["owner", "time"], condition=models.Q(related__isnull=False),
+                         name="habit_owner_related_idx"),
+            models.Index(fields=["owner", "sync_xid"], name="habit_owner_sync_idx"),
+            # Частичные индексы по дням недели для фильтра `day` и расписания на день
+            *(
+                models.Index(fields=["owner", "time"], condition=models.Q(**{day: True}),
+                             name=f"habit_owner_{day[:3]}_time_idx")
+                for day in WEEKDAYS
+            ),
+        ]
+
+
+class CheckIn(models.Model):
+    """
+    Отметка о выполнении привычки.
+
+    Журнал только дополняется и хранится в таблице, секционированной по месяцам (`checked_at`),
+    поэтому старые месяцы можно отсоединять и удалять целиком. Строка занимает минимум места:
+    ключ — привычка и время выполнения (повторная отметка с тем же временем не создает строку),
+    владелец определяется по привычке. Отметки пишутся пакетами через `habit.checkins`,
+    внешние ключи с каскадным удалением создаются в базе данных (миграция `0004_checkin`).
+    """
+
+    SOURCE_API = 1
+    SOURCE_TELEGRAM = 2
+    SOURCE_CHOICES = (
+        (SOURCE_API, "API"),
+        (SOURCE_TELEGRAM, "Telegram"),
+    )
+
+    pk = models.CompositePrimaryKey("habit", "checked_at")
+    habit = models.ForeignKey(
+        Habits, on_delete=models.DO_NOTHING, db_constraint=False, related_name="checkins", verbose_name="Привычка"
+    )
+    checked_at = models.DateTimeField(verbose_name="Время выполнения")
+    source = models.SmallIntegerField(choices=SOURCE_CHOICES, default=SOURCE_API, verbose_name="Источник")
+
+    def __str__(self):
+        return f"{self.habit_id} выполнена {self.checked_at}"
+
+    class Meta:
+        verbose_name = "Отметка о выполнении"
+        verbose_name_plural = "Отметки о выполнении"
+
+
+class HabitTombstone(models.Model):
+    """
+    Отметка об удалении привычки для синхронизации клиентов (`habit.sync`).
+
+    Строки добавляет триггер базы данных при удалении привычек, в том числе каскадном (миграция
+    `0005_habit_sync`), и удаляет задача `habit.tasks.purge_habit_tombstones` через
+    `HABIT_TOMBSTONE_RETENTION_DAYS` дней.
+    """
+
+    habit_id = models.BigIntegerField(primary_key=True, verbose_name="Привычка")
+    owner_id = models.BigIntegerField(**NULLABLE, verbose_name="Пользователь")
+    sync_xid = models.BigIntegerField(verbose_name="Транзакция удаления")
+    deleted_at = models.DateTimeField(db_default=Now(), verbose_name="Дата удаления")
+
+    def __str__(self):
+        return f"{self.habit_id} удалена {self.deleted_at}"
+
+    class Meta:
+        verbose_name = "Удаленная привычка"
+        verbose_name_plural = "Удаленные привычки"
+        indexes = [models.Index(fields=["owner_id", "sync_xid"], name="habit_tombstone_owner_sync_idx")]
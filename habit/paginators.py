@@ -1,4 +1,11 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
@@ -20,3 +27,144 @@ class CustomPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = "page_size"
     max_page_size = 10
+
+
+class AsyncCustomPagination(CustomPagination):
+    """
+    Постраничная разбивка для асинхронных представлений.
+
+    Использует те же параметры, что и `CustomPagination`, и возвращает ответ того же формата
+    (`count`, `next`, `previous`, `results`), но выполняет подсчет и выборку через асинхронный ORM
+    (`acount` и асинхронную итерацию по срезу набора данных).
+    """
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Возвращает список объектов текущей страницы.
+
+        :param queryset: Набор данных для разбивки.
+        :param request: Объект запроса DRF (`rest_framework.request.Request`).
+        :raises NotFound: Если номер страницы некорректен или выходит за пределы.
+        :return: Список объектов текущей страницы.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message)
+
+        self.count = await queryset.acount()
+        self.num_pages = max(1, -(-self.count // page_size))
+        if self.page_number < 1 or self.page_number > self.num_pages:
+            raise NotFound(self.invalid_page_message)
+
+        offset = (self.page_number - 1) * page_size
+        return [obj async for obj in queryset[offset:offset + page_size]]
+
+    def get_paginated_data(self, data):
+        """
+        Формирует тело ответа в формате `CustomPagination`.
+        """
+        return {
+            "count": self.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_next_link(self):
+        if self.page_number >= self.num_pages:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+
+class SearchKeysetPagination(BasePagination):
+    """
+    Пагинация результатов поиска по ключу (keyset pagination).
+
+    Результаты поиска упорядочены по убыванию релевантности (`rank`) и идентификатора. Вместо номера
+    страницы клиент передает непрозрачный курсор `cursor` из ссылки `next`, и следующая страница
+    выбирается условием `(rank, id) < (rank, id последней записи)`. Это избавляет от `OFFSET` и `COUNT(*)`,
+    стоимость которых растет с глубиной страницы и размером таблицы.
+
+    Атрибуты:
+    - `page_size` (int): Количество объектов на одной странице. По умолчанию 5.
+    - `page_size_query_param` (str): Параметр запроса для изменения размера страницы.
+    - `max_page_size` (int): Максимальное количество объектов на одной странице. По умолчанию 10.
+    - `cursor_query_param` (str): Параметр запроса с курсором.
+    """
+    page_size = CustomPagination.page_size
+    page_size_query_param = CustomPagination.page_size_query_param
+    max_page_size = CustomPagination.max_page_size
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Некорректный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            rank, pk = position
+            queryset = queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.last = results[-1] if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = json.dumps({"rank": self.last.rank, "id": self.last.pk})
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            base64.urlsafe_b64encode(cursor.encode()).decode(),
+        )
+
+    def decode_cursor(self, request):
+        """
+        Возвращает позицию (rank, id) из курсора или None для первой страницы.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            return float(cursor["rank"]), int(cursor["id"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
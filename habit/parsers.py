@@ -0,0 +1,55 @@
+import codecs
+import csv
+import json
+
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Парсер формата NDJSON (`Content-Type: application/x-ndjson`).
+
+    Возвращает не список, а генератор пар `(номер строки, запись)`, который читает тело запроса
+    построчно, поэтому файл импорта не загружается в память целиком. Если строка не является
+    JSON-объектом, вместо записи возвращается сообщение об ошибке (строка).
+    """
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        return self.iter_records(codecs.getreader(encoding)(stream))
+
+    @staticmethod
+    def iter_records(lines):
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, f"Некорректный JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield number, "Строка должна содержать JSON-объект."
+                continue
+            yield number, record
+
+
+class CSVParser(BaseParser):
+    """
+    Парсер формата CSV (`Content-Type: text/csv`).
+
+    Первая строка содержит имена полей. Как и `NDJSONParser`, возвращает генератор пар
+    `(номер строки, запись)`; пустые значения считаются отсутствующими.
+    """
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        return self.iter_records(codecs.getreader(encoding)(stream))
+
+    @staticmethod
+    def iter_records(lines):
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, {key: value for key, value in record.items() if key is not None and value != ""}
@@ -0,0 +1,47 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from habit.models import SEARCH_CONFIG
+
+# Максимальное количество слов в поисковом запросе
+MAX_QUERY_WORDS = 8
+
+
+def build_search_query(text):
+    """
+    Строит поисковый запрос PostgreSQL из пользовательской строки.
+
+    Каждое слово ищется по префиксу (`слово:*`), все слова должны присутствовать в действии
+    или месте привычки. Служебные символы синтаксиса `tsquery` отбрасываются.
+
+    :param text: Строка поиска из параметра `q`.
+    :return: `SearchQuery` или None, если в строке нет ни одного слова.
+    """
+    words = re.findall(r"\w+", text)[:MAX_QUERY_WORDS]
+    if not words:
+        return None
+    return SearchQuery(" & ".join(f"{word}:*" for word in words), search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_habits(queryset, text):
+    """
+    Фильтрует привычки по строке поиска и добавляет релевантность `rank`.
+
+    Фильтр по `search_vector` обслуживается GIN-индексом `habit_public_search_gin`
+    (для публичных привычек).
+
+    :param queryset: Исходный набор привычек.
+    :param text: Строка поиска.
+    :return: Набор привычек, отсортированный по убыванию релевантности и идентификатора.
+    """
+    query = build_search_query(text)
+    if query is None:
+        return queryset.none()
+    # ts_rank возвращает real; приведение к double precision нужно, чтобы значение в курсоре
+    # пагинации совпадало с вычисленным в базе и сравнивалось без потери точности
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    ).order_by("-rank", "-id")
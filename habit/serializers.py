@@ -28,9 +28,15 @@ class HabitSerializer(serializers.ModelSerializer):
     `Meta` классе.
     """
 
+    related_and_prize_message = "Может быть указано либо вознаграждение, либо связанная привычка, но не оба одновременно."
+    nice_habit_message = "У приятной привычки не может быть связанной привычки или вознаграждения."
+    related_not_nice_message = "Связанная привычка должна быть приятной."
+    no_days_message = "Хотя бы один день в неделю должен быть выбран!"
+    days_of_week = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+
     class Meta:
         model = Habits
-        fields = "__all__"
+        exclude = ("search_vector", "sync_xid")
         validators = [HabitsDurationValidator(field="duration"), HabitsPeriodicValidator(field="periodicity")]
 
     def validate(self, data):
@@ -53,24 +59,21 @@ class HabitSerializer(serializers.ModelSerializer):
 
         # Проверка: либо связанная привычка, либо вознаграждение
         if data.get("related") and data.get("prize"):
-            raise serializers.ValidationError(
-                "Может быть указано либо вознаграждение, либо связанная привычка, но не оба одновременно.")
+            raise serializers.ValidationError(self.related_and_prize_message)
 
         # Проверка: приятная привычка не может иметь связанную привычку или вознаграждение
         if data.get("is_nice"):
             if data.get("related") or data.get("prize"):
-                raise serializers.ValidationError(
-                    "У приятной привычки не может быть связанной привычки или вознаграждения.")
+                raise serializers.ValidationError(self.nice_habit_message)
 
         # Проверка: связанная привычка должна быть приятной
         related_habit = data.get("related")
         if related_habit and not related_habit.is_nice:
-            raise serializers.ValidationError("Связанная привычка должна быть приятной.")
+            raise serializers.ValidationError(self.related_not_nice_message)
 
         # Проверка: хотя бы один день недели должен быть выбран
-        days_of_week = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
-        if not any(data.get(day) for day in days_of_week):
-            raise serializers.ValidationError("Хотя бы один день в неделю должен быть выбран!")
+        if not any(data.get(day) for day in self.days_of_week):
+            raise serializers.ValidationError(self.no_days_message)
 
         # Периодичность и длительность проверяются валидаторами
         periodicity_validator = HabitsPeriodicValidator(field="periodicity")
@@ -80,3 +83,36 @@ class HabitSerializer(serializers.ModelSerializer):
         duration_validator(data)
 
         return data
+
+    @classmethod
+    def validate_many(cls, rows, related_is_nice):
+        """
+        Применяет правила `validate` сразу к пакету строк.
+
+        В отличие от `validate`, связанные привычки передаются заранее загруженными одним запросом
+        на весь пакет, а каждое правило проверяется по всем строкам за один проход.
+
+        :param rows: Список словарей с данными привычек, где `related` — идентификатор привычки.
+        :type rows: list
+        :param related_is_nice: Признак `is_nice` связанных привычек по их идентификаторам.
+        :type related_is_nice: dict
+        :return: Списки сообщений об ошибках по индексам строк, не прошедших проверку.
+        :rtype: dict
+        """
+        errors = {}
+
+        def add(indexes, message):
+            for index in indexes:
+                errors.setdefault(index, []).append(message)
+
+        related = [row.get("related") for row in rows]
+        prize = [row.get("prize") for row in rows]
+        is_nice = [row.get("is_nice") for row in rows]
+
+        add((i for i in range(len(rows)) if related[i] and prize[i]), cls.related_and_prize_message)
+        add((i for i in range(len(rows)) if is_nice[i] and (related[i] or prize[i])), cls.nice_habit_message)
+        add((i for i in range(len(rows)) if related[i] and related_is_nice.get(related[i]) is False),
+            cls.related_not_nice_message)
+        add((i for i, row in enumerate(rows) if not any(row.get(day) for day in cls.days_of_week)),
+            cls.no_days_message)
+        return errors
@@ -1,6 +1,7 @@
 from django.conf import settings
+from django.utils import timezone
 import requests
-from datetime import datetime, timedelta
+from datetime import timedelta
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
 import logging
 import json
@@ -42,7 +43,8 @@ def create_periodic_task(username, habit_id, hour, minute, week_list, message, c
     Создает периодическую задачу для отправки уведомлений.
 
     Эта функция создает или обновляет периодическую задачу с использованием Django Celery Beat.
-    Задача отправляет сообщение в Telegram в соответствии с заданным расписанием.
+    Задача отправляет сообщение в Telegram в соответствии с заданным расписанием, с кнопкой «Выполнено»,
+    отмечающей выполнение привычки.
 
     Аргументы:
         username (str): Имя пользователя, для которого создается задача.
@@ -69,16 +71,17 @@ def create_periodic_task(username, habit_id, hour, minute, week_list, message, c
 
         periodic_task, created = PeriodicTask.objects.get_or_create(
             name=f"habit_{habit_id}_{username}",
-            task="send_information_about_habit",
+            task="habit.tasks.send_telegram_message",
             interval=schedule,
             kwargs=json.dumps({
+                "chat_id": chat_id,
                 "message": message,
-                "tg_chat_id": chat_id
+                "habit_id": habit_id,
             }),
         )
 
         if created:
-            periodic_task.expires = datetime.utcnow() + timedelta(seconds=30)
+            periodic_task.expires = timezone.now() + timedelta(seconds=30)
             periodic_task.save()
             logger.info(f"Создана периодическая задача: {periodic_task}")
         else:
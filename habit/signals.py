@@ -1,8 +1,10 @@
+from functools import partial
+
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Habits
 from .tasks import send_telegram_message
-from django.conf import settings
 
 
 @receiver(post_save, sender=Habits)
@@ -11,7 +13,8 @@ def notify_telegram_on_new_habit(sender, instance, created, **kwargs):
     Отправляет уведомление в Telegram при создании новой привычки.
 
     Этот сигнал срабатывает после сохранения новой привычки в базе данных.
-    Если привычка была создана (а не обновлена), то отправляется сообщение в Telegram с информацией о новой привычке.
+    Если привычка была создана (а не обновлена) и у владельца указан `telegram_chat_id`, то в его чат
+    после фиксации транзакции отправляется сообщение с информацией о новой привычке и кнопкой «Выполнено».
 
     Аргументы:
         sender (Model): Модель, которая инициировала сигнал.
@@ -21,10 +24,13 @@ def notify_telegram_on_new_habit(sender, instance, created, **kwargs):
 
     Действия:
         - Формирует сообщение с информацией о новой привычке.
-        - Использует задачу Celery для отправки сообщения в Telegram по заданному chat_id.
+        - Использует задачу Celery для отправки сообщения в Telegram в чат владельца привычки.
     """
-    if created:
-        chat_id = settings.TELEGRAM_CHAT_ID
+    # Владелец загружается только для новых привычек, изменение привычки не выполняет лишний запрос
+    if not created or not instance.owner_id:
+        return
+    chat_id = instance.owner.telegram_chat_id
+    if chat_id:
         message = (
             f"Новая привычка создана:\n"
             f"Место: {instance.place}\n"
@@ -33,4 +39,4 @@ def notify_telegram_on_new_habit(sender, instance, created, **kwargs):
             f"Периодичность: {instance.periodicity} день(ей)\n"
             f"Длительность: {instance.duration} секунд\n"
         )
-        send_telegram_message.delay(chat_id, message)
+        transaction.on_commit(partial(send_telegram_message.delay, chat_id, message, habit_id=instance.pk))
@@ -0,0 +1,82 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework import serializers
+
+from habit.models import HabitTombstone, Habits
+
+# Граница синхронизации: транзакции с номером меньше xmin снимка завершены и их изменения уже видны
+TOKEN_SQL = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+def current_token():
+    """
+    Возвращает токен синхронизации вида `<xmin снимка>.<время выдачи в секундах>`.
+
+    Все изменения транзакций с номером меньше xmin уже видны, поэтому, если запросить изменения
+    с номером транзакции не меньше xmin, ничего не будет пропущено. Изменения транзакций, которые
+    в момент выдачи токена еще выполнялись, могут прийти повторно.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(TOKEN_SQL)
+        xmin = cursor.fetchone()[0]
+    return f"{xmin}.{int(time.time())}"
+
+
+def parse_token(token):
+    """
+    Разбирает токен синхронизации.
+
+    :raises serializers.ValidationError: Если токен имеет неверный формат.
+    :return: Пара (xmin, время выдачи).
+    """
+    try:
+        xmin, issued_at = token.split(".")
+        return int(xmin), int(issued_at)
+    except ValueError:
+        raise serializers.ValidationError({"since": ["Неверный токен синхронизации."]})
+
+
+def habit_changes(user, since=None):
+    """
+    Возвращает привычки пользователя, измененные после выдачи токена `since`, и id удаленных привычек.
+
+    Без токена или с токеном старше `HABIT_TOMBSTONE_RETENTION_DAYS` дней, когда отметки об удалении
+    уже могли быть удалены, возвращаются все привычки (`full`), и клиент заменяет ими свой список.
+    Новый токен запрашивается до выборки изменений, поэтому изменения, зафиксированные во время
+    выборки, придут при следующей синхронизации, возможно повторно.
+
+    :param user: Пользователь.
+    :param since: Токен предыдущей синхронизации.
+    :return: Словарь с новым токеном, признаком полной выгрузки, измененными привычками (queryset)
+        и id удаленных привычек.
+    """
+    token = current_token()
+    xmin, issued_at = parse_token(since) if since else (None, None)
+    retention = timedelta(days=settings.HABIT_TOMBSTONE_RETENTION_DAYS).total_seconds()
+    full = xmin is None or issued_at < time.time() - retention
+
+    habits = Habits.objects.filter(owner=user).order_by("pk")
+    if full:
+        return {"token": token, "full": True, "habits": habits, "deleted": []}
+    deleted = HabitTombstone.objects.filter(owner_id=user.pk, sync_xid__gte=xmin).order_by("habit_id")
+    return {
+        "token": token,
+        "full": False,
+        "habits": habits.filter(sync_xid__gte=xmin),
+        "deleted": list(deleted.values_list("habit_id", flat=True)),
+    }
+
+
+def purge_tombstones():
+    """
+    Удаляет отметки об удалении старше `HABIT_TOMBSTONE_RETENTION_DAYS` дней.
+
+    :return: Количество удаленных отметок.
+    """
+    threshold = timezone.now() - timedelta(days=settings.HABIT_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = HabitTombstone.objects.filter(deleted_at__lt=threshold).delete()
+    return deleted
@@ -1,25 +1,66 @@
 from celery import shared_task
-from telegram import Bot
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
 from django.conf import settings
 import asyncio
 import logging
 
+from habit.checkins import create_partitions, flush_buffer
+from habit.sync import purge_tombstones
+
 logger = logging.getLogger(__name__)
 
+# Префикс данных кнопки «Выполнено» в напоминании, за ним следует id привычки
+CHECKIN_CALLBACK_PREFIX = "checkin:"
+
 
 @shared_task
-def send_telegram_message(chat_id, message):
+def send_telegram_message(chat_id, message, habit_id=None):
     """
     Отправляет сообщение в Telegram с использованием бота.
+
+    Если передан `habit_id`, к сообщению добавляется кнопка «Выполнено», нажатие на которую
+    отмечает выполнение привычки (`TelegramWebhookAPIView`).
     """
     bot_token = settings.TELEGRAM_TOKEN
     bot = Bot(token=bot_token)
+    reply_markup = None
+    if habit_id is not None:
+        reply_markup = InlineKeyboardMarkup(
+            [[InlineKeyboardButton("Выполнено", callback_data=f"{CHECKIN_CALLBACK_PREFIX}{habit_id}")]]
+        )
 
     async def async_send_message():
         try:
-            await bot.send_message(chat_id=chat_id, text=message)
+            await bot.send_message(chat_id=chat_id, text=message, reply_markup=reply_markup)
             logger.info(f"Сообщение отправлено в Telegram. Chat ID: {chat_id}, Message: {message}")
         except Exception as e:
             logger.error(f"Ошибка при отправке сообщения в Telegram: {e}")
 
     asyncio.run(async_send_message())
+
+
+@shared_task
+def flush_checkins():
+    """
+    Переносит отметки о выполнении привычек из буфера Redis в журнал.
+    """
+    moved = flush_buffer()
+    if moved:
+        logger.info(f"Записано отметок о выполнении: {moved}")
+    return moved
+
+
+@shared_task
+def create_checkin_partitions():
+    """
+    Создает секции журнала отметок на следующие месяцы.
+    """
+    return create_partitions()
+
+
+@shared_task
+def purge_habit_tombstones():
+    """
+    Удаляет устаревшие отметки об удалении привычек.
+    """
+    return purge_tombstones()
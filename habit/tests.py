@@ -1,8 +1,45 @@
+import csv
+import gzip
+import io
+import json
+import time as time_module
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+import brotli
+from asgiref.sync import iscoroutinefunction, sync_to_async
+import fakeredis
+import msgpack
+
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APITransactionTestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from habit.models import Habits
+from django.utils import timezone as django_timezone
+from django.utils.translation import gettext_lazy
+from config import compression, replicas
+from config.admin import EstimatedCountPaginator
+from config.redis_client import get_redis
+from config.renderers import ORJSONRenderer
+from habit.analytics import habit_analytics
+from habit.cache import public_habits_version
+from habit.calendar import render_timezone
+from habit.checkins import (
+    BUFFER_KEY, FLUSH_LOCK_KEY, PROCESSING_KEY, create_partitions, flush_buffer, insert_checkins, to_micros,
+)
+from habit.sync import purge_tombstones
+from habit.tasks import send_telegram_message
+from habit.models import WEEKDAYS, CheckIn, HabitTombstone, Habits
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
 
 User = get_user_model()
 
@@ -158,3 +195,1268 @@ class HabitsAPITests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['action'], 'Пить воду')
+
+
+class AsyncHabitsAPITests(APITestCase):
+    """
+    Тесты асинхронных эндпоинтов привычек.
+
+    Проверяют, что асинхронные представления возвращают те же данные, что и синхронные,
+    и так же обрабатывают аутентификацию.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя с JWT-токеном и две привычки: личную и публичную.
+        """
+        self.user = User.objects.create_user(email='asyncuser@example.com', password='testpassword')
+        self.other = User.objects.create_user(email='other@example.com', password='testpassword')
+        self.habit = Habits.objects.create(
+            owner=self.user, place='Дом', time='07:00:00', action='Зарядка', is_nice=False,
+            periodicity=1, duration=60, is_public=False
+        )
+        Habits.objects.create(
+            owner=self.other, place='Парк', time='19:00:00', action='Прогулка', is_nice=True,
+            periodicity=1, duration=30, is_public=True
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_list_matches_sync(self):
+        """
+        Асинхронный список совпадает с синхронным.
+        """
+        sync_response = self.client.get(reverse('habit:habits_list'))
+        async_response = self.client.get(reverse('habit:habits_list_async'))
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    def test_retrieve(self):
+        """
+        Владелец получает свою привычку, чужая привычка недоступна.
+        """
+        response = self.client.get(reverse('habit:habits_retrieve_async', args=[self.habit.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['action'], 'Зарядка')
+
+        foreign = Habits.objects.get(owner=self.other)
+        response = self.client.get(reverse('habit:habits_retrieve_async', args=[foreign.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_public_list_without_token(self):
+        """
+        Публичный список доступен без аутентификации и совпадает с синхронным.
+        """
+        self.client.credentials()
+        sync_response = self.client.get(reverse('habit:public_list'))
+        async_response = self.client.get(reverse('habit:public_list_async'))
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    def test_list_requires_authentication(self):
+        """
+        Без токена список привычек возвращает 401.
+        """
+        self.client.credentials()
+        response = self.client.get(reverse('habit:habits_list_async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response)
+
+
+class HabitsExportAPITests(APITestCase):
+    """
+    Тесты потоковой выгрузки привычек в форматах NDJSON и CSV.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя с личной привычкой и чужую публичную привычку.
+        """
+        self.user = User.objects.create_user(email='export@example.com', password='testpassword')
+        other = User.objects.create_user(email='other@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.habit = Habits.objects.create(
+            owner=self.user, place='Дом', time='07:00:00', action='Зарядка', is_nice=False,
+            periodicity=1, prize='Чай', duration=60, is_public=False
+        )
+        Habits.objects.create(
+            owner=other, place='Парк', time='19:00:00', action='Прогулка', is_nice=True,
+            periodicity=1, duration=30, is_public=True
+        )
+
+    def test_export_ndjson_matches_api(self):
+        """
+        Строка NDJSON совпадает с представлением привычки в API.
+        """
+        response = self.client.get(reverse('habit:habits_export'), {'format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        api_data = self.client.get(reverse('habit:habits_retrieve', args=[self.habit.pk])).json()
+        self.assertEqual(json.loads(lines[0]), api_data)
+
+    def test_export_public_csv(self):
+        """
+        Публичная выгрузка в CSV доступна без аутентификации и содержит только публичные привычки.
+        """
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('habit:public_export'), {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['action'] for row in rows], ['Прогулка'])
+        self.assertEqual(rows[0]['is_public'], 'true')
+
+    async def test_export_streamed_asynchronously_under_asgi(self):
+        """
+        Под ASGI выгрузка отдается асинхронным итератором с тем же содержимым, что и под WSGI.
+        """
+        url = reverse('habit:public_export')
+        expected = await sync_to_async(lambda: b''.join(self.client.get(url, {'format': 'csv'}).streaming_content))()
+        response = await self.async_client.get(url, {'format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content, expected)
+
+    def test_export_requires_authentication(self):
+        """
+        Выгрузка личных привычек недоступна без аутентификации.
+        """
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('habit:habits_export'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class HabitsImportAPITests(APITestCase):
+    """
+    Тесты массового импорта привычек из NDJSON и CSV.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя и приятную привычку, на которую могут ссылаться импортируемые строки.
+        """
+        self.url = reverse('habit:habits_import')
+        self.user = User.objects.create_user(email='import@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.nice = Habits.objects.create(
+            owner=self.user, place='Дом', time='20:00:00', action='Ванна', is_nice=True,
+            periodicity=1, duration=60
+        )
+
+    def test_import_ndjson_with_report(self):
+        """
+        Корректные строки создаются, ошибочные попадают в отчет с номерами строк.
+        """
+        rows = [
+            {'place': 'Дом', 'time': '07:00', 'action': 'Зарядка', 'is_nice': False, 'related': self.nice.pk,
+             'periodicity': 1, 'duration': 60},
+            {'place': 'Дом', 'time': '08:00', 'action': 'Чтение', 'is_nice': False, 'periodicity': 9, 'duration': 60},
+            {'place': 'Дом', 'time': 'утро', 'action': 'Йога', 'periodicity': 1, 'duration': 60},
+        ]
+        body = '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows) + '\n{broken\n'
+        response = self.client.post(self.url, data=body.encode(), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['error_count'], 3)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        self.assertIn('time', response.data['errors'][1]['errors'])
+        self.assertEqual(Habits.objects.get(action='Зарядка').related, self.nice)
+
+    def test_import_csv_roundtrip(self):
+        """
+        Выгрузка в CSV импортируется обратно без изменений.
+        """
+        export = self.client.get(reverse('habit:habits_export'), {'format': 'csv'})
+        body = b''.join(export.streaming_content)
+        response = self.client.post(self.url, data=body, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'created': 1, 'error_count': 0, 'errors': []})
+        self.assertEqual(Habits.objects.filter(owner=self.user, action='Ванна').count(), 2)
+
+    def test_import_rejects_out_of_range_integers(self):
+        """
+        Значения вне диапазона поля модели попадают в отчет как ошибки строк, а не ошибка базы данных.
+        """
+        rows = [
+            {'place': 'Дом', 'time': '07:00', 'action': 'Зарядка', 'periodicity': 1, 'duration': -40000},
+            {'place': 'Дом', 'time': '07:00', 'action': 'Зарядка', 'periodicity': 70000, 'duration': 60},
+            {'place': 'Дом', 'time': '07:00', 'action': 'Зарядка', 'periodicity': 1, 'duration': 60},
+        ]
+        body = '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows)
+        response = self.client.post(self.url, data=body.encode(), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertIn('duration', response.data['errors'][0]['errors'])
+        self.assertIn('periodicity', response.data['errors'][1]['errors'])
+
+    def test_import_rejects_unknown_related(self):
+        """
+        Нулевая, отрицательная или несуществующая связанная привычка отклоняется как ошибка строки.
+        """
+        rows = [
+            {'place': 'Дом', 'time': '07:00', 'action': 'Зарядка', 'is_nice': False, 'related': related,
+             'periodicity': 1, 'duration': 60}
+            for related in (0, -1, self.nice.pk + 1000)
+        ]
+        body = '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows)
+        response = self.client.post(self.url, data=body.encode(), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['error_count'], 3)
+        self.assertIn('related', response.data['errors'][0]['errors'])
+        self.assertIn('related', response.data['errors'][1]['errors'])
+        self.assertEqual(response.data['errors'][2]['errors'], {'non_field_errors': ['Связанная привычка не найдена.']})
+        self.assertEqual(Habits.objects.filter(owner=self.user).count(), 1)
+
+    def test_import_rejects_unknown_content_type(self):
+        """
+        Неподдерживаемый формат тела запроса возвращает 415.
+        """
+        response = self.client.post(self.url, data={'place': 'Дом'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+
+class HabitsPublicSearchTests(APITestCase):
+    """
+    Тесты полнотекстового поиска по публичным привычкам.
+    """
+
+    def setUp(self):
+        """
+        Создает публичные привычки с разными действиями и одну личную.
+        """
+        self.url = reverse('habit:public_list')
+        self.user = User.objects.create_user(email='search@example.com', password='testpassword')
+        for index in range(7):
+            Habits.objects.create(
+                owner=self.user, place=f'Парк {index}', time='19:00:00', action='Прогулка', is_nice=True,
+                periodicity=1, duration=30, is_public=True
+            )
+        Habits.objects.create(
+            owner=self.user, place='Дом', time='21:00:00', action='Чтение книги', is_nice=True,
+            periodicity=1, duration=30, is_public=True
+        )
+        Habits.objects.create(
+            owner=self.user, place='Дом', time='22:00:00', action='Прогулка с собакой', is_nice=True,
+            periodicity=1, duration=30, is_public=False
+        )
+
+    def test_search_by_word_prefix(self):
+        """
+        Поиск находит публичные привычки по началу слова в действии или месте.
+        """
+        response = self.client.get(self.url, {'q': 'книг'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([habit['action'] for habit in response.data['results']], ['Чтение книги'])
+
+        response = self.client.get(self.url, {'q': 'дом'})
+        self.assertEqual([habit['action'] for habit in response.data['results']], ['Чтение книги'])
+
+    def test_search_keyset_pagination(self):
+        """
+        Страницы результатов поиска не пересекаются и вместе содержат все найденные привычки.
+        """
+        response = self.client.get(self.url, {'q': 'прогулка'})
+        first_page = [habit['id'] for habit in response.data['results']]
+        self.assertEqual(len(first_page), 5)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        second_page = [habit['id'] for habit in response.data['results']]
+        self.assertEqual(len(second_page), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertFalse(set(first_page) & set(second_page))
+
+    def test_invalid_cursor(self):
+        """
+        Некорректный курсор возвращает 404.
+        """
+        response = self.client.get(self.url, {'q': 'прогулка', 'cursor': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'public_feed_ip': '2/min', 'public_feed_user': '5/min', 'public_export_ip': '1/hour'},
+})
+class PublicFeedThrottlingTests(APITestCase):
+    """
+    Тесты ограничения частоты запросов к публичной ленте и выгрузке (Redis заменен fakeredis).
+    """
+
+    def setUp(self):
+        """
+        Подменяет Redis ограничителей и аутентифицирует пользователя.
+        """
+        self.redis = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch('config.throttling.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(email='feed-throttle@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def test_ip_denial_does_not_debit_user_bucket(self):
+        """
+        Запрос, отклоненный по IP-адресу, не списывает токен из корзины пользователя.
+        """
+        url = reverse('habit:public_list')
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_X_FORWARDED_FOR='203.0.113.7')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        tokens = float(self.redis.hget(f'throttle:public_feed:user:{self.user.pk}', 'tokens'))
+        self.assertGreater(tokens, 2.5)
+
+    def test_public_export_throttled_by_ip(self):
+        """
+        Публичная выгрузка без аутентификации ограничена по IP-адресу отдельно от ленты.
+        """
+        self.client.force_authenticate(user=None)
+        url = reverse('habit:public_export')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        b''.join(response.streaming_content)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.client.get(reverse('habit:public_list')).status_code, status.HTTP_200_OK)
+
+
+class HabitsListFilterTests(APITestCase):
+    """
+    Тесты фильтров списка привычек по дню недели, времени, приятности и наличию связанной привычки.
+    """
+
+    def setUp(self):
+        """
+        Создает набор привычек с разными днями недели и временем выполнения.
+        """
+        self.url = reverse('habit:habits_list')
+        self.user = User.objects.create_user(email='filters@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.bath = Habits.objects.create(
+            owner=self.user, place='Дом', time='22:30:00', action='Ванна', is_nice=True,
+            periodicity=1, duration=60
+        )
+        Habits.objects.create(
+            owner=self.user, place='Дом', time='07:00:00', action='Зарядка', is_nice=False, related=self.bath,
+            periodicity=1, duration=60, saturday=False, sunday=False
+        )
+        Habits.objects.create(
+            owner=self.user, place='Парк', time='12:00:00', action='Прогулка', is_nice=False, prize='Кофе',
+            periodicity=1, duration=60, monday=False
+        )
+
+    def actions(self, **params):
+        """
+        Возвращает отсортированные действия привычек из ответа списка с заданными фильтрами.
+        """
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(habit['action'] for habit in response.data['results'])
+
+    def test_filter_by_day(self):
+        """
+        Фильтр `day` оставляет только привычки, назначенные на этот день.
+        """
+        self.assertEqual(self.actions(day='mon'), ['Ванна', 'Зарядка'])
+        self.assertEqual(self.actions(day='sun'), ['Ванна', 'Прогулка'])
+
+    def test_filter_by_time_window(self):
+        """
+        Фильтр по времени, в том числе с интервалом через полночь.
+        """
+        self.assertEqual(self.actions(time_from='06:00', time_to='13:00'), ['Зарядка', 'Прогулка'])
+        self.assertEqual(self.actions(time_from='22:00', time_to='08:00'), ['Ванна', 'Зарядка'])
+
+    def test_filter_by_is_nice_and_related(self):
+        """
+        Фильтры `is_nice` и `has_related` и их комбинация.
+        """
+        self.assertEqual(self.actions(is_nice='true'), ['Ванна'])
+        self.assertEqual(self.actions(has_related='true'), ['Зарядка'])
+        self.assertEqual(self.actions(is_nice='false', has_related='false'), ['Прогулка'])
+
+    def test_invalid_filter_value(self):
+        """
+        Некорректное значение фильтра возвращает 400 с описанием ошибки.
+        """
+        response = self.client.get(self.url, {'day': 'monday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('day', response.data)
+
+
+class HabitsAdminTests(APITestCase):
+    """
+    Тесты списка привычек в админке для больших таблиц.
+    """
+
+    def setUp(self):
+        """
+        Создает суперпользователя и привычки разных владельцев.
+        """
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpassword')
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:habit_habits_changelist')
+
+    def create_habits(self, count):
+        """
+        Создает привычки, каждая со своим владельцем.
+        """
+        for i in range(count):
+            owner = User.objects.create_user(email=f'owner{count}_{i}@example.com', password='testpassword')
+            Habits.objects.create(owner=owner, place='Дом', time='08:00:00', action='Зарядка', periodicity=1,
+                                  duration=60)
+
+    def test_owner_loaded_with_join(self):
+        """
+        Количество запросов списка не зависит от числа привычек на странице.
+        """
+        self.create_habits(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        self.create_habits(8)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=5)
+    def test_estimated_count_above_threshold(self):
+        """
+        Для таблицы больше порога количество строк без фильтров берется из статистики PostgreSQL.
+        """
+        self.create_habits(10)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE habit_habits')
+
+        paginator = EstimatedCountPaginator(Habits.objects.all(), 5)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(paginator.count, 10)
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+        self.assertEqual(EstimatedCountPaginator(Habits.objects.filter(pk=0), 5).count, 0)
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRouterTests(APITestCase):
+    """
+    Тесты маршрутизации чтения на реплики.
+
+    Роль реплики играет основная тестовая база, поэтому проверяется выбор базы маршрутизатором.
+    """
+
+    def setUp(self):
+        """
+        Сбрасывает результаты проверки реплик и создает аутентифицированного пользователя.
+        """
+        self.addCleanup(replicas._replica_health.clear)
+        self.addCleanup(cache.clear)
+        self.router = replicas.ReplicaRouter()
+        self.user = User.objects.create_user(email='replica@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def test_reads_routed_to_replica(self):
+        """
+        Внутри `replica_reads()` чтение идет с исправной реплики, вне его и запись — с основной базы.
+        Миграции к репликам не применяются.
+        """
+        self.assertIsNone(self.router.db_for_read(Habits))
+        with replicas.replica_reads():
+            self.assertEqual(self.router.db_for_read(Habits), 'default')
+            replicas.use_primary()
+            self.assertIsNone(self.router.db_for_read(Habits))
+        self.assertEqual(self.router.db_for_write(Habits), 'default')
+        self.assertFalse(self.router.allow_migrate('default', 'habit'))
+
+    @override_settings(REPLICA_MAX_LAG=-1)
+    def test_lagging_or_missing_replica_skipped(self):
+        """
+        Отстающая или недоступная реплика не используется, чтение идет с основной базы.
+        """
+        with replicas.replica_reads():
+            self.assertIsNone(self.router.db_for_read(Habits))
+            with override_settings(DATABASE_REPLICAS=['missing']):
+                self.assertIsNone(self.router.db_for_read(Habits))
+
+    def test_write_pins_user_to_primary(self):
+        """
+        После изменяющего запроса пользователь закрепляется за основной базой.
+        """
+        response = self.client.post(reverse('habit:habits_create'), {
+            'place': 'Дом', 'time': '08:00:00', 'action': 'Зарядка', 'is_nice': False, 'periodicity': 1,
+            'duration': 60, 'monday': True,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(replicas.is_user_pinned(self.user.pk))
+
+        other = User.objects.create_user(email='reader@example.com', password='testpassword')
+        self.client.force_authenticate(user=other)
+        self.client.get(reverse('habit:habits_list'))
+        self.assertFalse(replicas.is_user_pinned(other.pk))
+
+    async def test_write_pins_user_under_asgi(self):
+        """
+        Под ASGI middleware работает в асинхронной цепочке и так же закрепляет пользователя после записи.
+        """
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(replicas.ReadYourWritesMiddleware(get_response)))
+
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+        response = await self.async_client.post(reverse('habit:habits_create'), {
+            'place': 'Дом', 'time': '08:00:00', 'action': 'Зарядка', 'is_nice': False, 'periodicity': 1,
+            'duration': 60, 'monday': True,
+        }, content_type='application/json', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await sync_to_async(replicas.is_user_pinned)(self.user.pk))
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'Для проверки чтения из реплик нужна реплика (POSTGRES_REPLICA_HOSTS).')
+class ReplicaReadsTests(APITransactionTestCase):
+    """
+    Тесты чтения из реплики через API.
+
+    В тестах реплика указывает на тестовую основную базу (`TEST['MIRROR']`) через отдельное соединение,
+    поэтому используется `APITransactionTestCase`: данные должны быть зафиксированы.
+    """
+
+    databases = '__all__'
+
+    def setUp(self):
+        """
+        Создает пользователя с привычкой.
+        """
+        self.addCleanup(replicas._replica_health.clear)
+        self.addCleanup(cache.clear)
+        self.replica = connections[settings.DATABASE_REPLICAS[0]]
+        self.user = User.objects.create_user(email='replica@example.com', password='testpassword')
+        Habits.objects.create(owner=self.user, place='Дом', time='08:00:00', action='Зарядка', periodicity=1,
+                              duration=60)
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_read_from_replica_until_write(self):
+        """
+        Список читается с реплики, а после записи пользователь читает свои данные с основной базы.
+        """
+        with override_settings(DATABASE_REPLICAS=settings.DATABASE_REPLICAS[:1]):
+            with CaptureQueriesContext(self.replica) as replica_queries:
+                response = self.client.get(reverse('habit:habits_list'))
+            self.assertEqual(response.data['count'], 1)
+            self.assertTrue(any('habit_habits' in query['sql'] for query in replica_queries))
+
+            response = self.client.post(reverse('habit:habits_create'), {
+                'place': 'Парк', 'time': '09:00:00', 'action': 'Бег', 'is_nice': False, 'periodicity': 1,
+                'duration': 60, 'monday': True,
+            })
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            with CaptureQueriesContext(self.replica) as replica_queries:
+                response = self.client.get(reverse('habit:habits_list'))
+            self.assertEqual(response.data['count'], 2)
+            self.assertFalse(any('habit_habits' in query['sql'] for query in replica_queries))
+
+
+class CheckInTests(APITestCase):
+    """
+    Тесты журнала отметок о выполнении привычек.
+
+    Если задан `REDIS_URL`, отметки проходят через буфер Redis и переносятся в журнал `flush_buffer`.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя с привычкой и привычку другого пользователя.
+        """
+        if get_redis() is not None:
+            get_redis().delete(BUFFER_KEY)
+        self.url = reverse('habit:checkins_create')
+        self.user = User.objects.create_user(email='checkin@example.com', password='testpassword',
+                                             telegram_chat_id='555')
+        self.habit = Habits.objects.create(owner=self.user, place='Дом', time='08:00:00', action='Зарядка',
+                                           periodicity=1, duration=60)
+        other = User.objects.create_user(email='other-checkin@example.com', password='testpassword')
+        self.other_habit = Habits.objects.create(owner=other, place='Парк', time='09:00:00', action='Бег',
+                                                 periodicity=1, duration=60)
+        self.client.force_authenticate(user=self.user)
+
+    def flush(self):
+        """
+        Переносит отметки из буфера в журнал, если используется Redis.
+        """
+        if get_redis() is not None:
+            flush_buffer()
+
+    def test_checkins_recorded_in_monthly_partition(self):
+        """
+        Пакет отметок записывается в секцию текущего месяца, повторная отметка с тем же временем не дублируется.
+        """
+        checked_at = datetime.now(timezone.utc).replace(microsecond=123456) - timedelta(minutes=5)
+        payload = [{'habit': self.habit.pk, 'checked_at': checked_at.isoformat()}, {'habit': self.habit.pk}]
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {'accepted': 2})
+        self.client.post(self.url, payload[0], format='json')
+        self.flush()
+
+        self.assertEqual(CheckIn.objects.filter(habit=self.habit).count(), 2)
+        self.assertTrue(CheckIn.objects.filter(habit=self.habit, checked_at=checked_at,
+                                               source=CheckIn.SOURCE_API).exists())
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT DISTINCT tableoid::regclass::text FROM habit_checkin')
+            self.assertEqual(cursor.fetchall(), [(f'habit_checkin_p{checked_at:%Y_%m}',)])
+
+    def test_invalid_checkins_rejected(self):
+        """
+        Пакет с чужой привычкой, временем в будущем или неверным форматом отклоняется целиком.
+        """
+        future = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+        response = self.client.post(self.url, [
+            {'habit': self.habit.pk},
+            {'habit': self.other_habit.pk},
+            {'habit': self.habit.pk, 'checked_at': future},
+            {'habit': self.habit.pk, 'checked_at': 'вчера'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.flush()
+        self.assertFalse(CheckIn.objects.exists())
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET='secret')
+    def test_telegram_callback(self):
+        """
+        Нажатие кнопки «Выполнено» в Telegram отмечает привычку владельца чата.
+        """
+        url = reverse('habit:telegram_webhook')
+        update = {'update_id': 1, 'callback_query': {
+            'id': '42', 'from': {'id': 555}, 'message': {'chat': {'id': 555}}, 'data': f'checkin:{self.habit.pk}',
+        }}
+        self.client.force_authenticate(user=None)
+        response = self.client.post(url, update, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='wrong')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.post(url, update, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['method'], 'answerCallbackQuery')
+        self.assertEqual(response.data['text'], 'Отмечено: Зарядка')
+
+        update['callback_query']['data'] = f'checkin:{self.other_habit.pk}'
+        response = self.client.post(url, update, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='secret')
+        self.assertEqual(response.data['text'], 'Привычка не найдена.')
+
+        self.flush()
+        self.assertEqual(list(CheckIn.objects.values_list('habit', 'source')),
+                         [(self.habit.pk, CheckIn.SOURCE_TELEGRAM)])
+
+    def test_habit_update_does_not_load_owner(self):
+        """
+        Сохранение измененной привычки не загружает владельца для уведомления в Telegram.
+        """
+        habit = Habits.objects.get(pk=self.habit.pk)
+        habit.place = 'Парк'
+        with CaptureQueriesContext(connection) as queries:
+            habit.save()
+        self.assertFalse(any('users_user' in query['sql'] for query in queries))
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET='secret')
+    def test_reminder_button_checks_in(self):
+        """
+        Напоминание о новой привычке приходит в чат владельца с кнопкой «Выполнено», нажатие отмечает привычку.
+        """
+        bot = mock.MagicMock()
+        bot.return_value.send_message = mock.AsyncMock()
+        # Задача выполняется сразу, а бот только запоминает отправленное сообщение
+        run_task = mock.patch.object(send_telegram_message, 'delay', send_telegram_message)
+        with mock.patch('habit.tasks.Bot', bot), run_task, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('habit:habits_create'), {
+                'place': 'Дом', 'time': '21:00:00', 'action': 'Чтение', 'is_nice': False, 'periodicity': 1,
+                'prize': 'Чай', 'duration': 2, 'monday': True,
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        habit = Habits.objects.get(action='Чтение')
+        self.assertEqual(habit.owner, self.user)
+
+        sent = bot.return_value.send_message.call_args.kwargs
+        self.assertEqual(sent['chat_id'], '555')
+        button = sent['reply_markup'].inline_keyboard[0][0]
+        self.assertEqual(button.text, 'Выполнено')
+
+        self.client.force_authenticate(user=None)
+        response = self.client.post(reverse('habit:telegram_webhook'), {'update_id': 1, 'callback_query': {
+            'id': '42', 'from': {'id': 555}, 'message': {'chat': {'id': 555}}, 'data': button.callback_data,
+        }}, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='secret')
+        self.assertEqual(response.data['text'], 'Отмечено: Чтение')
+        self.flush()
+        self.assertEqual(list(CheckIn.objects.values_list('habit', flat=True)), [habit.pk])
+
+    def test_habit_deletion_removes_checkins(self):
+        """
+        При удалении привычки ее отметки удаляются базой данных.
+        """
+        self.client.post(self.url, {'habit': self.habit.pk}, format='json')
+        self.flush()
+        self.habit.delete()
+        self.assertFalse(CheckIn.objects.exists())
+
+    def test_partitions_created_ahead(self):
+        """
+        Секции создаются с прошлого месяца на `CHECKIN_PARTITIONS_AHEAD` месяцев вперед.
+        """
+        names = create_partitions(months_ahead=2, now=datetime(2030, 1, 15, tzinfo=timezone.utc))
+        self.assertEqual(names, ['habit_checkin_p2029_12', 'habit_checkin_p2030_01', 'habit_checkin_p2030_02',
+                                 'habit_checkin_p2030_03'])
+
+
+class CheckInFlushTests(APITestCase):
+    """
+    Тесты переноса отметок из буфера Redis в журнал (Redis заменен fakeredis).
+    """
+
+    def setUp(self):
+        """
+        Подменяет клиент Redis и создает привычку.
+        """
+        self.redis = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch('habit.checkins.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        user = User.objects.create_user(email='flush@example.com', password='testpassword')
+        self.habit = Habits.objects.create(owner=user, place='Дом', time='08:00:00', action='Зарядка',
+                                           periodicity=1, duration=60)
+        self.now = to_micros(datetime.now(timezone.utc))
+
+    def push(self, *offsets):
+        """
+        Добавляет в буфер отметки привычки со смещениями времени в микросекундах.
+        """
+        self.redis.rpush(BUFFER_KEY, *(f'{self.habit.pk}:{self.now - offset}:{CheckIn.SOURCE_API}' for offset in offsets))
+
+    @override_settings(CHECKIN_INSERT_BATCH=2)
+    def test_buffer_flushed_in_batches(self):
+        """
+        Буфер переносится пакетами до конца, после сброса буфер, пакет и блокировка удалены.
+        """
+        self.push(1, 2, 3, 4, 5)
+        self.assertEqual(flush_buffer(), 5)
+        self.assertEqual(CheckIn.objects.count(), 5)
+        self.assertFalse(self.redis.exists(BUFFER_KEY, PROCESSING_KEY, FLUSH_LOCK_KEY))
+
+    def test_batch_left_by_failed_flush_written(self):
+        """
+        Пакет, не удаленный после сбоя воркера, записывается следующим сбросом.
+        """
+        self.push(1, 2)
+        with mock.patch('habit.checkins.insert_checkins', side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            flush_buffer()
+        self.assertEqual(self.redis.llen(PROCESSING_KEY), 2)
+        self.assertFalse(self.redis.exists(FLUSH_LOCK_KEY))
+
+        self.assertEqual(flush_buffer(), 2)
+        self.assertEqual(CheckIn.objects.count(), 2)
+        self.assertFalse(self.redis.exists(BUFFER_KEY, PROCESSING_KEY))
+
+    @override_settings(CHECKIN_INSERT_BATCH=1)
+    def test_expired_lock_keeps_other_worker_batches(self):
+        """
+        Воркер, чья блокировка истекла и перешла другому, не удаляет ни пакет, ни буфер, ни чужую блокировку.
+        """
+        self.push(1, 2)
+
+        def lose_lock(rows):
+            self.redis.set(FLUSH_LOCK_KEY, 'other')
+            return insert_checkins(rows)
+
+        with mock.patch('habit.checkins.insert_checkins', side_effect=lose_lock):
+            self.assertEqual(flush_buffer(), 0)
+        self.assertEqual(self.redis.get(FLUSH_LOCK_KEY), b'other')
+        self.assertEqual(self.redis.llen(PROCESSING_KEY), 1)
+        self.assertEqual(self.redis.llen(BUFFER_KEY), 1)
+
+
+class HabitsAnalyticsTests(APITestCase):
+    """
+    Тесты аналитики выполнения привычек.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя с ежедневной привычкой.
+        """
+        self.addCleanup(cache.clear)
+        if get_redis() is not None:
+            get_redis().delete(BUFFER_KEY)
+        self.url = reverse('habit:habits_analytics')
+        self.user = User.objects.create_user(email='analytics@example.com', password='testpassword')
+        self.habit = Habits.objects.create(owner=self.user, place='Дом', time='08:00:00', action='Зарядка',
+                                           periodicity=1, duration=60)
+        self.today = django_timezone.localdate()
+        self.client.force_authenticate(user=self.user)
+
+    def check_in(self, habit, *days_ago):
+        """
+        Записывает отметки привычки в полдень указанных дней.
+        """
+        insert_checkins([
+            (habit.pk, to_micros(django_timezone.make_aware(
+                datetime.combine(self.today - timedelta(days=days), time(12))
+            )), CheckIn.SOURCE_API)
+            for days in days_ago
+        ])
+
+    def stats(self, habit):
+        """
+        Возвращает показатели привычки из аналитики пользователя.
+        """
+        return next(item for item in habit_analytics(self.user, self.today)['habits'] if item['id'] == habit.pk)
+
+    def test_streaks_and_rates(self):
+        """
+        Пропуск прерывает серию, невыполненная сегодня привычка не считается пропуском.
+        """
+        self.check_in(self.habit, 1, 2, 3, 5)
+        stats = self.stats(self.habit)
+        self.assertEqual((stats['current_streak'], stats['longest_streak']), (3, 3))
+        self.assertEqual((stats['completed'], stats['scheduled'], stats['completion_rate']), (4, 5, 0.8))
+
+        self.check_in(self.habit, 0)
+        stats = self.stats(self.habit)
+        self.assertEqual((stats['current_streak'], stats['completion_rate']), (4, round(5 / 6, 4)))
+
+    def test_schedule_respects_weekdays_and_periodicity(self):
+        """
+        Дни вне дней недели и периодичности привычки не прерывают серию и не учитываются в доле выполнения.
+        """
+        skipped_day = WEEKDAYS[(self.today - timedelta(days=1)).weekday()]
+        Habits.objects.filter(pk=self.habit.pk).update(**{skipped_day: False})
+        every_other_day = Habits.objects.create(owner=self.user, place='Парк', time='09:00:00', action='Бег',
+                                                periodicity=2, duration=60)
+        self.check_in(self.habit, 2, 3)
+        self.check_in(every_other_day, 2, 3, 4)
+
+        stats = self.stats(self.habit)
+        self.assertEqual((stats['current_streak'], stats['scheduled']), (2, 2))
+        stats = self.stats(every_other_day)
+        self.assertEqual((stats['current_streak'], stats['completed'], stats['scheduled']), (2, 2, 2))
+
+    def test_analytics_cached_until_next_checkin(self):
+        """
+        Аналитика кешируется и пересчитывается после записи отметки.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['habits'][0]['completed'], 0)
+        self.assertIsNone(response.data['completion_rate'])
+        self.assertEqual(len(response.data['heatmap']['completed']), settings.HABIT_ANALYTICS_WEEKS)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        self.client.post(reverse('habit:checkins_create'), {'habit': self.habit.pk}, format='json')
+        if get_redis() is not None:
+            flush_buffer()
+        response = self.client.get(self.url)
+        self.assertEqual((response.data['habits'][0]['completed'], response.data['completion_rate']), (1, 1.0))
+        self.assertEqual(sum(map(sum, response.data['heatmap']['completed'])), 1)
+
+
+class HabitsTodayTests(APITestCase):
+    """
+    Тесты повестки привычек на сегодня.
+    """
+
+    def setUp(self):
+        """
+        Создает привычки пользователя на сегодня и на другой день недели и привычку другого пользователя.
+        """
+        self.addCleanup(cache.clear)
+        if get_redis() is not None:
+            get_redis().delete(BUFFER_KEY)
+        self.url = reverse('habit:habits_today')
+        self.user = User.objects.create_user(email='today@example.com', password='testpassword')
+        weekday = WEEKDAYS[django_timezone.localdate().weekday()]
+        self.evening = Habits.objects.create(owner=self.user, place='Дом', time='21:00:00', action='Чтение',
+                                             periodicity=1, duration=30)
+        self.morning = Habits.objects.create(owner=self.user, place='Парк', time='07:00:00', action='Бег',
+                                             periodicity=1, duration=60)
+        Habits.objects.create(owner=self.user, place='Бассейн', time='08:00:00', action='Плавание',
+                              periodicity=1, duration=60, **{weekday: False})
+        other = User.objects.create_user(email='other-today@example.com', password='testpassword')
+        Habits.objects.create(owner=other, place='Дом', time='06:00:00', action='Зарядка', periodicity=1, duration=5)
+        self.client.force_authenticate(user=self.user)
+
+    def agenda(self):
+        """
+        Возвращает id и признак выполнения привычек из повестки.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(habit['id'], habit['done']) for habit in response.data['habits']]
+
+    def test_agenda_for_weekday_in_time_order(self):
+        """
+        Повестка строится одним запросом, содержит только привычки на сегодняшний день недели
+        в порядке времени и затем читается из кеша.
+        """
+        with self.assertNumQueries(1):
+            self.assertEqual(self.agenda(), [(self.morning.pk, False), (self.evening.pk, False)])
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['date'], django_timezone.localdate().isoformat())
+        self.assertEqual(response.json()['habits'][0]['time'], '07:00:00')
+
+    def test_agenda_invalidated_on_changes(self):
+        """
+        Изменение и удаление привычки и отметка о выполнении сбрасывают закешированную повестку.
+        """
+        self.agenda()
+        data = {'place': 'Дом', 'time': '06:30:00', 'action': 'Чтение', 'is_nice': True, 'periodicity': 1,
+                'duration': 30, **{day: True for day in WEEKDAYS}}
+        response = self.client.put(reverse('habit:habits_update', args=[self.evening.pk]), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.agenda(), [(self.evening.pk, False), (self.morning.pk, False)])
+
+        self.client.post(reverse('habit:checkins_create'), {'habit': self.morning.pk}, format='json')
+        if get_redis() is not None:
+            flush_buffer()
+        self.assertEqual(self.agenda(), [(self.evening.pk, False), (self.morning.pk, True)])
+
+        self.client.delete(reverse('habit:habits_delete', args=[self.evening.pk]))
+        self.assertEqual(self.agenda(), [(self.morning.pk, True)])
+
+    def test_private_habit_changes_keep_public_feed_version(self):
+        """
+        Создание, изменение и удаление личной привычки не сбрасывают кеш ленты публичных привычек,
+        а публикация привычки и снятие ее с публикации — сбрасывают.
+        """
+        version = public_habits_version()
+        habit = Habits.objects.create(owner=self.user, place='Дом', time='10:00:00', action='Чтение',
+                                      periodicity=1, duration=30, is_public=False)
+        habit.place = 'Парк'
+        habit.save()
+        Habits.objects.only('pk', 'is_public').get(pk=habit.pk).save(update_fields=['place'])
+        self.assertEqual(public_habits_version(), version)
+
+        habit.is_public = True
+        habit.save()
+        self.assertEqual(public_habits_version(), version + 1)
+        habit.is_public = False
+        habit.save()
+        self.assertEqual(public_habits_version(), version + 2)
+
+        Habits.objects.get(pk=habit.pk).delete()
+        self.assertEqual(public_habits_version(), version + 2)
+
+
+class HabitsCalendarTests(APITestCase):
+    """
+    Тесты ленты iCalendar с привычками.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя с привычкой по понедельникам и средам раз в два дня.
+        """
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(email='calendar@example.com', password='testpassword')
+        self.habit = Habits.objects.create(
+            owner=self.user, place='Дом, кухня', time='08:30:00', action='Зарядка; ' + 'разминка ' * 10,
+            periodicity=2, duration=15, **{day: day in ('monday', 'wednesday') for day in WEEKDAYS}
+        )
+        self.client.force_authenticate(user=self.user)
+        self.feed_url = self.client.get(reverse('habit:habits_calendar')).data['url']
+        self.client.force_authenticate(user=None)
+
+    def test_feed_contains_recurring_events(self):
+        """
+        Лента доступна по токену без авторизации, привычка — событие с правилом повторения.
+        """
+        response = self.client.get(self.feed_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:habit-{self.habit.pk}@habits\r\n', body)
+        self.assertIn('RRULE:FREQ=DAILY;INTERVAL=2;BYDAY=MO,WE\r\n', body)
+        self.assertIn('T083000\r\nDURATION:PT15M\r\n', body)
+        self.assertIn(f'DTSTART;TZID={settings.TIME_ZONE}:', body)
+        self.assertIn(f'BEGIN:VTIMEZONE\r\nTZID:{settings.TIME_ZONE}\r\n', body)
+        self.assertLess(body.index('END:VTIMEZONE'), body.index('BEGIN:VEVENT'))
+        self.assertIn('LOCATION:Дом\\, кухня\r\n', body)
+        self.assertIn('SUMMARY:Зарядка\\; разминка', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+        response = self.client.get(self.feed_url.replace('.ics', 'x.ics'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_timezone_transitions(self):
+        """
+        VTIMEZONE содержит начальное смещение пояса и переходы на летнее и зимнее время.
+        """
+        lines = render_timezone('America/New_York', 2024, 2024).split('\r\n')
+        self.assertEqual(lines[:3], ['BEGIN:VTIMEZONE', 'TZID:America/New_York', 'BEGIN:STANDARD'])
+        self.assertEqual(lines.count('BEGIN:DAYLIGHT'), 1)
+        daylight = lines.index('BEGIN:DAYLIGHT')
+        self.assertEqual(lines[daylight + 1:daylight + 5], [
+            'DTSTART:20240310T020000', 'TZOFFSETFROM:-0500', 'TZOFFSETTO:-0400', 'TZNAME:EDT',
+        ])
+        self.assertIn('DTSTART:20241103T020000', lines)
+        self.assertEqual(render_timezone('UTC', 2024, 2030).count('TZOFFSETTO:+0000'), 1)
+
+    def test_feed_etag_changes_with_habits(self):
+        """
+        Повторный опрос с тем же ETag получает 304 без запросов к базе, изменение привычки меняет ETag.
+        """
+        etag = self.client.get(self.feed_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.habit.action = 'Бег'
+        self.habit.save()
+        response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('SUMMARY:Бег\r\n', response.content.decode())
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        Habits.objects.create(owner=self.user, place='Парк', time='07:00:00', action='Прогулка', duration=30)
+        self.habit.delete()
+        response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content.decode().count('BEGIN:VEVENT'), 1)
+
+
+class HabitsSyncTests(APITransactionTestCase):
+    """
+    Тесты синхронизации изменений привычек.
+
+    Изменения различаются по транзакциям, поэтому используется `APITransactionTestCase`:
+    каждый запрос выполняется в своей транзакции.
+    """
+
+    def setUp(self):
+        """
+        Создает две привычки пользователя и привычку другого пользователя.
+        """
+        self.url = reverse('habit:habits_sync')
+        self.user = User.objects.create_user(email='sync@example.com', password='testpassword')
+        self.kept, self.removed = (
+            Habits.objects.create(owner=self.user, place='Дом', time=f'0{hour}:00:00', action='Зарядка',
+                                  periodicity=1, duration=60)
+            for hour in (7, 8)
+        )
+        other = User.objects.create_user(email='other-sync@example.com', password='testpassword')
+        Habits.objects.create(owner=other, place='Парк', time='09:00:00', action='Бег', periodicity=1, duration=60)
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, since=None):
+        """
+        Выполняет синхронизацию и возвращает ответ.
+        """
+        response = self.client.get(self.url, {'since': since} if since else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_changes_since_token(self):
+        """
+        После полной выгрузки приходят только измененные и новые привычки и id удаленных.
+        """
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual([habit['id'] for habit in data['habits']], [self.kept.pk, self.removed.pk])
+
+        data = self.sync(data['token'])
+        self.assertEqual((data['full'], data['habits'], data['deleted']), (False, [], []))
+
+        token = data['token']
+        Habits.objects.filter(pk=self.kept.pk).update(action='Бег')
+        self.client.delete(reverse('habit:habits_delete', args=[self.removed.pk]))
+        added = Habits.objects.create(owner=self.user, place='Парк', time='10:00:00', action='Прогулка',
+                                      periodicity=1, duration=30)
+        data = self.sync(token)
+        self.assertEqual([(habit['id'], habit['action']) for habit in data['habits']],
+                         [(self.kept.pk, 'Бег'), (added.pk, 'Прогулка')])
+        self.assertEqual(data['deleted'], [self.removed.pk])
+        self.assertNotIn('sync_xid', data['habits'][0])
+
+    def test_expired_or_invalid_token(self):
+        """
+        Токен старше срока хранения отметок об удалении дает полный список, неверный токен — ошибку 400.
+        """
+        xmin = self.sync()['token'].split('.')[0]
+        expired = int(time_module.time()) - (settings.HABIT_TOMBSTONE_RETENTION_DAYS + 1) * 24 * 60 * 60
+        data = self.sync(f'{xmin}.{expired}')
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['habits']), 2)
+
+        response = self.client.get(self.url, {'since': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tombstones_purged_after_retention(self):
+        """
+        Каскадное удаление привычек записывает отметки об удалении, устаревшие отметки удаляются.
+        """
+        self.user.delete()
+        self.assertEqual(set(HabitTombstone.objects.values_list('habit_id', flat=True)),
+                         {self.kept.pk, self.removed.pk})
+        HabitTombstone.objects.filter(habit_id=self.kept.pk).update(
+            deleted_at=datetime.now(timezone.utc) - timedelta(days=settings.HABIT_TOMBSTONE_RETENTION_DAYS + 1)
+        )
+        self.assertEqual(purge_tombstones(), 1)
+        self.assertEqual(list(HabitTombstone.objects.values_list('habit_id', flat=True)), [self.removed.pk])
+
+
+class RenderersTests(APITestCase):
+    """
+    Тесты рендереров orjson и MessagePack.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя с привычкой.
+        """
+        self.user = User.objects.create_user(email='renderers@example.com', password='testpassword')
+        Habits.objects.create(owner=self.user, place='Дом', time='08:00:00', action='Зарядка', periodicity=1,
+                              duration=60)
+        self.client.force_authenticate(user=self.user)
+
+    def test_orjson_output_matches_json_renderer(self):
+        """
+        Дата, время, `Decimal`, ленивые строки и нестроковые ключи выводятся так же, как `JSONRenderer`.
+        """
+        data = {
+            'utc': datetime(2026, 10, 19, 8, 30, 15, 123456, tzinfo=timezone.utc),
+            'local': django_timezone.localtime(datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)),
+            'date': date(2026, 10, 19),
+            'time': time(8, 30),
+            'decimal': Decimal('1.50'),
+            'lazy': gettext_lazy('Пользователь'),
+            'text': 'Привет\u2028мир',
+            1: [timedelta(minutes=5), None, True, 2 ** 70],
+        }
+        for value in (data, {'nested': [data]}):
+            self.assertEqual(ORJSONRenderer().render(value, 'application/json', {}),
+                             JSONRenderer().render(value, 'application/json', {}))
+        self.assertEqual(ORJSONRenderer().render(data, 'application/json; indent=4', {}),
+                         JSONRenderer().render(data, 'application/json; indent=4', {}))
+
+    def test_msgpack_negotiation(self):
+        """
+        Клиент получает MessagePack по `Accept`, по умолчанию ответ остается в JSON.
+        """
+        url = reverse('habit:habits_list')
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        packed = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(packed.content), json.loads(response.content))
+
+    def test_invalid_json_rejected(self):
+        """
+        Неверный JSON в теле запроса дает ошибку 400 в формате DRF.
+        """
+        response = self.client.post(reverse('habit:checkins_create'), '{"habit": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(response.data['detail'].startswith('JSON parse error'))
+
+    def test_bench_renderers_command(self):
+        """
+        Команда сравнения рендереров выводит строку для каждого рендерера, тела orjson и JSON совпадают.
+        """
+        out, err = io.StringIO(), io.StringIO()
+        call_command('bench_renderers', size=[5], repeat=2, stdout=out, stderr=err)
+        self.assertEqual([line.split()[0] for line in out.getvalue().splitlines()[1:]], ['json', 'orjson', 'msgpack'])
+        self.assertEqual(err.getvalue(), '')
+
+
+class CompressionTests(APITestCase):
+    """
+    Тесты сжатия ответов и кеша ленты публичных привычек со сжатыми вариантами.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя с публичными привычками, чтобы страница ленты была больше порога сжатия.
+        """
+        self.addCleanup(cache.clear)
+        self.url = reverse('habit:public_list')
+        self.user = User.objects.create_user(email='compression@example.com', password='testpassword')
+        for hour in range(5):
+            Habits.objects.create(owner=self.user, place='Парк', time=f'1{hour}:00:00', action=f'Прогулка {hour}',
+                                  periodicity=1, duration=30, is_public=True)
+
+    def test_encoding_negotiated_above_threshold(self):
+        """
+        Ответ сжимается brotli или gzip по `Accept-Encoding`, ответы меньше порога не сжимаются.
+        """
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertGreater(len(plain.content), settings.COMPRESSION_MIN_SIZE)
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('habit:habits_today'), HTTP_ACCEPT_ENCODING='br')
+        self.assertLess(len(response.content), settings.COMPRESSION_MIN_SIZE)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_compressed_by_chunks(self):
+        """
+        Потоковая выгрузка сжимается по частям без заголовка `Content-Length`.
+        """
+        url = reverse('habit:public_export')
+        plain = b''.join(self.client.get(url, {'format': 'ndjson'}).streaming_content)
+        response = self.client.get(url, {'format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    async def test_async_streaming_response_compressed(self):
+        """
+        Под ASGI middleware работает в асинхронной цепочке и сжимает асинхронный поток выгрузки.
+        """
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(compression.CompressionMiddleware(get_response)))
+
+        url = reverse('habit:public_export')
+        plain = await sync_to_async(lambda: b''.join(self.client.get(url, {'format': 'ndjson'}).streaming_content))()
+        response = await self.async_client.get(url, {'format': 'ndjson'}, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response.is_async)
+        self.assertEqual(gzip.decompress(b''.join([chunk async for chunk in response.streaming_content])), plain)
+
+    def test_public_feed_cached_precompressed(self):
+        """
+        Повторный запрос ленты отдается из кеша без запросов к базе и без повторного сжатия;
+        изменение привычки сбрасывает кеш.
+        """
+        first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br')
+        with self.assertNumQueries(0), mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            cached = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br')
+        compress.assert_not_called()
+        self.assertEqual((cached['Content-Encoding'], cached.content), ('br', first.content))
+
+        Habits.objects.create(owner=self.user, place='Дом', time='07:00:00', action='Зарядка', periodicity=1,
+                              duration=5, is_public=True)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 6)
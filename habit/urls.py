@@ -1,8 +1,11 @@
 from django.urls import path
 
 from habit.apps import HabitConfig
+from habit.async_views import AsyncHabitsListView, AsyncHabitsRetrieveView, AsyncHabitsPublicListView
 from habit.views import HabitsListAPIView, HabitsRetrieveAPIView, HabitsCreateAPIView, HabitsUpdateAPIView, \
-    HabitsDestroyAPIView, HabitsPublicListAPIView
+    HabitsDestroyAPIView, HabitsPublicListAPIView, HabitsExportAPIView, HabitsPublicExportAPIView, \
+    HabitsImportAPIView, HabitsSyncAPIView, HabitsTodayAPIView, HabitsCalendarLinkAPIView, habits_calendar_feed, \
+    HabitsAnalyticsAPIView, CheckInCreateAPIView, TelegramWebhookAPIView
 
 app_name = HabitConfig.name
 
@@ -13,4 +16,18 @@ urlpatterns = [
     path("habits/update/<int:pk>/", HabitsUpdateAPIView.as_view(), name="habits_update"),
     path("habits/delete/<int:pk>/", HabitsDestroyAPIView.as_view(), name="habits_delete"),
     path("habits/public/", HabitsPublicListAPIView.as_view(), name="public_list"),
+    path("habits/export/", HabitsExportAPIView.as_view(), name="habits_export"),
+    path("habits/public/export/", HabitsPublicExportAPIView.as_view(), name="public_export"),
+    path("habits/import/", HabitsImportAPIView.as_view(), name="habits_import"),
+    path("habits/sync/", HabitsSyncAPIView.as_view(), name="habits_sync"),
+    path("habits/today/", HabitsTodayAPIView.as_view(), name="habits_today"),
+    path("habits/calendar/", HabitsCalendarLinkAPIView.as_view(), name="habits_calendar"),
+    path("habits/calendar/<str:token>.ics", habits_calendar_feed, name="habits_calendar_feed"),
+    path("habits/analytics/", HabitsAnalyticsAPIView.as_view(), name="habits_analytics"),
+    path("checkins/", CheckInCreateAPIView.as_view(), name="checkins_create"),
+    path("telegram/webhook/", TelegramWebhookAPIView.as_view(), name="telegram_webhook"),
+
+    path("habits/async/list/", AsyncHabitsListView.as_view(), name="habits_list_async"),
+    path("habits/async/<int:pk>/", AsyncHabitsRetrieveView.as_view(), name="habits_retrieve_async"),
+    path("habits/async/public/", AsyncHabitsPublicListView.as_view(), name="public_list_async"),
 ]
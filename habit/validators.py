@@ -13,6 +13,9 @@ class HabitsPeriodicValidator:
     Аргументы:
         field (str): Имя поля, которое будет проверяться.
        """
+    required_message = "Периодичность должна быть указана."
+    range_message = "Периодичность должна быть от 1 до 7 дней."
+
     def __init__(self, field):
         self.field = field
 
@@ -32,9 +35,27 @@ class HabitsPeriodicValidator:
         """
         periodicity = data.get(self.field)
         if periodicity is None:
-            raise serializers.ValidationError("Периодичность должна быть указана.")
+            raise serializers.ValidationError(self.required_message)
         if periodicity < 1 or periodicity > 7:
-            raise serializers.ValidationError("Периодичность должна быть от 1 до 7 дней.")
+            raise serializers.ValidationError(self.range_message)
+
+    def validate_many(self, rows):
+        """
+        Проверяет значения периодичности сразу для пакета строк.
+
+        Аргументы:
+            rows (list): Список словарей с данными привычек.
+
+        Возвращает:
+            dict: Сообщения об ошибках по индексам строк, не прошедших проверку.
+        """
+        values = [row.get(self.field) for row in rows]
+        errors = {index: self.required_message for index, value in enumerate(values) if value is None}
+        errors.update({
+            index: self.range_message
+            for index, value in enumerate(values) if value is not None and (value < 1 or value > 7)
+        })
+        return errors
 
 
 class HabitsDurationValidator:
@@ -49,6 +70,9 @@ class HabitsDurationValidator:
     Аргументы:
         field (str): Имя поля, которое будет проверяться.
     """
+    required_message = "Длительность должна быть указана."
+    max_message = "Длительность не может превышать 120 секунд."
+
     def __init__(self, field):
         self.field = field
 
@@ -66,6 +90,21 @@ class HabitsDurationValidator:
         """
         duration = data.get(self.field)
         if duration is None:
-            raise serializers.ValidationError("Длительность должна быть указана.")
+            raise serializers.ValidationError(self.required_message)
         if duration > 120:
-            raise serializers.ValidationError("Длительность не может превышать 120 секунд.")
+            raise serializers.ValidationError(self.max_message)
+
+    def validate_many(self, rows):
+        """
+        Проверяет значения длительности сразу для пакета строк.
+
+        Аргументы:
+            rows (list): Список словарей с данными привычек.
+
+        Возвращает:
+            dict: Сообщения об ошибках по индексам строк, не прошедших проверку.
+        """
+        values = [row.get(self.field) for row in rows]
+        errors = {index: self.required_message for index, value in enumerate(values) if value is None}
+        errors.update({index: self.max_message for index, value in enumerate(values) if value is not None and value > 120})
+        return errors
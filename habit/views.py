@@ -1,15 +1,40 @@
-from rest_framework import generics
+import hmac
+
+from rest_framework import exceptions, generics, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from habit.models import Habits
-from habit.paginators import CustomPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from habit.agenda import cached_today_agenda
+from habit.analytics import cached_habit_analytics
+from habit.cache import public_habits_version
+from habit.calendar import cached_calendar, calendar_token, user_id_from_token
+from habit.checkins import parse_checkins, record_checkins, to_micros
+from habit.exports import STREAMS, aiter_stream
+from habit.filters import filter_habits
+from habit.imports import import_habits
+from habit.models import CheckIn, Habits
+from habit.paginators import CustomPagination, SearchKeysetPagination
+from habit.parsers import NDJSONParser, CSVParser
 from habit.permissions import IsOwner
+from habit.search import search_habits
+from habit.renderers import NDJSONRenderer, CSVRenderer
 from habit.serializers import HabitSerializer
 from habit.services import create_periodic_task, disable_periodic_task
+from habit.sync import habit_changes
+from habit.tasks import CHECKIN_CALLBACK_PREFIX
+from config.compression import PrecompressedCacheMixin
+from config.replicas import ReplicaReadsMixin
+from config.throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
 from django.shortcuts import render
+from django.utils import timezone
 
 import os
 import subprocess
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
 from django.conf import settings
 
 
@@ -65,9 +90,7 @@ class HabitsCreateAPIView(generics.CreateAPIView):
         Параметры:
             serializer (HabitSerializer): Сериализатор с валидированными данными привычки.
         """
-        habit = serializer.save()
-        habit.owner = self.request.user
-        habit.save()
+        habit = serializer.save(owner=self.request.user)
 
         hour = habit.time.hour
         minute = habit.time.minute
@@ -85,7 +108,7 @@ class HabitsCreateAPIView(generics.CreateAPIView):
         )
 
 
-class HabitsListAPIView(generics.ListAPIView):
+class HabitsListAPIView(ReplicaReadsMixin, generics.ListAPIView):
     """
     Получение списка привычек авторизованного пользователя.
 
@@ -98,10 +121,15 @@ class HabitsListAPIView(generics.ListAPIView):
     **Параметры запроса:**
 
     - `page` - Номер страницы для пагинации.
+    - `day` - День недели: `mon`, `tue`, `wed`, `thu`, `fri`, `sat`, `sun`.
+    - `time_from`, `time_to` - Интервал времени выполнения (`hh:mm[:ss]`), может переходить через полночь.
+    - `is_nice` - `true` / `false`: только приятные или только полезные привычки.
+    - `has_related` - `true` / `false`: только привычки со связанной привычкой или без нее.
 
     **Ответ:**
 
     - **Код 200** - Успешный запрос. Возвращает список привычек текущего пользователя.
+    - **Код 400** - Некорректное значение фильтра.
 
     **Формат ответа:**
 
@@ -132,6 +160,8 @@ class HabitsListAPIView(generics.ListAPIView):
     ```
 
     **Пагинация:** 5 привычек на странице.
+
+    **Чтение:** из реплик базы данных, если они настроены (`ReplicaReadsMixin`).
     """
 
     serializer_class = HabitSerializer
@@ -140,15 +170,15 @@ class HabitsListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         """
-        Возвращает набор данных привычек для текущего пользователя.
+        Возвращает набор данных привычек для текущего пользователя с учетом фильтров запроса.
 
         Возвращает:
             QuerySet: Набор привычек, принадлежащих текущему пользователю.
         """
-        return Habits.objects.filter(owner=self.request.user)
+        return filter_habits(Habits.objects.filter(owner=self.request.user), self.request.query_params)
 
 
-class HabitsRetrieveAPIView(generics.RetrieveAPIView):
+class HabitsRetrieveAPIView(ReplicaReadsMixin, generics.RetrieveAPIView):
     """
     Просмотр деталей выбранной привычки пользователя.
 
@@ -162,6 +192,8 @@ class HabitsRetrieveAPIView(generics.RetrieveAPIView):
 
     - **Код 200** - Успешный запрос. Возвращает данные о привычке.
     - **Код 404** - Привычка не найдена.
+
+    **Чтение:** из реплик базы данных, если они настроены (`ReplicaReadsMixin`).
     """
 
     serializer_class = HabitSerializer
@@ -248,7 +280,7 @@ class HabitsDestroyAPIView(generics.DestroyAPIView):
         super().perform_destroy(instance)
 
 
-class HabitsPublicListAPIView(generics.ListAPIView):
+class HabitsPublicListAPIView(PrecompressedCacheMixin, ReplicaReadsMixin, generics.ListAPIView):
     """
     Получение списка публичных привычек.
 
@@ -261,19 +293,141 @@ class HabitsPublicListAPIView(generics.ListAPIView):
     **Параметры запроса:**
 
     - `page` - Номер страницы для пагинации.
+    - `q` - Строка полнотекстового поиска по действию и месту. Слова ищутся по префиксу,
+      результаты упорядочены по релевантности.
+    - `cursor` - Курсор следующей страницы результатов поиска (из ссылки `next`).
 
     **Ответ:**
 
     - **Код 200** - Успешный запрос. Возвращает список публичных привычек.
 
-    **Формат ответа:** (аналогично `HabitsListAPIView`)
+    - **Код 429** - Превышена частота запросов с IP-адреса или от пользователя.
 
-    **Пагинация:** 5 привычек на странице.
+    **Формат ответа:** (аналогично `HabitsListAPIView`). При поиске ответ содержит только `next` и `results`.
+
+    **Пагинация:** 5 привычек на странице. Результаты поиска разбиваются по курсору (`SearchKeysetPagination`).
+
+    **Ограничение частоты:** `public_feed_ip` и `public_feed_user` (token bucket в Redis).
+
+    **Чтение:** из реплик базы данных, если они настроены (`ReplicaReadsMixin`).
+
+    **Кеширование:** страницы кешируются вместе со сжатыми вариантами тела (`PrecompressedCacheMixin`)
+    на `PUBLIC_FEED_CACHE_TIMEOUT` секунд или до изменения любой привычки.
     """
 
     serializer_class = HabitSerializer
     permission_classes = (AllowAny,)
     pagination_class = CustomPagination
+    throttle_classes = (IPTokenBucketThrottle, UserTokenBucketThrottle)
+    throttle_scope = "public_feed"
+
+    def get_response_cache_timeout(self):
+        return settings.PUBLIC_FEED_CACHE_TIMEOUT
+
+    def get_response_cache_version(self):
+        return public_habits_version()
+
+    @property
+    def search_text(self):
+        """
+        Строка поиска из параметра запроса `q`.
+        """
+        return getattr(self.request, "query_params", {}).get("q", "").strip()
+
+    @property
+    def paginator(self):
+        """
+        Для результатов поиска использует пагинацию по ключу вместо постраничной.
+        """
+        if not hasattr(self, "_paginator"):
+            self._paginator = SearchKeysetPagination() if self.search_text else self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        """
+        Возвращает набор публичных привычек.
+
+        Если передан параметр `q`, возвращает только найденные привычки в порядке релевантности.
+
+        Возвращает:
+            QuerySet: Набор публичных привычек.
+        """
+        queryset = Habits.objects.filter(is_public=True)
+        if self.search_text:
+            queryset = search_habits(queryset, self.search_text)
+        return queryset
+
+
+class HabitsExportAPIView(generics.GenericAPIView):
+    """
+    Потоковая выгрузка всех привычек авторизованного пользователя.
+
+    **URL:** `habit/habits/export/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Требуется аутентификация пользователя.
+
+    **Параметры запроса:**
+
+    - `format` - Формат выгрузки: `ndjson` (по умолчанию) или `csv`.
+
+    **Ответ:**
+
+    - **Код 200** - Файл выгрузки. Строки передаются по мере чтения из базы данных через серверный курсор,
+      поэтому потребление памяти не зависит от количества привычек (под ASGI — через асинхронный итератор).
+
+    **Формат строки:** поля совпадают с `HabitsListAPIView`.
+    """
+
+    serializer_class = HabitSerializer
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    filename = "habits"
+
+    def get_queryset(self):
+        """
+        Возвращает набор данных привычек для текущего пользователя.
+
+        Возвращает:
+            QuerySet: Набор привычек, принадлежащих текущему пользователю.
+        """
+        return Habits.objects.filter(owner=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Возвращает `StreamingHttpResponse` с выгрузкой в выбранном формате.
+        """
+        renderer = request.accepted_renderer
+        stream = STREAMS[renderer.format](self.get_queryset())
+        if isinstance(request._request, ASGIRequest):
+            stream = aiter_stream(stream)
+        response = StreamingHttpResponse(stream, content_type=f"{renderer.media_type}; charset={renderer.charset}")
+        response["Content-Disposition"] = f'attachment; filename="{self.filename}.{renderer.format}"'
+        return response
+
+
+class HabitsPublicExportAPIView(HabitsExportAPIView):
+    """
+    Потоковая выгрузка каталога публичных привычек.
+
+    **URL:** `habit/habits/public/export/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Открыто для всех.
+
+    **Параметры запроса и ответ:** аналогично `HabitsExportAPIView`.
+
+    - **Код 429** - Превышена частота выгрузок с IP-адреса или от пользователя.
+
+    **Ограничение частоты:** `public_export_ip` и `public_export_user` (token bucket в Redis).
+    """
+
+    permission_classes = (AllowAny,)
+    throttle_classes = (IPTokenBucketThrottle, UserTokenBucketThrottle)
+    throttle_scope = "public_export"
+    filename = "public_habits"
 
     def get_queryset(self):
         """
@@ -285,6 +439,307 @@ class HabitsPublicListAPIView(generics.ListAPIView):
         return Habits.objects.filter(is_public=True)
 
 
+class HabitsImportAPIView(generics.GenericAPIView):
+    """
+    Массовый импорт привычек авторизованного пользователя.
+
+    **URL:** `habit/habits/import/`
+
+    **Метод:** `POST`
+
+    **Авторизация:** Требуется аутентификация пользователя.
+
+    **Тело запроса:** файл в формате NDJSON (`Content-Type: application/x-ndjson`) или CSV
+    (`Content-Type: text/csv`) с полями, как в `HabitsCreateAPIView`. Выгрузка из `HabitsExportAPIView`
+    принимается без изменений: поля `id`, `owner`, `created_at` и `updated_at` игнорируются.
+
+    **Ответ:**
+
+    - **Код 200** - Импорт выполнен. Возвращает отчет:
+
+    ```json
+    {
+        "created": 998,
+        "error_count": 2,
+        "errors": [
+            {"row": 5, "errors": {"duration": ["Требуется целое число."]}},
+            {"row": 17, "errors": {"non_field_errors": ["Периодичность должна быть от 1 до 7 дней."]}}
+        ]
+    }
+    ```
+
+    - **Код 415** - Неподдерживаемый формат тела запроса.
+
+    **Примечание:** Тело запроса читается потоком и проверяется пакетами, корректные строки вставляются
+    через `bulk_create`. Периодические задачи для импортированных привычек не создаются.
+    """
+
+    serializer_class = HabitSerializer
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (NDJSONParser, CSVParser)
+
+    def post(self, request, *args, **kwargs):
+        """
+        Импортирует привычки из тела запроса и возвращает отчет.
+        """
+        return Response(import_habits(request.data, request.user))
+
+
+class HabitsSyncAPIView(APIView):
+    """
+    Изменения привычек авторизованного пользователя с предыдущей синхронизации.
+
+    **URL:** `habit/habits/sync/?since=<токен>`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Требуется аутентификация пользователя.
+
+    **Параметры запроса:**
+
+    - `since` - Токен из предыдущего ответа. Без него возвращаются все привычки.
+
+    **Ответ:**
+
+    - **Код 200** - Новый токен, привычки, созданные или измененные после выдачи `since`, и id удаленных привычек.
+      Если `full` равно `true` (нет токена или он старше `HABIT_TOMBSTONE_RETENTION_DAYS` дней), `habits` —
+      полный список, и клиент заменяет им свой.
+
+    ```json
+    {"token": "48213.1792396800", "full": false, "habits": [{"id": 1, ...}], "deleted": [7, 9]}
+    ```
+
+    - **Код 400** - Неверный токен.
+
+    **Примечание:** Привычки могут прийти повторно, клиент применяет изменения по `id`.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        changes = habit_changes(request.user, request.query_params.get("since"))
+        changes["habits"] = HabitSerializer(changes["habits"], many=True).data
+        return Response(changes)
+
+
+class HabitsTodayAPIView(APIView):
+    """
+    Привычки авторизованного пользователя на сегодня.
+
+    **URL:** `habit/habits/today/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Требуется аутентификация пользователя.
+
+    **Ответ:**
+
+    - **Код 200** - Привычки, запланированные на сегодняшний день недели, в порядке времени выполнения;
+      `done` — есть ли сегодня отметка о выполнении.
+
+    ```json
+    {
+        "date": "2026-10-19",
+        "habits": [{"id": 1, "time": "08:00:00", "action": "Зарядка", "place": "Дом", "duration": 60,
+                    "is_nice": false, "done": true}]
+    }
+    ```
+
+    **Примечание:** Повестка кешируется на день и сбрасывается при создании, изменении и удалении привычек
+    пользователя и при записи его отметок.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(cached_today_agenda(request.user))
+
+
+class HabitsCalendarLinkAPIView(APIView):
+    """
+    Ссылка на ленту iCalendar с привычками авторизованного пользователя.
+
+    **URL:** `habit/habits/calendar/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Требуется аутентификация пользователя.
+
+    **Ответ:**
+
+    - **Код 200** - Адрес ленты с токеном пользователя для подписки в приложении календаря:
+      `{"url": "https://example.com/habit/habits/calendar/1:abc.ics"}`.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        path = reverse("habit:habits_calendar_feed", args=[calendar_token(request.user.pk)])
+        return Response({"url": request.build_absolute_uri(path)})
+
+
+class HabitsAnalyticsAPIView(APIView):
+    """
+    Серии и доли выполнения привычек авторизованного пользователя.
+
+    **URL:** `habit/habits/analytics/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Требуется аутентификация пользователя.
+
+    **Ответ:**
+
+    - **Код 200** - Доли выполнения за `HABIT_ANALYTICS_WEEKS` недель и за последние 30 дней (`null`, если
+      запланированных дней не было), текущая и самая длинная серия по каждой привычке и тепловая карта:
+      количество выполненных и запланированных привычек по дням, по неделям с понедельника `heatmap.start`.
+
+    ```json
+    {
+        "date": "2026-10-19",
+        "completion_rate": 0.8,
+        "completion_rate_30d": 0.9,
+        "habits": [{"id": 1, "action": "Зарядка", "current_streak": 5, "longest_streak": 12,
+                    "completed": 40, "scheduled": 50, "completion_rate": 0.8, "completion_rate_30d": 0.9}],
+        "heatmap": {"start": "2025-10-27", "completed": [[1, 1, 0, 1, 1, 0, 0], ...],
+                    "scheduled": [[1, 1, 1, 1, 1, 0, 0], ...]}
+    }
+    ```
+
+    **Примечание:** Результат кешируется до следующей отметки или изменения привычек пользователя.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(cached_habit_analytics(request.user))
+
+
+class CheckInCreateAPIView(APIView):
+    """
+    Отметка о выполнении привычек авторизованного пользователя.
+
+    **URL:** `habit/checkins/`
+
+    **Метод:** `POST`
+
+    **Авторизация:** Требуется аутентификация пользователя.
+
+    **Тело запроса:** одна отметка или список до `CHECKIN_MAX_BATCH` отметок. Без `checked_at`
+    используется время запроса.
+
+    ```json
+    [
+        {"habit": 1, "checked_at": "2026-10-19T08:05:00+03:00"},
+        {"habit": 2}
+    ]
+    ```
+
+    **Ответ:**
+
+    - **Код 202** - Отметки приняты: `{"accepted": 2}`.
+    - **Код 400** - Ошибки по индексам отметок: `{"errors": [{"index": 1, "errors": ["Привычка не найдена."]}]}`.
+      Если хотя бы одна отметка неверна, пакет не записывается.
+
+    **Примечание:** Отметки добавляются в буфер Redis и записываются в журнал пакетами
+    (`habit.tasks.flush_checkins`), поэтому появляются в нем с задержкой до `CHECKIN_FLUSH_INTERVAL` секунд.
+    Повторная отметка привычки с тем же временем не создает новую запись.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        rows, errors = parse_checkins(request.data, request.user)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        record_checkins(rows, CheckIn.SOURCE_API)
+        return Response({"accepted": len(rows)}, status=status.HTTP_202_ACCEPTED)
+
+
+class TelegramWebhookAPIView(APIView):
+    """
+    Вебхук Telegram для кнопки «Выполнено» в напоминаниях о привычках.
+
+    **URL:** `habit/telegram/webhook/`
+
+    **Метод:** `POST`
+
+    **Авторизация:** Заголовок `X-Telegram-Bot-Api-Secret-Token` должен совпадать с `TELEGRAM_WEBHOOK_SECRET`.
+
+    **Тело запроса:** обновление Telegram (`Update`) с `callback_query`, данные кнопки — `checkin:<id привычки>`.
+    Пользователь определяется по чату (`User.telegram_chat_id`).
+
+    **Ответ:**
+
+    - **Код 200** - Вызов `answerCallbackQuery` в теле ответа: Telegram показывает пользователю результат
+      без отдельного запроса к Bot API. Прочие обновления подтверждаются пустым ответом.
+    - **Код 403** - Неверный секретный токен или вебхук не настроен.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def post(self, request, *args, **kwargs):
+        secret = settings.TELEGRAM_WEBHOOK_SECRET
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not secret or not hmac.compare_digest(token, secret):
+            raise exceptions.PermissionDenied()
+
+        callback = request.data.get("callback_query") if isinstance(request.data, dict) else None
+        if not callback or not str(callback.get("data", "")).startswith(CHECKIN_CALLBACK_PREFIX):
+            return Response({})
+
+        return Response({
+            "method": "answerCallbackQuery",
+            "callback_query_id": callback.get("id"),
+            "text": self.check_in(callback),
+        })
+
+    def check_in(self, callback):
+        """
+        Отмечает выполнение привычки из нажатой кнопки и возвращает текст ответа пользователю.
+        """
+        chat_id = (callback.get("message") or {}).get("chat", {}).get("id") or callback.get("from", {}).get("id")
+        habit_id = callback["data"][len(CHECKIN_CALLBACK_PREFIX):]
+        habit = Habits.objects.filter(
+            pk=habit_id, owner__telegram_chat_id=str(chat_id)
+        ).only("pk", "action").first() if habit_id.isdigit() and chat_id else None
+        if habit is None:
+            return "Привычка не найдена."
+        record_checkins([(habit.pk, to_micros(timezone.now()))], CheckIn.SOURCE_TELEGRAM)
+        return f"Отмечено: {habit.action}"
+
+
+@require_safe
+def habits_calendar_feed(request, token):
+    """
+    Лента iCalendar с привычками пользователя: каждая привычка — повторяющееся событие (`RRULE`)
+    по дням недели и периодичности.
+
+    **URL:** `habit/habits/calendar/<токен>.ics`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Токен из `habit/habits/calendar/` в адресе: приложения календаря не передают JWT.
+
+    **Ответ:**
+
+    - **Код 200** - Лента `text/calendar` с заголовком `ETag`.
+    - **Код 304** - Лента не изменилась с версии из `If-None-Match`.
+    - **Код 404** - Неверный токен.
+
+    **Примечание:** Лента и ее ETag кешируются до изменения привычек пользователя, поэтому повторный
+    опрос стоит одного обращения к кешу без запросов к базе данных.
+    """
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        raise Http404
+    etag, body = cached_calendar(user_id)
+    response = HttpResponse(body, content_type="text/calendar; charset=utf-8")
+    response["ETag"] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
 def home(request):
     """
     Главная страница проекта.
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from monitoring.models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ["pk", "duration", "shape", "call_site", "created_at"]
+    list_filter = ["database"]
+    readonly_fields = ["shape", "shape_hash", "sql", "duration", "plan", "call_site", "database", "created_at"]
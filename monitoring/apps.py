@@ -0,0 +1,24 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        if settings.METRICS_ENABLED:
+            import monitoring.signals  # noqa: F401
+        if settings.NPLUSONE_ENABLED:
+            from monitoring.nplusone import connect_celery_signals
+            connect_celery_signals()
+        if settings.TASK_PROFILING_ENABLED:
+            from monitoring.task_profiler import connect_celery_signals as connect_task_profiler
+            connect_task_profiler()
+        if settings.SLOW_QUERY_ENABLED:
+            from django.db.backends.signals import connection_created
+            from monitoring.slow_queries import install_sampler
+            connection_created.connect(install_sampler, weak=False)
+        if settings.PROFILING_ENABLED:
+            from monitoring.profiling import install_instrumentation
+            install_instrumentation()
@@ -0,0 +1,40 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from monitoring.metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class MetricsCacheMixin:
+    """
+    Подсчет попаданий и промахов кеша для метрики `cache_requests_total`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hits = CACHE_REQUESTS.labels(type(self).__name__, "hit")
+        self.misses = CACHE_REQUESTS.labels(type(self).__name__, "miss")
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self.misses.inc()
+            return default
+        self.hits.inc()
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        self.hits.inc(len(values))
+        self.misses.inc(len(keys) - len(values))
+        return values
+
+
+class InstrumentedRedisCache(MetricsCacheMixin, RedisCache):
+    pass
+
+
+class InstrumentedLocMemCache(MetricsCacheMixin, LocMemCache):
+    pass
@@ -0,0 +1,21 @@
+from django.db import connections
+
+
+class ExecuteWrappers:
+    """
+    Подключает обертку выполнения SQL ко всем уже открытым и новым соединениям текущего потока.
+    """
+
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+        self.contexts = []
+
+    def __enter__(self):
+        for connection in connections.all():
+            context = connection.execute_wrapper(self.wrapper)
+            context.__enter__()
+            self.contexts.append(context)
+
+    def __exit__(self, *exc_info):
+        for context in reversed(self.contexts):
+            context.__exit__(*exc_info)
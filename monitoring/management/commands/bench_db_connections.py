@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает стоимость соединения с базой на запрос без пула, с постоянным соединением и с пулом.
+
+    Каждый запрос моделируется так же, как его обрабатывает Django: `close_old_connections` при начале
+    и завершении запроса и один запрос `SELECT 1` между ними. Разница времени с режимом без пула —
+    стоимость установки соединения.
+    """
+
+    help = 'Сравнить стоимость соединения с базой на запрос без пула, с постоянным соединением и с пулом'
+
+    modes = (
+        ('без пула', {'CONN_MAX_AGE': 0}),
+        ('постоянное', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}),
+        ('пул', {'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'min_size': 1, 'max_size': 4}}}),
+        ('пул с проверкой', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True,
+                             'OPTIONS': {'pool': {'min_size': 1, 'max_size': 4}}}),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Количество запросов в каждом режиме')
+        parser.add_argument('--database', default='default', help='Псевдоним базы данных')
+
+    def handle(self, *args, **options):
+        source = connections[options['database']]
+        options_without_pool = {k: v for k, v in source.settings_dict['OPTIONS'].items() if k != 'pool'}
+
+        self.stdout.write(f"{'режим':<18}{'среднее, мс':>13}{'p50, мс':>10}{'p95, мс':>10}{'соединений':>12}")
+        means = {}
+        for index, (name, overrides) in enumerate(self.modes):
+            settings_dict = {
+                **source.settings_dict,
+                'CONN_HEALTH_CHECKS': False,
+                **overrides,
+                'OPTIONS': {**options_without_pool, **overrides.get('OPTIONS', {})},
+            }
+            # Отдельный псевдоним, чтобы не задеть пул и соединение основной базы
+            alias = f"bench_{index}"
+            wrapper = connections[alias] = source.__class__(settings_dict, alias=alias)
+            try:
+                stats = self.measure(wrapper, options['requests'])
+            finally:
+                wrapper.close()
+                if wrapper.pool:
+                    wrapper.close_pool()
+                del connections[alias]
+
+            means[name] = stats['mean']
+            self.stdout.write(
+                f"{name:<18}{stats['mean']:>13.3f}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['connections']:>12}"
+            )
+        self.stdout.write(f"Установка соединения на запрос: {means['без пула'] - means['пул']:.3f} мс")
+
+    def measure(self, wrapper, total):
+        """
+        Выполняет `total` циклов запроса и возвращает задержки и количество установленных соединений.
+        """
+        opened = 0
+
+        def count(sender, connection, **kwargs):
+            nonlocal opened
+            if connection is wrapper:
+                opened += 1
+
+        connection_created.connect(count)
+        latencies = []
+        try:
+            for _ in range(total):
+                started = time.perf_counter()
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                wrapper.close_if_unusable_or_obsolete()
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(count)
+
+        if wrapper.pool:
+            # Для пула connection_created срабатывает при каждой выдаче соединения
+            opened = wrapper.pool.get_stats().get('connections_num', 0)
+        latencies.sort()
+        return {
+            'mean': statistics.mean(latencies),
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'connections': opened,
+        }
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, Max, Sum
+
+from monitoring.models import SlowQuery
+
+
+class Command(BaseCommand):
+    """
+    Выводит формы запросов с наибольшим суммарным временем среди сохраненных медленных запросов.
+
+    С параметром `--plan <id>` выводит запрос и план выполнения одной записи.
+    """
+
+    help = "Список самых медленных форм SQL-запросов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10, help="Количество форм запросов")
+        parser.add_argument("--plan", type=int, help="Вывести план выполнения записи с указанным id")
+
+    def handle(self, *args, **options):
+        if options["plan"]:
+            try:
+                slow_query = SlowQuery.objects.get(pk=options["plan"])
+            except SlowQuery.DoesNotExist:
+                raise CommandError(f"Медленный запрос {options['plan']} не найден")
+            self.stdout.write(f"{slow_query.duration:.1f} мс, {slow_query.call_site}\n{slow_query.sql}\n")
+            self.stdout.write(json.dumps(slow_query.plan, indent=2, ensure_ascii=False))
+            return
+
+        offenders = (
+            SlowQuery.objects.values("shape_hash")
+            .annotate(count=Count("id"), total=Sum("duration"), avg=Avg("duration"), max=Max("duration"),
+                      last_id=Max("id"))
+            .order_by("-total")[:options["limit"]]
+        )
+        latest = SlowQuery.objects.in_bulk([offender["last_id"] for offender in offenders])
+        for offender in offenders:
+            example = latest[offender["last_id"]]
+            self.stdout.write(
+                f"[{offender['last_id']}] всего {offender['total']:.1f} мс, среднее {offender['avg']:.1f} мс, "
+                f"максимум {offender['max']:.1f} мс, записей {offender['count']}, {example.call_site}\n"
+                f"    {example.shape[:300]}"
+            )
@@ -0,0 +1,45 @@
+from collections import Counter
+from pathlib import Path
+
+import pstats
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.task_profiler import profile_files
+
+
+class Command(BaseCommand):
+    """
+    Выводит функции с наибольшим временем по профилям задачи Celery, объединенным по всем процессам воркера.
+
+    Без имени задачи выводит список задач, для которых есть профили.
+    """
+
+    help = "Самые затратные функции задачи Celery по данным профилирования"
+
+    def add_arguments(self, parser):
+        parser.add_argument("task", nargs="?", help="Имя задачи, например habit.tasks.send_telegram_message")
+        parser.add_argument("--limit", type=int, default=20, help="Количество функций")
+        parser.add_argument("--sort", default="cumulative", choices=("cumulative", "tottime", "ncalls"),
+                            help="Сортировка функций")
+        parser.add_argument("--clear", action="store_true", help="Удалить профили задачи")
+
+    def handle(self, *args, **options):
+        task = options["task"]
+        if not task:
+            tasks = Counter(path.name.rsplit(".", 2)[0] for path in Path(settings.TASK_PROFILING_DIR).glob("*.prof"))
+            for name, processes in sorted(tasks.items()):
+                self.stdout.write(f"{name} (процессов: {processes})")
+            return
+
+        files = profile_files(task)
+        if not files:
+            raise CommandError(f"Профили задачи {task} не найдены в {settings.TASK_PROFILING_DIR}")
+        if options["clear"]:
+            for path in files:
+                path.unlink()
+            self.stdout.write(self.style.SUCCESS(f"Удалено профилей: {len(files)}"))
+            return
+
+        stats = pstats.Stats(*map(str, files), stream=self.stdout)
+        stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
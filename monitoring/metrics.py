@@ -0,0 +1,69 @@
+import os
+from functools import lru_cache
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, \
+    multiprocess
+
+# Границы корзин гистограмм длительности, секунд
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса",
+    ["method", "view", "status"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter("db_queries_total", "Количество SQL-запросов", ["alias"])
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "Количество SQL-запросов, завершившихся ошибкой", ["alias"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Обращения к кешу Django", ["cache", "result"])
+TASK_RUNTIME = Histogram("celery_task_runtime_seconds", "Время выполнения задачи Celery", ["task"],
+                         buckets=TASK_BUCKETS)
+TASK_QUEUE_WAIT = Histogram("celery_task_queue_wait_seconds", "Время ожидания задачи Celery в очереди", ["task"],
+                            buckets=TASK_BUCKETS)
+TASK_FAILURES = Counter("celery_task_failures_total", "Количество задач Celery, завершившихся ошибкой", ["task"])
+
+
+@lru_cache
+def query_counter(alias):
+    """
+    Возвращает обертку выполнения SQL (`connection.execute_wrapper`), считающую запросы соединения.
+
+    Для одного псевдонима базы данных возвращается одна и та же обертка.
+    """
+    queries = DB_QUERIES.labels(alias)
+    errors = DB_QUERY_ERRORS.labels(alias)
+
+    def wrapper(execute, sql, params, many, context):
+        queries.inc()
+        try:
+            return execute(sql, params, many, context)
+        except Exception:
+            errors.inc()
+            raise
+    return wrapper
+
+
+def observe_request(request, response, duration):
+    """
+    Добавляет время обработки запроса в гистограмму по имени URL.
+
+    Запросы, не сопоставленные ни одному URL, учитываются с именем `unresolved`, чтобы количество
+    значений метки не зависело от запрашиваемых адресов.
+    """
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match else "unresolved"
+    REQUEST_LATENCY.labels(request.method, view, str(response.status_code)).observe(duration)
+
+
+def render_metrics():
+    """
+    Возвращает метрики в текстовом формате Prometheus и тип содержимого.
+
+    Если задана переменная окружения `PROMETHEUS_MULTIPROC_DIR`, метрики собираются из файлов всех
+    процессов (веб-процессов и воркеров Celery), которые используют этот каталог.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,103 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from monitoring.db import ExecuteWrappers
+from monitoring.metrics import observe_request
+from monitoring.nplusone import detect_n_plus_one
+from monitoring.profiling import Profile, current_profile, query_timer, ring_buffer
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запросов с заголовком `Server-Timing`.
+
+    Для каждого запроса замеряет количество и время SQL-запросов, время аутентификации, сериализации,
+    рендеринга, работы представления и общее время обработки. Замеры возвращаются в заголовке
+    `Server-Timing` и с вероятностью `PROFILING_SAMPLE_RATE` сохраняются в кольцевой буфер,
+    который читает эндпоинт `monitoring:profiles`.
+
+    Включается настройкой `PROFILING_ENABLED`. При выключенном профилировании middleware исключается
+    из цепочки при запуске (`MiddlewareNotUsed`) и не добавляет накладных расходов.
+    Должен стоять первым в `MIDDLEWARE`, чтобы `total` включал остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = Profile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExecuteWrappers(query_timer):
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        profile.add("total", time.perf_counter() - start)
+
+        response["Server-Timing"] = profile.server_timing()
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            ring_buffer.append({
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "timestamp": time.time(),
+                **profile.as_dict(),
+            })
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Запись времени обработки запросов в гистограмму `http_request_duration_seconds` по имени URL.
+
+    Поддерживает синхронный и асинхронный режимы, поэтому под ASGI не переводит обработку запроса в поток.
+    Включается настройкой `METRICS_ENABLED`, при выключенных метриках исключается из цепочки middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start)
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+    Поиск проблем N+1 в HTTP-запросах для разработки и тестовых стендов.
+
+    Включается настройкой `NPLUSONE_ENABLED`, при выключенной проверке исключается из цепочки middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_n_plus_one(f"{request.method} {request.path}"):
+            return self.get_response(request)
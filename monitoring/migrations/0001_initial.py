@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shape', models.TextField(verbose_name='Форма запроса')),
+                ('shape_hash', models.CharField(db_index=True, max_length=32, verbose_name='Хэш формы запроса')),
+                ('sql', models.TextField(verbose_name='Запрос')),
+                ('duration', models.FloatField(verbose_name='Время выполнения, мс')),
+                ('plan', models.JSONField(verbose_name='План выполнения')),
+                ('call_site', models.CharField(max_length=500, verbose_name='Место вызова')),
+                ('database', models.CharField(max_length=50, verbose_name='База данных')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    Медленный SQL-запрос с планом выполнения.
+
+    Записи создаются задачей `monitoring.tasks.explain_slow_query`. Таблица ограничена
+    `SLOW_QUERY_MAX_ROWS` последними записями.
+
+    Поля:
+    - shape (TextField): Форма запроса (значения заменены на `?`), общая для запросов, отличающихся только значениями.
+    - shape_hash (CharField): Хэш формы запроса для группировки.
+    - sql (TextField): Пример запроса с подставленными значениями.
+    - duration (FloatField): Время выполнения запроса в приложении, мс.
+    - plan (JSONField): План `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`.
+    - call_site (CharField): Место вызова в коде проекта.
+    - database (CharField): Псевдоним базы данных.
+    - created_at (DateTimeField): Время записи.
+    """
+    shape = models.TextField(verbose_name="Форма запроса")
+    shape_hash = models.CharField(max_length=32, db_index=True, verbose_name="Хэш формы запроса")
+    sql = models.TextField(verbose_name="Запрос")
+    duration = models.FloatField(verbose_name="Время выполнения, мс")
+    plan = models.JSONField(verbose_name="План выполнения")
+    call_site = models.CharField(max_length=500, verbose_name="Место вызова")
+    database = models.CharField(max_length=50, verbose_name="База данных")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    def __str__(self):
+        return f"{self.duration:.0f} мс: {self.shape[:80]}"
+
+    class Meta:
+        verbose_name = "Медленный запрос"
+        verbose_name_plural = "Медленные запросы"
+        ordering = ["-id"]
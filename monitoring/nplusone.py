@@ -0,0 +1,139 @@
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+
+from monitoring.db import ExecuteWrappers
+
+logger = logging.getLogger(__name__)
+
+# Детектор текущего запроса или задачи; None, если проверка не выполняется
+current_detector = ContextVar("current_nplusone_detector", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+_PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve())
+_MONITORING_DIR = str(Path(__file__).resolve().parent)
+
+
+class NPlusOneError(Exception):
+    """
+    Запрос одной формы повторился больше допустимого числа раз (при `NPLUSONE_RAISE`).
+    """
+
+
+def normalize_sql(sql):
+    """
+    Приводит SQL-запрос к форме: литералы и параметры заменяются на `?`, списки `IN (...)` сворачиваются.
+
+    Запросы, которые отличаются только значениями, например загрузка владельца для каждой привычки,
+    получают одну форму.
+    """
+    shape = _STRING.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+    shape = shape.replace("%s", "?")
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+def call_site():
+    """
+    Возвращает ближайшее к запросу место вызова в коде проекта (без сторонних пакетов и оберток SQL).
+    """
+    for frame in reversed(traceback.extract_stack()):
+        filename = str(Path(frame.filename).resolve())
+        if not filename.startswith(_PROJECT_ROOT) or "site-packages" in filename:
+            continue
+        # Обертки SQL модуля monitoring (детектор, метрики, профилирование) не являются местом вызова
+        if not filename.startswith(_MONITORING_DIR) or Path(filename).name.startswith("test"):
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "неизвестно"
+
+
+class Detector:
+    """
+    Подсчет повторяющихся форм SQL-запросов в пределах одного HTTP-запроса или задачи Celery.
+
+    Когда количество запросов одной формы достигает `threshold`, в лог записывается форма запроса
+    и место вызова; при `raise_error` вызывается `NPlusOneError`.
+    """
+
+    def __init__(self, scope, threshold=None, raise_error=None):
+        self.scope = scope
+        self.threshold = threshold or settings.NPLUSONE_THRESHOLD
+        self.raise_error = settings.NPLUSONE_RAISE if raise_error is None else raise_error
+        self.shapes = Counter()
+        self.reported = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = normalize_sql(sql)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold:
+            self.report(shape)
+        return execute(sql, params, many, context)
+
+    def report(self, shape):
+        site = call_site()
+        self.reported[shape] = site
+        message = (f"Возможная проблема N+1 в {self.scope}: запрос выполнен {self.threshold} раз, "
+                   f"место вызова {site}: {shape}")
+        if self.raise_error:
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+@contextmanager
+def detect_n_plus_one(scope, threshold=None, raise_error=None):
+    """
+    Проверяет SQL-запросы блока на повторяющиеся формы.
+
+    Можно использовать в тестах: `with detect_n_plus_one("test", raise_error=True): ...`.
+
+    :param scope: Описание проверяемого блока для сообщений (путь запроса, имя задачи).
+    :param threshold: Количество запросов одной формы, начиная с которого сообщается о проблеме.
+    :param raise_error: Вызывать `NPlusOneError` вместо записи в лог.
+    :return: Детектор с количеством запросов по формам (`shapes`) и найденными проблемами (`reported`).
+    """
+    detector = Detector(scope, threshold, raise_error)
+    token = current_detector.set(detector)
+    try:
+        with ExecuteWrappers(detector):
+            yield detector
+    finally:
+        current_detector.reset(token)
+
+
+_task_detectors = {}
+
+
+def task_started(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Начинает проверку SQL-запросов задачи Celery.
+    """
+    context = detect_n_plus_one(f"задаче {task.name}")
+    context.__enter__()
+    _task_detectors[task_id] = context
+
+
+def task_finished(sender=None, task_id=None, **kwargs):
+    """
+    Завершает проверку SQL-запросов задачи Celery.
+    """
+    context = _task_detectors.pop(task_id, None)
+    if context is not None:
+        context.__exit__(None, None, None)
+
+
+def connect_celery_signals():
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(task_started, weak=False)
+    task_postrun.connect(task_finished, weak=False)
@@ -0,0 +1,163 @@
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from config.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Профиль текущего запроса; None, если запрос не профилируется
+current_profile = ContextVar("current_profile", default=None)
+
+RING_BUFFER_KEY = "monitoring:profiles"
+
+
+class Profile:
+    """
+    Замеры одного запроса: время по этапам (мс) и количество SQL-запросов.
+
+    Этапы: `db` — выполнение SQL, `auth` — аутентификация DRF, `serialize` — сериализация данных,
+    `render` — рендеринг ответа, `view` — работа представления целиком, `total` — обработка запроса
+    вместе с middleware.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.queries = 0
+        self._active = set()
+
+    def add(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration * 1000
+
+    def server_timing(self):
+        """
+        Возвращает значение заголовка `Server-Timing`.
+        """
+        metrics = []
+        for name, duration in self.timings.items():
+            metric = f"{name};dur={duration:.1f}"
+            if name == "db":
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+    def as_dict(self):
+        return {"timings": {name: round(duration, 2) for name, duration in self.timings.items()},
+                "queries": self.queries}
+
+
+@contextmanager
+def timer(name):
+    """
+    Добавляет время выполнения блока к этапу `name` профиля текущего запроса.
+
+    Вложенные замеры одного этапа (например, сериализатор внутри сериализатора) не суммируются повторно.
+    Вне профилируемого запроса ничего не делает.
+    """
+    profile = current_profile.get()
+    if profile is None or name in profile._active:
+        yield
+        return
+    profile._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+        profile._active.discard(name)
+
+
+def query_timer(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL (`connection.execute_wrapper`) для подсчета количества и времени запросов.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add("db", time.perf_counter() - start)
+        profile.queries += 1
+
+
+class RingBuffer:
+    """
+    Кольцевой буфер последних замеров запросов.
+
+    Если настроен Redis, буфер общий для всех веб-процессов (список, обрезаемый до `size` элементов),
+    иначе хранится в памяти процесса.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.local = deque(maxlen=size)
+
+    def append(self, sample):
+        client = get_redis()
+        if client is None:
+            self.local.appendleft(sample)
+            return
+        try:
+            client.pipeline(transaction=False).lpush(RING_BUFFER_KEY, json.dumps(sample)) \
+                .ltrim(RING_BUFFER_KEY, 0, self.size - 1).execute()
+        except RedisError as e:
+            logger.warning(f"Замер запроса не сохранен, Redis недоступен: {e}")
+
+    def items(self, limit=None):
+        """
+        Возвращает замеры, начиная с последнего.
+        """
+        limit = min(limit or self.size, self.size)
+        client = get_redis()
+        if client is None:
+            return list(self.local)[:limit]
+        return [json.loads(item) for item in client.lrange(RING_BUFFER_KEY, 0, limit - 1)]
+
+    def clear(self):
+        self.local.clear()
+        client = get_redis()
+        if client is not None:
+            client.delete(RING_BUFFER_KEY)
+
+
+ring_buffer = RingBuffer(settings.PROFILING_BUFFER_SIZE)
+
+_installed = False
+
+
+def install_instrumentation():
+    """
+    Подключает замеры этапов обработки запросов DRF: работы представления, аутентификации,
+    сериализации и рендеринга ответа.
+
+    Вызывается при запуске приложения только если профилирование включено, поэтому при выключенном
+    профилировании классы DRF не изменяются.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from rest_framework.request import Request
+    from rest_framework.response import Response
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    def timed(name, func):
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    APIView.dispatch = timed("view", APIView.dispatch)
+    Request._authenticate = timed("auth", Request._authenticate)
+    BaseSerializer.data = property(timed("serialize", BaseSerializer.data.fget))
+    Response.rendered_content = property(timed("render", Response.rendered_content.fget))
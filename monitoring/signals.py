@@ -0,0 +1,63 @@
+import time
+
+from celery.signals import before_task_publish, task_failure, task_postrun, task_prerun
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from monitoring.metrics import TASK_FAILURES, TASK_QUEUE_WAIT, TASK_RUNTIME, query_counter
+
+# Заголовок сообщения Celery со временем постановки задачи в очередь
+PUBLISHED_AT_HEADER = "published_at"
+
+_task_started = {}
+
+
+@receiver(connection_created)
+def count_queries(sender, connection, **kwargs):
+    """
+    Подключает подсчет SQL-запросов к соединению с базой данных.
+
+    При пуле соединений сигнал приходит при каждом переподключении одного и того же `DatabaseWrapper`,
+    поэтому обертка подключается только один раз.
+    """
+    wrapper = query_counter(connection.alias)
+    if wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(wrapper)
+
+
+@before_task_publish.connect
+def mark_published(sender=None, headers=None, **kwargs):
+    """
+    Добавляет в заголовки задачи время постановки в очередь.
+    """
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def task_started(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Запоминает время начала задачи и записывает время ожидания в очереди.
+    """
+    _task_started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    if published_at is not None:
+        TASK_QUEUE_WAIT.labels(task.name).observe(max(0.0, time.time() - published_at))
+
+
+@task_postrun.connect
+def task_finished(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Записывает время выполнения задачи.
+    """
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.labels(task.name).observe(time.perf_counter() - started)
+
+
+@task_failure.connect
+def task_failed(sender=None, **kwargs):
+    """
+    Увеличивает счетчик задач, завершившихся ошибкой.
+    """
+    TASK_FAILURES.labels(sender.name).inc()
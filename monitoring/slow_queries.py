@@ -0,0 +1,65 @@
+import hashlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from kombu.exceptions import KombuError
+
+from monitoring.nplusone import call_site, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+# Выполняется ли анализ медленного запроса; его собственные запросы не отбираются
+explaining = ContextVar("explaining_slow_query", default=False)
+
+
+def shape_hash(shape):
+    return hashlib.md5(shape.encode()).hexdigest()
+
+
+def is_explainable(sql):
+    """
+    Можно ли выполнить `EXPLAIN ANALYZE` для запроса: только `SELECT` без блокировок строк и рекомендательных
+    блокировок (сеансовые не снимаются откатом) и не запросы к самой таблице медленных запросов.
+    Остальные побочные эффекты исключает транзакция только для чтения с откатом (`explain_slow_query`).
+    """
+    statement = sql.lstrip().upper()
+    if not statement.startswith("SELECT"):
+        return False
+    return not any(part in statement for part in (" FOR UPDATE", " FOR SHARE", "PG_ADVISORY", "MONITORING_SLOWQUERY"))
+
+
+def sample_slow_query(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL (`connection.execute_wrapper`), отбирающая медленные запросы.
+
+    Запросы на чтение дольше `SLOW_QUERY_THRESHOLD` мс с вероятностью `SLOW_QUERY_SAMPLE_RATE` передаются
+    в задачу `explain_slow_query`, которая получает план выполнения вне обработки запроса.
+    """
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - start) * 1000
+    if duration < settings.SLOW_QUERY_THRESHOLD or many or explaining.get():
+        return result
+    if is_explainable(sql) and random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+        connection = context["connection"]
+        try:
+            from monitoring.tasks import explain_slow_query
+            explain_slow_query.delay(
+                connection.alias, connection.ops.compose_sql(sql, params), normalize_sql(sql), duration, call_site()
+            )
+        except KombuError as e:
+            logger.warning(f"Медленный запрос не передан на анализ: {e}")
+    return result
+
+
+def install_sampler(sender, connection, **kwargs):
+    """
+    Подключает отбор медленных запросов к соединению (обработчик сигнала `connection_created`).
+
+    Сигнал повторяется при каждом переподключении того же соединения из пула, обертка подключается один раз.
+    """
+    if sample_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sample_slow_query)
@@ -0,0 +1,81 @@
+import cProfile
+import logging
+import os
+import pstats
+import random
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_profilers = {}
+_stats = {}
+
+
+def profile_path(task_name, pid=None):
+    """
+    Возвращает путь файла профиля задачи для процесса `pid` (по умолчанию текущего).
+    """
+    return Path(settings.TASK_PROFILING_DIR) / f"{task_name}.{pid or os.getpid()}.prof"
+
+
+def profile_files(task_name):
+    """
+    Возвращает файлы профилей задачи всех процессов.
+    """
+    return sorted(Path(settings.TASK_PROFILING_DIR).glob(f"{task_name}.*.prof"))
+
+
+def task_started(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Начинает профилирование задачи с вероятностью `TASK_PROFILING_SAMPLE_RATE` (сигнал `task_prerun`).
+    """
+    if random.random() >= settings.TASK_PROFILING_SAMPLE_RATE:
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # В потоке уже работает другой профилировщик
+        return
+    _profilers[task_id] = profiler
+
+
+def task_finished(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Завершает профилирование задачи и добавляет замер к профилю задачи процесса (сигнал `task_postrun`).
+
+    Профиль процесса накапливается в памяти и после каждого замера сохраняется в файл
+    `<TASK_PROFILING_DIR>/<имя задачи>.<pid>.prof`, поэтому процессы воркера не пишут в один файл.
+    """
+    profiler = _profilers.pop(task_id, None)
+    if profiler is None:
+        return
+    profiler.disable()
+
+    stats = _stats.get(task.name)
+    if stats is None:
+        stats = _stats[task.name] = pstats.Stats(profiler)
+    else:
+        stats.add(profiler)
+    path = profile_path(task.name)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(path)
+    except OSError as e:
+        logger.warning(f"Профиль задачи {task.name} не сохранен: {e}")
+
+
+def connect_celery_signals():
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(task_started, weak=False)
+    task_postrun.connect(task_finished, weak=False)
+
+
+def disconnect_celery_signals():
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.disconnect(task_started)
+    task_postrun.disconnect(task_finished)
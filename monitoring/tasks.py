@@ -0,0 +1,45 @@
+from celery import shared_task
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from monitoring.models import SlowQuery
+from monitoring.slow_queries import explaining, is_explainable, shape_hash
+
+
+@shared_task
+def explain_slow_query(database, sql, shape, duration, call_site):
+    """
+    Получает план медленного запроса через `EXPLAIN (ANALYZE, BUFFERS)` и сохраняет его в `SlowQuery`.
+
+    Запрос выполняется повторно с ограничением `SLOW_QUERY_EXPLAIN_TIMEOUT` в транзакции только для чтения,
+    которая всегда откатывается: `EXPLAIN ANALYZE` действительно выполняет запрос, а `SELECT` может вызывать
+    функции с побочными эффектами (`nextval`, `setval` и другие). Старые записи сверх `SLOW_QUERY_MAX_ROWS`
+    удаляются.
+    """
+    if not is_explainable(sql):
+        return
+    token = explaining.set(True)
+    try:
+        _explain_and_store(database, sql, shape, duration, call_site)
+    finally:
+        explaining.reset(token)
+
+
+def _explain_and_store(database, sql, shape, duration, call_site):
+    try:
+        with transaction.atomic(using=database), connections[database].cursor() as cursor:
+            cursor.execute("SET TRANSACTION READ ONLY")
+            cursor.execute("SELECT set_config('statement_timeout', %s, true)",
+                           [str(settings.SLOW_QUERY_EXPLAIN_TIMEOUT)])
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+            # Транзакция откатывается и при успехе, вместе с любыми изменениями выполненного запроса
+            transaction.set_rollback(True, using=database)
+    except DatabaseError as e:
+        plan = {"error": str(e)}
+
+    slow_query = SlowQuery.objects.create(
+        shape=shape, shape_hash=shape_hash(shape), sql=sql, duration=duration, plan=plan,
+        call_site=call_site[:500], database=database,
+    )
+    SlowQuery.objects.filter(pk__lte=slow_query.pk - settings.SLOW_QUERY_MAX_ROWS).delete()
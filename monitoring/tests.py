@@ -0,0 +1,414 @@
+import pstats
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.db.backends.signals import connection_created
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from config.celery import app as celery_app, release_database_connections
+from habit.models import Habits
+from monitoring import task_profiler
+from monitoring.metrics import query_counter
+from monitoring.models import SlowQuery
+from monitoring.nplusone import NPlusOneError, detect_n_plus_one, normalize_sql
+from monitoring.profiling import install_instrumentation, ring_buffer
+from monitoring.slow_queries import install_sampler, sample_slow_query
+from monitoring.tasks import explain_slow_query
+from users.tasks import process_avatar
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+class ProfilingMiddlewareTests(APITestCase):
+    """
+    Тесты профилирования запросов и эндпоинта последних замеров.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Подключает замеры этапов DRF, как это делается при запуске с `PROFILING_ENABLED`.
+        """
+        super().setUpClass()
+        install_instrumentation()
+
+    def setUp(self):
+        """
+        Очищает буфер замеров и создает пользователя с привычкой.
+        """
+        ring_buffer.clear()
+        self.user = User.objects.create_user(email='profiling@example.com', password='testpassword')
+        Habits.objects.create(owner=self.user, place='Дом', time='08:00:00', action='Зарядка', periodicity=1,
+                              duration=60)
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """
+        Ответ содержит время всех этапов и количество SQL-запросов в заголовке `Server-Timing`.
+        """
+        response = self.client.get(reverse('habit:habits_list'))
+
+        metrics = {metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')}
+        self.assertEqual(set(metrics), {'db', 'auth', 'serialize', 'render', 'view', 'total'})
+        self.assertIn('desc="2 queries"', metrics['db'])
+
+    def test_profiles_endpoint_staff_only(self):
+        """
+        Замеры доступны только сотрудникам и содержат путь и этапы запроса.
+        """
+        self.client.get(reverse('habit:habits_list'))
+        response = self.client.get(reverse('monitoring:profiles'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('monitoring:profiles'), {'limit': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[-1]['path'], reverse('habit:habits_list'))
+        self.assertEqual(response.data[-1]['queries'], 2)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        """
+        При выключенном профилировании заголовок не добавляется.
+        """
+        response = self.client.get(reverse('habit:habits_list'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class MetricsTests(APITestCase):
+    """
+    Тесты эндпоинта метрик в формате Prometheus.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя и аутентифицирует клиента.
+        """
+        self.user = User.objects.create_user(email='metrics@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+
+    def sample(self, name, **labels):
+        """
+        Возвращает текущее значение метрики из реестра по умолчанию.
+        """
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_latency_by_url_name(self):
+        """
+        Время обработки запроса учитывается в гистограмме по имени URL и выводится на `/metrics`.
+        """
+        labels = {'method': 'GET', 'view': 'habit:habits_list', 'status': '200'}
+        before = self.sample('http_request_duration_seconds_count', **labels)
+        queries = self.sample('db_queries_total', alias='default')
+        self.client.get(reverse('habit:habits_list'))
+
+        self.assertEqual(self.sample('http_request_duration_seconds_count', **labels), before + 1)
+        self.assertGreater(self.sample('db_queries_total', alias='default'), queries)
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'http_request_duration_seconds_bucket{', response.content)
+        self.assertIn(b'view="habit:habits_list"', response.content)
+
+    async def test_request_latency_under_asgi(self):
+        """
+        Время обработки запроса под ASGI учитывается так же, как под WSGI.
+        """
+        labels = {'method': 'GET', 'view': 'habit:public_list_async', 'status': '200'}
+        before = self.sample('http_request_duration_seconds_count', **labels)
+        response = await self.async_client.get(reverse('habit:public_list_async'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.sample('http_request_duration_seconds_count', **labels), before + 1)
+
+    @override_settings(DEBUG=True, PROFILING_ENABLED=False)
+    def test_middleware_not_adapted_under_asgi(self):
+        """
+        Под ASGI цепочка middleware остается асинхронной: Django не переводит в поток ни один подключенный
+        middleware (отключенные через `MiddlewareNotUsed` в цепочку не входят).
+        """
+        with self.assertLogs('django.request', 'DEBUG') as logs:
+            ASGIHandler()
+        adapted = {record.args[0].removeprefix('middleware ') for record in logs.records if 'adapted' in record.msg}
+        unused = {record.args[0] for record in logs.records if record.msg.startswith('MiddlewareNotUsed')}
+        self.assertEqual(adapted - unused, set())
+
+    def test_cache_hits_and_misses(self):
+        """
+        Обращения к кешу учитываются как попадания и промахи.
+        """
+        backend = type(caches['default'])
+        hits = self.sample('cache_requests_total', cache=backend.__name__, result='hit')
+        misses = self.sample('cache_requests_total', cache=backend.__name__, result='miss')
+
+        caches['default'].set('metrics-test', 1)
+        caches['default'].get('metrics-test')
+        caches['default'].get('metrics-test-missing')
+
+        self.assertEqual(self.sample('cache_requests_total', cache=backend.__name__, result='hit'), hits + 1)
+        self.assertEqual(self.sample('cache_requests_total', cache=backend.__name__, result='miss'), misses + 1)
+
+    def test_task_runtime_and_failures(self):
+        """
+        Выполнение задач Celery учитывается в гистограмме времени и счетчике ошибок.
+        """
+        runtime = self.sample('celery_task_runtime_seconds_count', task=process_avatar.name)
+        failures = self.sample('celery_task_failures_total', task=process_avatar.name)
+
+        process_avatar.apply(args=[0])
+        process_avatar.apply(args=['not-a-pk'])
+
+        self.assertEqual(self.sample('celery_task_runtime_seconds_count', task=process_avatar.name), runtime + 2)
+        self.assertEqual(self.sample('celery_task_failures_total', task=process_avatar.name), failures + 1)
+
+    def test_query_counter_installed_once_per_connection(self):
+        """
+        При переподключении соединения счетчик запросов не подключается повторно и запрос учитывается один раз.
+        """
+        database = connections.create_connection('default')
+        self.addCleanup(database.close)
+        for _ in range(3):
+            database.ensure_connection()
+            database.close()
+
+        queries = self.sample('db_queries_total', alias='default')
+        with database.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertEqual(self.sample('db_queries_total', alias='default'), queries + 1)
+        self.assertEqual(database.execute_wrappers.count(query_counter('default')), 1)
+
+
+class NPlusOneDetectorTests(APITestCase):
+    """
+    Тесты поиска повторяющихся форм SQL-запросов.
+    """
+
+    def setUp(self):
+        """
+        Создает привычки разных владельцев.
+        """
+        for i in range(3):
+            owner = User.objects.create_user(email=f'nplusone{i}@example.com', password='testpassword')
+            Habits.objects.create(owner=owner, place='Дом', time='08:00:00', action='Зарядка', periodicity=1,
+                                  duration=60)
+
+    def test_normalize_sql(self):
+        """
+        Запросы, отличающиеся только значениями, приводятся к одной форме.
+        """
+        self.assertEqual(
+            normalize_sql('SELECT * FROM t WHERE id = 15 AND name = \'x\'  AND pk IN (%s, %s, %s)'),
+            normalize_sql('SELECT * FROM t WHERE id = 7 AND name = \'y\' AND pk IN (%s)'),
+        )
+
+    def test_repeated_shape_reported_with_call_site(self):
+        """
+        Загрузка владельца для каждой привычки определяется как N+1 с местом вызова в коде проекта.
+        """
+        with self.assertRaises(NPlusOneError) as context:
+            with detect_n_plus_one('test', threshold=3, raise_error=True):
+                [habit.owner.email for habit in Habits.objects.all()]
+        self.assertIn('monitoring/tests.py', str(context.exception))
+
+        with detect_n_plus_one('test', threshold=3, raise_error=True) as detector:
+            [habit.owner.email for habit in Habits.objects.select_related('owner')]
+        self.assertEqual(detector.reported, {})
+
+    @override_settings(NPLUSONE_ENABLED=True, NPLUSONE_RAISE=True, NPLUSONE_THRESHOLD=2)
+    def test_middleware(self):
+        """
+        Список привычек проходит проверку middleware: запросы не повторяются для каждой строки.
+        """
+        self.client.force_authenticate(User.objects.first())
+        response = self.client.get(reverse('habit:habits_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_SAMPLE_RATE=1.0, SLOW_QUERY_MAX_ROWS=2)
+class SlowQueryTests(APITestCase):
+    """
+    Тесты отбора медленных запросов и сохранения их планов.
+    """
+
+    def setUp(self):
+        """
+        Выполняет задачи Celery синхронно и создает пользователя с привычкой.
+        """
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+        self.user = User.objects.create_user(email='slow@example.com', password='testpassword')
+        Habits.objects.create(owner=self.user, place='Дом', time='08:00:00', action='Зарядка', periodicity=1,
+                              duration=60)
+
+    def test_plan_captured_for_select(self):
+        """
+        Для медленного запроса на чтение сохраняется план выполнения, форма запроса и место вызова.
+        """
+        with connection.execute_wrapper(sample_slow_query):
+            list(Habits.objects.filter(owner=self.user))
+
+        slow_query = SlowQuery.objects.get()
+        self.assertIn('"habit_habits"."owner_id" = ?', slow_query.shape)
+        self.assertIn(f'"habit_habits"."owner_id" = {self.user.pk}', slow_query.sql)
+        self.assertIn('Plan', slow_query.plan[0])
+        self.assertIn('monitoring/tests.py', slow_query.call_site)
+
+    def test_writes_not_explained_and_table_rotated(self):
+        """
+        Запросы на изменение данных не анализируются, а таблица хранит только последние записи.
+        """
+        with connection.execute_wrapper(sample_slow_query):
+            Habits.objects.filter(owner=self.user).update(place='Парк')
+            for _ in range(3):
+                Habits.objects.filter(owner=self.user).exists()
+
+        self.assertEqual(SlowQuery.objects.count(), 2)
+
+        out = StringIO()
+        call_command('slow_queries', stdout=out)
+        self.assertIn('записей 2', out.getvalue())
+
+    def test_explain_runs_read_only_and_rolls_back(self):
+        """
+        Анализ выполняется в транзакции только для чтения: `nextval` в запросе не сдвигает последовательность.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE SEQUENCE monitoring_test_seq')
+            cursor.execute("SELECT nextval('monitoring_test_seq')")
+
+        explain_slow_query('default', "SELECT nextval('monitoring_test_seq')", 'SELECT nextval(?)', 500.0, '')
+        explain_slow_query('default', 'SELECT 1', 'SELECT ?', 500.0, '')
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT last_value FROM monitoring_test_seq")
+            self.assertEqual(cursor.fetchone()[0], 1)
+        sequence_query, select_query = SlowQuery.objects.order_by('pk')
+        self.assertIn('read-only transaction', sequence_query.plan['error'])
+        self.assertIn('Plan', select_query.plan[0])
+
+    def test_sampler_installed_once_per_connection(self):
+        """
+        При переподключении соединения отбор медленных запросов не подключается повторно.
+        """
+        connection_created.connect(install_sampler)
+        self.addCleanup(connection_created.disconnect, install_sampler)
+        database = connections.create_connection('default')
+        self.addCleanup(database.close)
+        for _ in range(2):
+            database.ensure_connection()
+            database.close()
+
+        database.ensure_connection()
+        self.assertEqual(database.execute_wrappers.count(sample_slow_query), 1)
+
+
+class TaskProfilerTests(APITestCase):
+    """
+    Тесты профилирования задач Celery.
+    """
+
+    def setUp(self):
+        """
+        Подключает профилировщик к сигналам Celery и сохраняет профили во временный каталог.
+        """
+        profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profiles_dir.cleanup)
+        settings_override = override_settings(TASK_PROFILING_DIR=profiles_dir.name, TASK_PROFILING_SAMPLE_RATE=1.0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        task_profiler.connect_celery_signals()
+        self.addCleanup(task_profiler.disconnect_celery_signals)
+        self.addCleanup(task_profiler._stats.clear)
+        self.user = User.objects.create_user(email='profiled@example.com', password='testpassword')
+
+    def test_profiles_merged_per_task(self):
+        """
+        Замеры нескольких выполнений задачи объединяются в один профиль, а команда выводит затратные функции.
+        """
+        for _ in range(2):
+            process_avatar.apply(args=[self.user.pk])
+
+        files = task_profiler.profile_files(process_avatar.name)
+        self.assertEqual(len(files), 1)
+        stats = pstats.Stats(str(files[0]))
+        calls = [stat[1] for func, stat in stats.stats.items() if func[2] == 'process_avatar']
+        self.assertEqual(calls, [2])
+
+        out = StringIO()
+        call_command('task_profile', stdout=out)
+        self.assertIn(f'{process_avatar.name} (процессов: 1)', out.getvalue())
+
+        out = StringIO()
+        call_command('task_profile', process_avatar.name, '--limit', '5', stdout=out)
+        self.assertIn('(process_avatar)', out.getvalue())
+
+    def test_sampling_skips_tasks(self):
+        """
+        При нулевой доле замеров профили не создаются.
+        """
+        with override_settings(TASK_PROFILING_SAMPLE_RATE=0):
+            process_avatar.apply(args=[self.user.pk])
+
+        self.assertEqual(task_profiler.profile_files(process_avatar.name), [])
+
+
+class BenchDbConnectionsTests(APITestCase):
+    """
+    Тесты сравнения стоимости соединений с базой.
+    """
+
+    def test_modes_compared(self):
+        """
+        Без пула на каждый запрос устанавливается новое соединение, с пулом и постоянным соединением — нет.
+        """
+        out = StringIO()
+        call_command('bench_db_connections', '--requests', '5', stdout=out)
+        rows = {line[:18].strip(): line.split() for line in out.getvalue().splitlines()[1:-1]}
+        self.assertEqual(rows['без пула'][-1], '5')
+        self.assertEqual(rows['постоянное'][-1], '1')
+        self.assertLessEqual(int(rows['пул'][-1]), 4)
+        self.assertIn('Установка соединения на запрос', out.getvalue())
+
+
+class TaskDatabaseConnectionTests(APITransactionTestCase):
+    """
+    Тесты возврата соединений с базой в пул между задачами Celery.
+    """
+
+    def drop_connection(self):
+        """
+        Разрывает соединение процесса с базой со стороны сервера, как при перезапуске PostgreSQL.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            pid = cursor.fetchone()[0]
+        other = connections.create_connection('default')
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        finally:
+            other.close()
+
+    def test_dropped_connection_replaced_after_task(self):
+        """
+        Разорванное соединение закрывается после задачи, и следующая задача получает исправное.
+        """
+        self.drop_connection()
+        with self.assertRaises(OperationalError):
+            Habits.objects.count()
+
+        release_database_connections(sender=process_avatar)
+
+        self.assertEqual(Habits.objects.count(), 0)
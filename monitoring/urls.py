@@ -0,0 +1,10 @@
+from django.urls import path
+
+from monitoring.apps import MonitoringConfig
+from monitoring.views import ProfilesAPIView
+
+app_name = MonitoringConfig.name
+
+urlpatterns = [
+    path("profiles/", ProfilesAPIView.as_view(), name="profiles"),
+]
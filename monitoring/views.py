@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.http import HttpResponse, Http404
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from monitoring.metrics import render_metrics
+from monitoring.profiling import ring_buffer
+
+
+class ProfilesAPIView(APIView):
+    """
+    Последние замеры запросов из кольцевого буфера `ProfilingMiddleware`.
+
+    **URL:** `monitoring/profiles/`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Только для сотрудников (`is_staff`).
+
+    **Параметры запроса:**
+
+    - `limit` - Количество последних замеров (по умолчанию весь буфер).
+
+    **Ответ:**
+
+    - **Код 200** - Список замеров, начиная с последнего: метод, путь, код ответа, время (`timestamp`),
+      время этапов в миллисекундах (`timings`) и количество SQL-запросов (`queries`).
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        limit = request.query_params.get("limit")
+        limit = int(limit) if limit and limit.isdigit() and int(limit) > 0 else None
+        return Response(ring_buffer.items(limit))
+
+
+def metrics(request):
+    """
+    Метрики веб-процессов и воркеров Celery в текстовом формате Prometheus.
+
+    **URL:** `metrics`
+
+    **Метод:** `GET`
+
+    **Авторизация:** Не требуется. Эндпоинт предназначен для локального сборщика метрик и должен быть
+    закрыт от внешнего доступа на уровне прокси.
+
+    **Ответ:**
+
+    - **Код 200** - Гистограммы времени обработки запросов по имени URL, счетчики SQL-запросов и обращений
+      к кешу, время выполнения, ожидания в очереди и количество ошибок задач Celery.
+    - **Код 404** - Метрики выключены (`METRICS_ENABLED`).
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
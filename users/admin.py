@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.files.storage import default_storage
 from django.utils.html import mark_safe
+from config.admin import PerformanceAdminMixin
 from .models import User
 from .forms import UserRegisterForm, UserProfileForm
 
 
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(PerformanceAdminMixin, BaseUserAdmin):
     add_form = UserRegisterForm
     form = UserProfileForm
     list_display = ('email', 'nickname', 'first_name', 'last_name', 'avatar_tag', 'is_staff')
@@ -23,25 +25,30 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('email', 'nickname', 'password1', 'password2'),
         }),
     )
-    search_fields = ('email', 'nickname', 'first_name', 'last_name')
+    # Поиск по началу значения использует индексы по UPPER(...) из User.Meta.indexes
+    search_fields = ('^email', '^nickname', '^first_name', '^last_name')
     ordering = ('email',)
     readonly_fields = ('avatar_tag',)
 
     def avatar_tag(self, obj):
-        if obj.avatar:
+        thumbnail = obj.avatar_thumbnails.get('medium')
+        if thumbnail:
+            urls = {extension: default_storage.url(name) for extension, name in thumbnail.items()}
             return mark_safe(f'''
                   <div style="position: relative; padding-top: 80px;">
-                      <img src="{obj.avatar.url}" style="
-                          width: 100px;
-                          height: 100px;
-                          border-radius: 10%;
-                          object-fit: cover;
-                          position: absolute;
-                          top: -10px;
-                          left: 0px;
-                      " />
+                      <picture>
+                          <source srcset="{urls['webp']}" type="image/webp" />
+                          <img src="{urls['jpeg']}" width="100" height="100" loading="lazy" style="
+                              border-radius: 10%;
+                              position: absolute;
+                              top: -10px;
+                              left: 0px;
+                          " />
+                      </picture>
                   </div>
               ''')
+        if obj.avatar:
+            return "Обрабатывается"
         return "-"
 
     avatar_tag.short_description = 'Avatar'
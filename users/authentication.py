@@ -0,0 +1,172 @@
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Время жизни пользователя в памяти процесса, секунд. Ограничивает задержку, с которой
+# изменения пользователя (например, деактивация) видны в других веб-процессах.
+LOCAL_CACHE_TTL = 5
+
+# Максимальное количество пользователей в памяти процесса
+LOCAL_CACHE_SIZE = 10000
+
+# Время жизни пользователя в общем кеше, секунд
+SHARED_CACHE_TTL = 300
+
+# Поля пользователя, которые хранятся в кеше: нужные аутентификации и проверкам прав. Хэш пароля
+# не кешируется, остальные поля загружаются из базы данных при первом обращении к ним.
+CACHED_FIELDS = ("id", "email", "is_active", "is_staff", "is_superuser")
+
+_local_users = {}
+
+
+def _version_key(user_id):
+    return f"auth:user:{user_id}:version"
+
+
+def _user_key(user_id, version):
+    return f"auth:user:{user_id}:v{version}"
+
+
+def check_user(user, validated_token, password_hash=None):
+    """
+    Проверки пользователя из `JWTAuthentication.get_user`: активность и смена пароля после выдачи токена.
+
+    `password_hash` — уже посчитанный `get_md5_hash_password(user.password)`, если пароль не загружен.
+    """
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if password_hash is None:
+            password_hash = get_md5_hash_password(user.password)
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """
+    Сбрасывает закешированного пользователя.
+
+    Увеличивает версию пользователя в общем кеше, поэтому запись, загруженная до изменения
+    и сохраненная параллельным запросом, больше не будет прочитана. Запись в памяти текущего
+    процесса удаляется сразу, в остальных процессах она устаревает через `LOCAL_CACHE_TTL`.
+    """
+    user_id = str(user_id)
+    _local_users.pop(user_id, None)
+    key = _version_key(user_id)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен из кеша между add и incr
+        cache.set(key, 1, timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация с кешированием пользователей.
+
+    `JWTAuthentication` загружает пользователя из базы данных на каждый запрос. Этот класс
+    ищет его сначала в памяти процесса (на `LOCAL_CACHE_TTL` секунд), затем в общем кеше Django
+    (Redis, если задан `REDIS_URL`) по ключу из id пользователя и его версии. Версия увеличивается
+    сигналами `post_save`/`post_delete` модели `User` (`users.signals`).
+
+    В кеше хранятся только значения `CACHED_FIELDS` без хэша пароля (для проверки отзыва токена —
+    только его MD5, который и так содержится в токене), и для каждого запроса из них создается новый
+    экземпляр пользователя, поэтому одновременные запросы не делят один объект. Остальные поля
+    загружаются из базы данных при обращении к ним.
+
+    Проверки активности пользователя и смены пароля выполняются для каждого запроса, как и в
+    `JWTAuthentication`, поэтому деактивация вступает в силу не позже чем через `LOCAL_CACHE_TTL` секунд.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        # Идентификатор в токене может быть строкой, ключи кеша строятся по строковому виду
+        user_id = str(user_id)
+        now = time.monotonic()
+        entry = _local_users.get(user_id)
+        if entry is None or entry[0] <= now:
+            if len(_local_users) >= LOCAL_CACHE_SIZE:
+                _local_users.clear()
+            entry = _local_users[user_id] = (now + LOCAL_CACHE_TTL, self.get_shared_user(user_id))
+
+        fields, password_hash = entry[1]
+        user = self.user_model.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+        return check_user(user, validated_token, password_hash)
+
+    def get_shared_user(self, user_id):
+        """
+        Возвращает запись пользователя из общего кеша, при промахе загружает его из базы данных.
+
+        :return: Пара (значения `CACHED_FIELDS` в порядке полей модели, хэш пароля для проверки отзыва токена).
+        """
+        version = cache.get(_version_key(user_id), 0)
+        key = _user_key(user_id, version)
+        entry = cache.get(key)
+        if entry is None:
+            names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in CACHED_FIELDS]
+            try:
+                user = self.user_model.objects.only(*names, "password").get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            password_hash = get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None
+            entry = ({name: getattr(user, name) for name in names}, password_hash)
+            cache.set(key, entry, timeout=SHARED_CACHE_TTL)
+        return entry
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация для асинхронных представлений.
+
+    Разбор заголовка и проверка подписи токена выполняются так же, как в `JWTAuthentication`,
+    а пользователь загружается через асинхронный ORM (`aget`), поэтому запрос не занимает
+    отдельный поток на время обращения к базе данных.
+    """
+
+    async def aauthenticate(self, request):
+        """
+        Асинхронный аналог `authenticate`.
+
+        :param request: Объект запроса Django.
+        :return: Кортеж (пользователь, токен) или None, если заголовок авторизации не передан.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """
+        Асинхронный аналог `get_user` с теми же проверками активности и смены пароля.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        return check_user(user, validated_token)
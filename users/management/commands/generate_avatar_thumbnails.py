@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from users.models import User
+from users.tasks import process_avatar
+
+
+class Command(BaseCommand):
+    """
+    Обрабатывает уже загруженные аватары и создает для них миниатюры.
+
+    По умолчанию обрабатываются только пользователи, у которых миниатюры отсутствуют или устарели.
+    """
+
+    help = "Создает миниатюры аватаров пользователей"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Пересоздать миниатюры для всех аватаров")
+        parser.add_argument("--async", dest="run_async", action="store_true", help="Поставить задачи в очередь Celery")
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(avatar="").exclude(avatar__isnull=True).only("pk", "avatar", "avatar_thumbnails")
+        count = 0
+        for user in users.iterator():
+            if not options["all"] and user.avatar.name == user.avatar_thumbnails.get("source"):
+                continue
+            if options["run_async"]:
+                process_avatar.delay(user.pk)
+            else:
+                process_avatar(user.pk)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Обработано аватаров: {count}"))
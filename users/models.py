@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 from users.management.commands.csu import CustomUserManager
 
@@ -17,6 +19,8 @@ class User(AbstractUser):
     - phone (CharField): Телефонный номер пользователя. Необязательное поле.
     - city (CharField): Город пользователя. Необязательное поле.
     - avatar (ImageField): Аватар пользователя. Загружается в каталог `users/avatars`. Необязательное поле.
+    - avatar_thumbnails (JSONField): Пути миниатюр аватара по размерам и форматам. Заполняется задачей
+      `users.tasks.process_avatar` после загрузки аватара.
     - telegram_chat_id (CharField): Идентификатор чата. Необязательное поле.
     - country (CharField): Страна проживания пользователя. Необязательное поле.
     - nickname (CharField): Никнейм пользователя. Должен быть уникальным.
@@ -41,6 +45,7 @@ class User(AbstractUser):
     phone = models.CharField(max_length=25, verbose_name="Телефон", **NULLABLE)
     city = models.CharField(max_length=25, verbose_name="Город", **NULLABLE)
     avatar = models.ImageField(upload_to="users/avatars", verbose_name="Аватар", **NULLABLE)
+    avatar_thumbnails = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Миниатюры аватара")
     telegram_chat_id = models.CharField(max_length=255, verbose_name="telegram_chat_id", **NULLABLE)
     country = models.CharField(max_length=50, verbose_name='страна', **NULLABLE)
     nickname = models.CharField(max_length=50, verbose_name='никнейм', unique=True, **NULLABLE)
@@ -53,6 +58,11 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        # Индексы для поиска по началу значения без учета регистра (`istartswith`) в админке
+        indexes = [
+            models.Index(OpClass(Upper(field), name="text_pattern_ops"), name=f"user_{field}_prefix_idx")
+            for field in ("email", "nickname", "first_name", "last_name")
+        ]
 
     def __str__(self):
         return f"{self.email}"
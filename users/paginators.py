@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Постраничная разбивка списка пользователей по курсору.
+
+    Страница выбирается по индексу первичного ключа (`WHERE id > ... ORDER BY id LIMIT n`),
+    поэтому время ответа не зависит от номера страницы, а общее количество пользователей не подсчитывается.
+
+    Атрибуты:
+    - `page_size` (int): Количество пользователей на странице. По умолчанию 50.
+    - `page_size_query_param` (str): Параметр запроса для изменения размера страницы.
+    - `max_page_size` (int): Максимальное количество пользователей на странице.
+    - `ordering` (str): Порядок пользователей — по идентификатору.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "id"
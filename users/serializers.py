@@ -1,5 +1,24 @@
 from rest_framework import serializers
 from users.models import User
+from users.thumbnails import thumbnail_urls
+from users.validators import AvatarUploadValidator
+
+
+class AvatarThumbnailsField(serializers.ReadOnlyField):
+    """
+    Поле с URL миниатюр аватара по размерам и форматам.
+
+    Используется для поля модели `avatar_thumbnails`. Пока миниатюры не созданы, возвращает пустой словарь.
+    URL строятся абсолютными, если в контексте сериализатора есть запрос, как у `ImageField`.
+    """
+
+    def to_representation(self, value):
+        urls = thumbnail_urls(value)
+        request = self.context.get('request')
+        if request is not None:
+            urls = {size: {extension: request.build_absolute_uri(url) for extension, url in formats.items()}
+                    for size, formats in urls.items()}
+        return urls
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -19,7 +38,9 @@ class UserSerializer(serializers.ModelSerializer):
         - `last_name`: Фамилия пользователя
         - `phone`: Телефон пользователя
         - `city`: Город пользователя
-        - `avatar`: Аватар пользователя
+        - `avatar`: Аватар пользователя (только для записи). Проверяется только заголовок изображения,
+          декодирование и пересохранение выполняются в фоновой задаче
+        - `avatar_thumbnails`: URL миниатюр аватара по размерам и форматам (только для чтения)
         - `telegram_chat_id`: Telegram чат ID пользователя
         - `country`: Страна пользователя
         - `nickname`: Никнейм пользователя
@@ -32,11 +53,15 @@ class UserSerializer(serializers.ModelSerializer):
         - `date_joined`: Дата регистрации пользователя (только для чтения)
     """
 
+    avatar = serializers.FileField(write_only=True, required=False, allow_null=True,
+                                   validators=[AvatarUploadValidator()])
+    avatar_thumbnails = AvatarThumbnailsField()
+
     class Meta:
         model = User
         fields = '__all__'
         extra_kwargs = {
-            'password': {'write_only': True, 'required': False}
+            'password': {'write_only': True, 'required': False},
         }
 
     def update(self, instance, validated_data):
@@ -60,3 +85,27 @@ class UserSerializer(serializers.ModelSerializer):
             instance.set_password(password)
         instance.save()
         return instance
+
+
+class UserListSerializer(serializers.ModelSerializer):
+    """
+    Компактный сериализатор пользователя для списка пользователей.
+
+    Не включает служебные поля и связи многие-ко-многим (`groups`, `user_permissions`),
+    поэтому размер ответа и количество запросов не зависят от прав пользователей.
+
+    Поля:
+        - `id`: Идентификатор пользователя
+        - `email`: Электронная почта пользователя
+        - `first_name`: Имя пользователя
+        - `last_name`: Фамилия пользователя
+        - `nickname`: Никнейм пользователя
+        - `city`: Город пользователя
+        - `country`: Страна пользователя
+        - `avatar_thumbnails`: URL миниатюр аватара по размерам и форматам
+    """
+    avatar_thumbnails = AvatarThumbnailsField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'email', 'first_name', 'last_name', 'nickname', 'city', 'country', 'avatar_thumbnails')
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from users.authentication import invalidate_cached_user
+from users.models import User
+from users.tasks import process_avatar
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш аутентификации пользователя при его изменении или удалении.
+    """
+    invalidate_cached_user(instance.pk)
+
+
+def _avatar_name(instance):
+    # Значение читается без обращения к полю, чтобы не загружать отложенный аватар (`only()`, `defer()`)
+    value = instance.__dict__.get("avatar")
+    return getattr(value, "name", value)
+
+
+@receiver(post_init, sender=User)
+def remember_avatar(sender, instance, **kwargs):
+    """
+    Запоминает путь аватара загруженного пользователя, чтобы после сохранения понять, изменился ли он.
+    """
+    instance._saved_avatar = _avatar_name(instance)
+
+
+@receiver(post_save, sender=User)
+def schedule_avatar_thumbnails(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Запускает обработку нового аватара и создание миниатюр.
+
+    Задача ставится только при изменении аватара (сохранения других полей, например `last_login`
+    при входе, ее не ставят) и после фиксации транзакции, чтобы воркер увидел сохраненный файл и запись.
+    Если аватар удален, пути миниатюр очищаются.
+    """
+    if update_fields is not None and "avatar" not in update_fields:
+        return
+    avatar = _avatar_name(instance)
+    if not created and avatar == instance._saved_avatar:
+        return
+    instance._saved_avatar = avatar
+
+    if not avatar:
+        if instance.avatar_thumbnails:
+            User.objects.filter(pk=instance.pk).update(avatar_thumbnails={})
+        return
+    if avatar != instance.avatar_thumbnails.get("source"):
+        transaction.on_commit(lambda: process_avatar.delay(instance.pk))
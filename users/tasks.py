@@ -0,0 +1,46 @@
+import logging
+
+from celery import shared_task
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from users.models import User
+from users.thumbnails import build_avatar_thumbnails, normalize_avatar
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_avatar(user_id):
+    """
+    Обрабатывает загруженный аватар пользователя вне веб-процесса.
+
+    Аватар декодируется, очищается от метаданных и пересохраняется (`normalize_avatar`), затем из него
+    создаются миниатюры. Путь обработанного файла и пути миниатюр сохраняются в `User.avatar`
+    и `User.avatar_thumbnails`, и только после этого удаляется исходный файл. Если обработка не удалась
+    или за ее время аватар был заменен, созданные файлы удаляются, а запись не меняется:
+    для нового файла запускается своя задача.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.avatar:
+        return
+
+    uploaded = user.avatar.name
+    created = []
+    saved = False
+    try:
+        user.avatar = normalize_avatar(user.avatar, created)
+        thumbnails = build_avatar_thumbnails(user.avatar, created)
+        # update() не вызывает post_save, поэтому задача не запускается повторно
+        saved = User.objects.filter(pk=user_id, avatar=uploaded).update(
+            avatar=user.avatar.name, avatar_thumbnails=thumbnails
+        ) == 1
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.error(f"Не удалось обработать аватар пользователя {user_id}: {e}")
+    finally:
+        if saved:
+            if user.avatar.name != uploaded:
+                default_storage.delete(uploaded)
+        else:
+            for name in created:
+                default_storage.delete(name)
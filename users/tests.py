@@ -1,7 +1,27 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+import fakeredis
+from PIL import Image
+
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from users.authentication import CACHED_FIELDS, CachedJWTAuthentication, _local_users
 from users.models import User
+from users.tasks import process_avatar
+from users.thumbnails import NORMALIZED_DIR, THUMBNAIL_SIZES, build_avatar_thumbnails
+from users.validators import AvatarUploadValidator
 
 
 class UserAPITests(APITestCase):
@@ -133,3 +153,338 @@ class UserAPITests(APITestCase):
         url = reverse('users:users-get', args=[self.user.pk])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'register_ip': '2/min', 'token_ip': '2/min'},
+})
+class UserThrottlingTests(APITestCase):
+    """
+    Тесты ограничения частоты запросов к эндпоинтам регистрации и получения токена.
+    """
+
+    def setUp(self):
+        """
+        Подменяет Redis ограничителей на fakeredis и создает пользователя.
+        """
+        patcher = mock.patch('config.throttling.get_redis', return_value=fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        User.objects.create_user(email='throttle@example.com', password='testpassword')
+
+    def test_token_throttled_by_ip(self):
+        """
+        После исчерпания корзины запросы токена отклоняются с кодом 429 и заголовком Retry-After.
+        """
+        data = {'email': 'throttle@example.com', 'password': 'testpassword'}
+        for _ in range(2):
+            response = self.client.post(reverse('users:token_obtain_pair'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('users:token_obtain_pair'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_register_throttled_by_ip(self):
+        """
+        Регистрации с одного IP-адреса ограничиваются независимо от запросов токена.
+        """
+        self.client.post(reverse('users:token_obtain_pair'),
+                         {'email': 'throttle@example.com', 'password': 'testpassword'}, format='json')
+        for i in range(2):
+            response = self.client.post(reverse('users:user-register'),
+                                        {'email': f'new{i}@example.com', 'password': 'pw'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(reverse('users:user-register'),
+                                    {'email': 'new2@example.com', 'password': 'pw'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_ignored_without_proxies(self):
+        """
+        Без доверенных прокси IP-адрес берется из REMOTE_ADDR: подмена X-Forwarded-For не обходит ограничение.
+        """
+        data = {'email': 'throttle@example.com', 'password': 'testpassword'}
+        for i in range(3):
+            response = self.client.post(reverse('users:token_obtain_pair'), data, format='json',
+                                        HTTP_X_FORWARDED_FOR=f'10.0.0.{i}')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """
+    Тесты кеширования пользователей при JWT-аутентификации.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователя и устанавливает его токен доступа в заголовках клиента.
+        """
+        self.user = User.objects.create_user(email='cached@example.com', password='testpassword')
+        self.url = reverse('habit:habits_list')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def user_queries(self):
+        """
+        Выполняет запрос к списку привычек и возвращает запросы к таблице пользователей.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in context.captured_queries if User._meta.db_table in query['sql']]
+
+    def test_user_loaded_once(self):
+        """
+        Пользователь загружается из базы данных только при первом запросе.
+        """
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_shared_cache_used_after_local_expiry(self):
+        """
+        После устаревания записи в памяти процесса пользователь берется из общего кеша.
+        """
+        self.user_queries()
+        _local_users.clear()
+        self.assertEqual(self.user_queries(), [])
+
+    def test_cache_holds_auth_fields_only(self):
+        """
+        В кеше нет хэша пароля, а каждый запрос получает собственный экземпляр пользователя.
+        """
+        authentication = CachedJWTAuthentication()
+        token = authentication.get_validated_token(str(RefreshToken.for_user(self.user).access_token))
+        first, second = authentication.get_user(token), authentication.get_user(token)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.pk, self.user.pk)
+        self.assertEqual(first.email, self.user.email)
+        fields, _ = _local_users[str(self.user.pk)][1]
+        self.assertEqual(set(fields), set(CACHED_FIELDS))
+        version = cache.get(f'auth:user:{self.user.pk}:version', 0)
+        shared_fields, _ = cache.get(f'auth:user:{self.user.pk}:v{version}')
+        self.assertEqual(shared_fields, fields)
+        self.assertNotIn('password', shared_fields)
+        with self.assertNumQueries(1):
+            self.assertTrue(first.check_password('testpassword'))
+
+    def test_deactivated_user_rejected(self):
+        """
+        Деактивация пользователя сбрасывает кеш, и следующий запрос отклоняется.
+        """
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserListAPITests(APITestCase):
+    """
+    Тесты постраничного списка пользователей.
+    """
+
+    def setUp(self):
+        """
+        Создает пользователей и аутентифицирует клиента первым из них.
+        """
+        self.users = [User.objects.create_user(email=f'list{i}@example.com', password='pw') for i in range(5)]
+        self.url = reverse('users:users-list')
+        self.client.force_authenticate(self.users[0])
+
+    def test_compact_page(self):
+        """
+        Список разбит на страницы по курсору и содержит только компактные поля.
+        """
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([user['id'] for user in response.data['results']], [user.pk for user in self.users[:2]])
+        self.assertNotIn('groups', response.data['results'][0])
+        self.assertNotIn('password', response.data['results'][0])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([user['id'] for user in response.data['results']], [user.pk for user in self.users[2:4]])
+
+    def test_full_page_query_count_constant(self):
+        """
+        Полное представление загружает группы и разрешения одним запросом на страницу.
+        """
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'full': 'true', 'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(response.data['results'][0]['groups'], [])
+
+
+class AvatarThumbnailTests(APITestCase):
+    """
+    Тесты создания миниатюр аватара.
+    """
+
+    def setUp(self):
+        """
+        Перенаправляет загрузку файлов во временный каталог и создает пользователя с аватаром.
+        """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        buffer = BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, format='JPEG')
+        with self.captureOnCommitCallbacks() as self.callbacks:
+            self.user = User.objects.create_user(email='avatar@example.com', password='pw',
+                                                 avatar=SimpleUploadedFile('photo.jpeg', buffer.getvalue()))
+
+    def test_upload_schedules_task(self):
+        """
+        Сохранение нового аватара ставит задачу создания миниатюр после фиксации транзакции.
+        """
+        self.assertEqual(len(self.callbacks), 1)
+
+    def test_thumbnails_generated(self):
+        """
+        Задача создает квадратные миниатюры всех размеров под именами из хэша содержимого.
+        """
+        process_avatar(self.user.pk)
+        self.user.refresh_from_db()
+
+        thumbnails = self.user.avatar_thumbnails
+        self.assertEqual(thumbnails['source'], self.user.avatar.name)
+        for size, side in THUMBNAIL_SIZES.items():
+            with default_storage.open(thumbnails[size]['webp']) as file, Image.open(file) as image:
+                self.assertEqual(image.size, (side, side))
+                self.assertEqual(image.format, 'WEBP')
+            self.assertTrue(thumbnails[size]['jpeg'].endswith(f'_{side}.jpeg'))
+
+        process_avatar(self.user.pk)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_thumbnails, thumbnails)
+
+    def test_other_field_saves_do_not_schedule_task(self):
+        """
+        Сохранение пользователя без изменения аватара (например, `last_login` при входе) не ставит задачу.
+        """
+        user = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.save(update_fields=['last_login'])
+            user.first_name = 'Иван'
+            user.save()
+        self.assertEqual(callbacks, [])
+
+    def test_failed_processing_keeps_original(self):
+        """
+        Если миниатюры не созданы, исходный файл и запись не меняются, а обработанный файл удаляется.
+        """
+        uploaded = self.user.avatar.name
+        with mock.patch('users.tasks.build_avatar_thumbnails', side_effect=OSError('disk full')):
+            process_avatar(self.user.pk)
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.avatar.name, uploaded)
+        self.assertTrue(default_storage.exists(uploaded))
+        self.assertEqual(default_storage.listdir(NORMALIZED_DIR)[1], [])
+
+    def test_replaced_avatar_not_overwritten(self):
+        """
+        Если за время обработки аватар заменен, запись не меняется, а созданные задачей файлы удаляются.
+        """
+        uploaded = self.user.avatar.name
+
+        def replace_avatar(avatar, created):
+            thumbnails = build_avatar_thumbnails(avatar, created)
+            User.objects.filter(pk=self.user.pk).update(avatar='users/avatars/other.jpeg')
+            return thumbnails
+
+        with mock.patch('users.tasks.build_avatar_thumbnails', side_effect=replace_avatar):
+            process_avatar(self.user.pk)
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.avatar.name, 'users/avatars/other.jpeg')
+        self.assertEqual(self.user.avatar_thumbnails, {})
+        self.assertTrue(default_storage.exists(uploaded))
+        self.assertEqual(default_storage.listdir(NORMALIZED_DIR)[1], [])
+        self.assertEqual(default_storage.listdir('users/avatars/thumbnails')[1], [])
+
+    def test_api_returns_thumbnails_only(self):
+        """
+        API возвращает URL миниатюр вместо исходного файла аватара.
+        """
+        process_avatar(self.user.pk)
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('users:users-get', args=[self.user.pk]))
+
+        self.assertNotIn('avatar', response.data)
+        self.assertEqual(set(response.data['avatar_thumbnails']), set(THUMBNAIL_SIZES))
+        self.assertTrue(response.data['avatar_thumbnails']['small']['webp'].startswith('http://testserver/media/'))
+
+
+class AvatarUploadTests(APITestCase):
+    """
+    Тесты загрузки аватара через API.
+    """
+
+    def setUp(self):
+        """
+        Перенаправляет загрузку файлов во временный каталог и аутентифицирует пользователя без аватара.
+        """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='upload@example.com', password='pw')
+        self.url = reverse('users:users-update', args=[self.user.pk])
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name='photo.jpeg'):
+        """
+        Загружает файл аватара и возвращает ответ.
+        """
+        return self.client.patch(self.url, {'avatar': SimpleUploadedFile(name, content)}, format='multipart')
+
+    def test_upload_accepted_and_processed_in_task(self):
+        """
+        Загрузка принимается без обработки изображения, задача пересохраняет аватар без EXIF.
+        """
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGB', (2000, 1000), 'blue').save(buffer, format='JPEG', exif=exif)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.upload(buffer.getvalue())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['avatar_thumbnails'], {})
+        self.assertEqual(len(callbacks), 1)
+
+        self.user.refresh_from_db()
+        uploaded = self.user.avatar.name
+        process_avatar(self.user.pk)
+        self.user.refresh_from_db()
+
+        self.assertTrue(self.user.avatar.name.startswith(f'{NORMALIZED_DIR}/'))
+        self.assertFalse(default_storage.exists(uploaded))
+        with default_storage.open(self.user.avatar.name) as file, Image.open(file) as image:
+            self.assertEqual(image.size, (1024, 512))
+            self.assertEqual(len(image.getexif()), 0)
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=1000, FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_too_large_rejected(self):
+        """
+        Файл больше `FILE_UPLOAD_MAX_SIZE` отклоняется.
+        """
+        response = self.upload(b'\xff' * 5000)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(response.data['avatar'][0].startswith('Размер файла'))
+
+    def test_not_image_rejected(self):
+        """
+        Файл, заголовок которого не является изображением допустимого формата, отклоняется.
+        """
+        response = self.upload(b'not an image', name='photo.txt')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['avatar'], [AvatarUploadValidator.format_message])
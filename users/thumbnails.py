@@ -0,0 +1,122 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Стороны квадратных миниатюр аватара, пикселей
+THUMBNAIL_SIZES = {
+    "small": 64,
+    "medium": 128,
+    "large": 256,
+}
+
+# Форматы миниатюр и параметры сохранения Pillow
+THUMBNAIL_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 85, "optimize": True, "progressive": True},
+}
+
+THUMBNAIL_DIR = "users/avatars/thumbnails"
+
+# Обработанные аватары: без метаданных EXIF, не больше `AVATAR_MAX_SIDE` пикселей по большей стороне
+NORMALIZED_DIR = "users/avatars/normalized"
+AVATAR_MAX_SIDE = 1024
+
+
+def _content_hash(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _render(image, side, options):
+    thumbnail = ImageOps.fit(image, (side, side), method=Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    thumbnail.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def normalize_avatar(avatar, created=None):
+    """
+    Декодирует загруженный аватар и пересохраняет его в JPEG без метаданных.
+
+    Изображение поворачивается по EXIF, уменьшается до `AVATAR_MAX_SIDE` по большей стороне и сохраняется
+    без EXIF (в том числе без координат съемки) под именем из хэша результата. Исходный файл не удаляется:
+    его удаляет вызывающий после сохранения нового пути. Уже обработанные аватары не изменяются.
+
+    Аргументы:
+        avatar (FieldFile): Загруженный файл аватара.
+        created (list | None): Список, в который добавляется путь файла, если он создан.
+
+    Возвращает:
+        str: Путь обработанного аватара в хранилище.
+    """
+    if avatar.name.startswith(f"{NORMALIZED_DIR}/"):
+        return avatar.name
+
+    with avatar.open("rb"), Image.open(avatar) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        image = image.convert("RGB")
+        image.thumbnail((AVATAR_MAX_SIDE, AVATAR_MAX_SIDE), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, **THUMBNAIL_FORMATS["jpeg"])
+
+    content = buffer.getvalue()
+    name = f"{NORMALIZED_DIR}/{hashlib.sha256(content).hexdigest()[:16]}.jpeg"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+        if created is not None:
+            created.append(name)
+    return name
+
+
+def build_avatar_thumbnails(avatar, created=None):
+    """
+    Создает миниатюры аватара всех размеров и форматов.
+
+    Изображение поворачивается по EXIF и обрезается до квадрата по центру. Имена файлов строятся из хэша
+    содержимого исходного файла, поэтому повторная обработка того же файла не создает новых файлов,
+    а сами миниатюры можно кешировать в браузере бессрочно.
+
+    Аргументы:
+        avatar (FieldFile): Исходный файл аватара.
+        created (list | None): Список, в который добавляются пути созданных файлов.
+
+    Возвращает:
+        dict: Пути миниатюр в хранилище по размерам и форматам и имя исходного файла (`source`).
+    """
+    with avatar.open("rb"):
+        digest = _content_hash(avatar)
+        avatar.seek(0)
+        with Image.open(avatar) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+
+            thumbnails = {"source": avatar.name}
+            for size, side in THUMBNAIL_SIZES.items():
+                thumbnails[size] = {}
+                for extension, options in THUMBNAIL_FORMATS.items():
+                    name = f"{THUMBNAIL_DIR}/{digest}_{side}.{extension}"
+                    if not default_storage.exists(name):
+                        name = default_storage.save(name, ContentFile(_render(image, side, options)))
+                        if created is not None:
+                            created.append(name)
+                    thumbnails[size][extension] = name
+    return thumbnails
+
+
+def thumbnail_urls(thumbnails):
+    """
+    Возвращает URL миниатюр по размерам и форматам (без служебного ключа `source`).
+    """
+    return {
+        size: {extension: default_storage.url(name) for extension, name in formats.items()}
+        for size, formats in thumbnails.items() if size in THUMBNAIL_SIZES
+    }
@@ -1,7 +1,8 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from users.apps import UsersConfig
-from users.views import UserCreateAPIView, UserListAPIView, UserRetrieveView, UserUpdateAPIView, UserDestroyAPIView
+from users.views import UserCreateAPIView, UserListAPIView, UserRetrieveView, UserUpdateAPIView, UserDestroyAPIView, \
+    UserTokenObtainPairView
 
 app_name = UsersConfig.name
 
@@ -13,6 +14,6 @@ urlpatterns = [
     path('users/delete/<int:pk>/', UserDestroyAPIView.as_view(), name='users-delete'),
 
 
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/', UserTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
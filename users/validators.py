@@ -0,0 +1,37 @@
+from django.conf import settings
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers
+
+
+class AvatarUploadValidator:
+    """
+    Валидатор загружаемого аватара.
+
+    Проверяет размер файла и заголовок изображения без декодирования пикселей: `Image.open` читает
+    только заголовок, поэтому проверка не зависит от разрешения снимка. Декодирование и пересохранение
+    выполняются позже в задаче `users.tasks.process_avatar`.
+
+    Допустимые форматы: JPEG, PNG, WebP. Максимальный размер файла — `FILE_UPLOAD_MAX_SIZE`,
+    максимальное количество пикселей — `AVATAR_MAX_PIXELS`.
+    """
+    formats = ("JPEG", "PNG", "WEBP")
+    size_message = "Размер файла не должен превышать {max_size} МБ."
+    format_message = "Допустимые форматы изображения: JPEG, PNG, WebP."
+    pixels_message = "Разрешение изображения слишком велико."
+
+    def __call__(self, file):
+        if file.size > settings.FILE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                self.size_message.format(max_size=settings.FILE_UPLOAD_MAX_SIZE // (1024 * 1024))
+            )
+        try:
+            with Image.open(file) as image:
+                image_format, (width, height) = image.format, image.size
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            raise serializers.ValidationError(self.format_message)
+        finally:
+            file.seek(0)
+        if image_format not in self.formats:
+            raise serializers.ValidationError(self.format_message)
+        if width * height > settings.AVATAR_MAX_PIXELS:
+            raise serializers.ValidationError(self.pixels_message)
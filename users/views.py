@@ -1,7 +1,11 @@
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from users.models import User
-from users.serializers import UserSerializer
+from users.paginators import UserCursorPagination
+from users.serializers import UserSerializer, UserListSerializer
 from rest_framework import generics
+from rest_framework_simplejwt.views import TokenObtainPairView
+from config.replicas import ReplicaReadsMixin
+from config.throttling import IPTokenBucketThrottle
 
 
 class UserCreateAPIView(generics.CreateAPIView):
@@ -16,10 +20,13 @@ class UserCreateAPIView(generics.CreateAPIView):
         - `serializer_class` (UserSerializer): Сериализатор для валидации и создания пользователя.
         - `queryset` (QuerySet): Набор всех пользователей.
         - `permission_classes` (list): Список классов разрешений, позволяющих доступ без аутентификации (AllowAny).
+        - `throttle_classes` (list): Ограничение частоты регистраций с одного IP-адреса (`register_ip`).
     """
     serializer_class = UserSerializer
     queryset = User.objects.all()
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'register'
 
     def perform_create(self, serializer):
         """
@@ -36,22 +43,45 @@ class UserCreateAPIView(generics.CreateAPIView):
         user.save()
 
 
-class UserListAPIView(generics.ListAPIView):
+class UserListAPIView(ReplicaReadsMixin, generics.ListAPIView):
     """
-    API представление для получения списка всех пользователей.
+    API представление для получения списка пользователей.
 
-    Использует сериализатор UserSerializer для отображения информации о пользователях.
+    По умолчанию возвращает компактное представление пользователей (`UserListSerializer`).
+    С параметром запроса `full=true` возвращает все поля (`UserSerializer`), при этом группы
+    и разрешения загружаются через `prefetch_related` — двумя запросами на страницу.
+
+    Список разбивается на страницы по курсору (`UserCursorPagination`), поэтому количество запросов
+    и размер ответа на страницу постоянны. Читается из реплик, если они настроены (`ReplicaReadsMixin`).
 
     Требует аутентификации.
 
     Атрибуты:
-        serializer_class (UserSerializer): Сериализатор для отображения пользователей.
+        serializer_class (UserListSerializer): Сериализатор для отображения пользователей.
         queryset (QuerySet): Набор всех пользователей.
         permission_classes (list): Список классов разрешений, требующий аутентификации.
+        pagination_class (UserCursorPagination): Постраничная разбивка по курсору.
     """
-    serializer_class = UserSerializer
+    serializer_class = UserListSerializer
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = UserCursorPagination
+
+    @property
+    def full(self):
+        """
+        Запрошено ли полное представление пользователей (параметр `full=true`).
+        """
+        return getattr(self.request, 'query_params', {}).get('full', '').lower() in ('true', '1')
+
+    def get_serializer_class(self):
+        return UserSerializer if self.full else UserListSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.full:
+            queryset = queryset.prefetch_related('groups', 'user_permissions')
+        return queryset
 
 
 class UserRetrieveView(generics.RetrieveAPIView):
@@ -106,3 +136,16 @@ class UserDestroyAPIView(generics.DestroyAPIView):
     serializer_class = UserSerializer
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated]
+
+
+class UserTokenObtainPairView(TokenObtainPairView):
+    """
+    API представление для получения пары JWT-токенов по email и паролю.
+
+    Ограничивает частоту запросов с одного IP-адреса (`token_ip`), чтобы затруднить перебор паролей.
+
+    Атрибуты:
+        throttle_classes (list): Ограничение частоты запросов по IP-адресу.
+    """
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'token'